@@ -12,9 +12,11 @@ AI客服问答语义比对工具
 🔗 完美集成 Dify Chat Tester，支持直接读取其输出进行语义评估
 """
 
+import json
 import warnings
 import logging
 import os
+import queue
 import sys
 import threading
 
@@ -23,7 +25,7 @@ warnings.filterwarnings("ignore", category=FutureWarning, module="google.api_cor
 warnings.filterwarnings("ignore", category=UserWarning, module="google.api_core")
 warnings.filterwarnings("ignore", category=FutureWarning, module="google.auth")
 
-from typing import Optional, TYPE_CHECKING, List, Tuple
+from typing import Callable, Dict, Optional, TYPE_CHECKING, List, Tuple
 from colorama import Fore, Style
 
 # 导入版本信息
@@ -38,12 +40,16 @@ if TYPE_CHECKING:
     from semantic_tester.api.base_provider import AIProvider  # noqa: F401
     from semantic_tester.excel import ExcelProcessor  # noqa: F401
     from semantic_tester.ui import CLIInterface  # noqa: F401
+    from semantic_tester.ui.worker_ui import WorkerTableUI  # noqa: F401
     from semantic_tester.utils import FileUtils, ValidationUtils  # noqa: F401
 
 # 设置日志 - 使用简洁模式
 LoggerUtils.setup_logging(quiet_console=True)
 logger = logging.getLogger(__name__)
 
+# 处理结束后等待工作线程退出的最长时间（秒）
+_WORKER_JOIN_TIMEOUT = 10.0
+
 
 class SemanticTestApp:
     """语义测试应用主类"""
@@ -64,6 +70,10 @@ class SemanticTestApp:
         self.provider_manager: Optional["ProviderManager"] = None
         self.excel_processor: Optional["ExcelProcessor"] = None
         self._kb_cache: Optional[str] = None  # 知识库内容缓存
+        self._doc_cache: Dict[str, Optional[str]] = {}  # 单文档内容缓存 (按文档名)
+        self._doc_index: Optional[Dict[str, str]] = None  # 知识库顶层文件名 -> 路径
+        # 同一任务内 (文档名, 问题, 回答) -> (结果, 原因)，重复的问答直接复用结果
+        self._result_memo: Dict[Tuple[str, str, str], Tuple[str, str]] = {}
 
     def initialize(self) -> bool:
         """
@@ -137,8 +147,8 @@ class SemanticTestApp:
         if self.provider_manager:
             # 直接确定供应商配置
             print(f"\n{Fore.CYAN}🔍 正在执行 API 密钥有效性预检...{Style.RESET_ALL}")
-            validation_results = (
-                self.provider_manager.validate_all_configured_channels()
+            validation_results = self.provider_manager.validate_all_configured_channels(
+                skip_probe=self.env_manager.get_skip_key_validation()
             )
 
             # 使用 Rich 表格展示验证结果
@@ -275,6 +285,9 @@ class SemanticTestApp:
             use_full_doc_match=use_full_doc_match,
             provider_configs=provider_configs,
             save_interval=self.config.auto_save_interval,
+            batch_size=self.env_manager.get_batch_config().get(
+                "semantic_batch_size", 1
+            ),
         )
         return  # 结束 run_interactive_mode
 
@@ -289,11 +302,13 @@ class SemanticTestApp:
         use_full_doc_match: bool = False,
         provider_configs: Optional[List[Tuple["AIProvider", int]]] = None,
         save_interval: int = 10,
+        batch_size: int = 1,
     ):
         """处理数据 (基于队列的多渠道并发)"""
-        import queue
         import time
 
+        from semantic_tester.api.base_provider import request_shutdown, reset_shutdown
+
         # 保存流式输出 / 思维链配置
         self.enable_stream = enable_stream
         try:
@@ -325,22 +340,61 @@ class SemanticTestApp:
                     f"{Fore.YELLOW}未发现有效历史记录，将重新开始处理。{Style.RESET_ALL}"
                 )
 
+        # 恢复上次中断时尚未写入 Excel 的结果
+        journal_path = f"{output_path}.journal.jsonl"
+        restored_count = excel_processor.replay_result_journal(
+            journal_path, result_columns
+        )
+        if restored_count > 0:
+            print(
+                f"{Fore.GREEN}已从结果日志恢复 {restored_count} 条未保存的记录。{Style.RESET_ALL}"
+            )
+
         logger.info(f"共需处理 {total_records} 条问答记录。")
-        self._kb_cache = None  # 每次任务开始前清理缓存
+        # 每次任务开始前清理缓存
+        self._kb_cache = None
+        self._doc_cache = {}
+        self._doc_index = None
+        self._result_memo = {}
 
         # 准备任务队列
-        pending_rows = []
-        for i in range(total_records):
-            if not excel_processor.has_result(i, result_columns):
-                pending_rows.append(i)
+        pending_rows = excel_processor.get_pending_rows(result_columns)
+        loaded_count = total_records - len(pending_rows)
+
+        # 整列预清洗行数据，工作线程按位置直接取值
+        excel_processor.prepare_row_data(column_mapping)
+
+        # 问题或回答为空的行无需调用 API，一次性标记为跳过
+        skipped_rows = excel_processor.mark_empty_rows(
+            pending_rows, column_mapping, result_columns
+        )
+        if skipped_rows:
+            skipped_set = set(skipped_rows)
+            pending_rows = [row for row in pending_rows if row not in skipped_set]
+            logger.info(f"跳过 {len(skipped_rows)} 条问题或回答为空的记录")
 
         if not pending_rows:
+            if (
+                restored_count > 0 or skipped_rows
+            ) and excel_processor.save_final_results(output_path):
+                if restored_count > 0:
+                    os.remove(journal_path)
             print(f"{Fore.GREEN}✅ 所有记录已处理完成。{Style.RESET_ALL}")
             return
 
+        # 每条结果即时追加到结果日志，两次保存之间中断也不会丢失
+        excel_processor.open_result_journal(journal_path)
+
+        # 每个任务是一组行索引；启用批量比对时，同一文档的记录合并为一组
         task_queue = queue.Queue()
-        for r in pending_rows:
-            task_queue.put(r)
+        for row_group in self._group_rows_for_batch(
+            excel_processor,
+            pending_rows,
+            column_mapping,
+            batch_size,
+            use_full_doc_match,
+        ):
+            task_queue.put(row_group)
 
         # 默认供应商回退
         if not provider_configs:
@@ -358,107 +412,51 @@ class SemanticTestApp:
 
         ui = WorkerTableUI(total_records=total_records, concurrency=total_concurrency)
         ui.processed_count = loaded_count
-        ui.progress.update(ui.main_task, completed=loaded_count)
+        ui.skipped_count = len(skipped_rows)
+        ui.progress.update(ui.main_task, completed=loaded_count + len(skipped_rows))
 
         stop_event = threading.Event()
+        reset_shutdown()
 
-        def _provider_worker_loop(provider, ui):
-            thread_id = threading.get_ident()
-            p_name = provider.name
+        # 每组行共用的处理参数
+        row_kwargs = dict(
+            total_records=total_records,
+            knowledge_base_dir=knowledge_base_dir,
+            column_mapping=column_mapping,
+            result_columns=result_columns,
+            output_path=output_path,
+            excel_processor=excel_processor,
+            use_full_doc_match=use_full_doc_match,
+        )
 
+        def _on_row_done():
+            """每处理 N 条记录保存一次，防止长时间中断丢失；交给写入线程执行"""
+            processed_total = ui.processed_count + ui.error_count + ui.skipped_count
+            if processed_total > 0 and processed_total % save_interval == 0:
+                save_queue.put(processed_total)
+
+        def _provider_worker_loop(provider, ui):
             while not task_queue.empty() and not stop_event.is_set():
                 try:
-                    row_idx = task_queue.get_nowait()
+                    row_group = task_queue.get_nowait()
                 except queue.Empty:
                     break
 
-                # 获取当前行问题用于展示
-                row_data_preview = excel_processor.get_row_data(row_idx, column_mapping)
-                current_question = row_data_preview.get("question", "")
-
-                ui.update_worker(
-                    thread_id,
-                    "分析中...",
-                    row_idx,
-                    provider_name=p_name,
-                    question=current_question,
-                )
-
-                # 更新回调以包含问题
-                def worker_stream_callback(content):
-                    """实时更新 worker UI 预览"""
-                    ui.update_worker(
-                        thread_id,
-                        "🚀 分析中...",
-                        row_idx,
-                        preview=content,
-                        provider_name=p_name,
-                        question=current_question,
-                    )
-
                 try:
-                    # 并发模式下静默处理，以免弄乱 UI
-                    result = self._process_single_row(
-                        row_index=row_idx,
-                        total_records=total_records,
-                        knowledge_base_dir=knowledge_base_dir,
-                        column_mapping=column_mapping,
-                        result_columns=result_columns,
-                        output_path=output_path,
-                        show_comparison_result=False,
-                        excel_processor=excel_processor,
-                        use_full_doc_match=use_full_doc_match,
-                        quiet=True,
-                        provider_id=provider.id,
-                        stream_callback=worker_stream_callback,  # 注入回调
+                    self._process_row_group(
+                        provider, row_group, ui, stop_event, _on_row_done, row_kwargs
                     )
-
-                    if result == "processed":
-                        similarity_col = result_columns["similarity_result"][0]
-                        brief_result = excel_processor.get_result(
-                            row_idx, similarity_col
-                        )
-                        ui.update_worker(
-                            thread_id,
-                            "完成",
-                            row_idx,
-                            preview=f"[{brief_result}]",
-                            question=current_question,
-                        )
-                        ui.increment_progress("processed")
-                    elif result == "skipped":
-                        ui.update_worker(
-                            thread_id, "跳过", row_idx, question=current_question
-                        )
-                        ui.increment_progress("skipped")
-                    else:
-                        ui.update_worker(
-                            thread_id, "错误", row_idx, question=current_question
-                        )
-                        ui.increment_progress("error")
-
-                except Exception as e:
-                    logger.error(f"Worker [{p_name}] 异常: {e}")
-                    ui.update_worker(
-                        thread_id,
-                        f"错误: {str(e)[:15]}",
-                        row_idx,
-                        question=(
-                            current_question if "current_question" in locals() else ""
-                        ),
-                    )
-                    ui.increment_progress("error")
                 finally:
-                    # 处理自动保存 (每处理 N 条记录保存一次，防止长时间中断丢失)
-                    processed_total = (
-                        ui.processed_count + ui.error_count + ui.skipped_count
-                    )
-                    if processed_total > 0 and processed_total % save_interval == 0:
-                        excel_processor.save_intermediate_results(
-                            output_path, processed_total
-                        )
                     task_queue.task_done()
 
+        save_queue: "queue.Queue[Optional[int]]" = queue.Queue()
+        writer_thread = threading.Thread(
+            target=self._result_writer_loop,
+            args=(save_queue, excel_processor, output_path),
+            daemon=True,
+        )
+        writer_thread.start()
+
         # 启动线程
         worker_threads = []
         for provider, count in provider_configs:
@@ -489,15 +487,20 @@ class SemanticTestApp:
                 f"\n\n{Fore.YELLOW}⚠️  检测到中断，正在终止并保存记录...{Style.RESET_ALL}"
             )
             stop_event.set()
+            request_shutdown()
         finally:
             root_logger.setLevel(old_level)
 
-        # 等待所有线程退出
-        for t in worker_threads:
-            t.join(timeout=3.0)
+        # 等待工作线程退出（停止信号会立即结束重试/轮转等待），
+        # 再让写入线程处理完剩余请求后退出；无论线程是否全部退出都保存结果
+        self._join_worker_threads(worker_threads, stop_event, _WORKER_JOIN_TIMEOUT)
+
+        save_queue.put(None)
+        writer_thread.join()
 
-        # 确保保存最终结果
-        excel_processor.save_final_results(output_path)
+        # 确保保存最终结果，成功后结果日志不再需要
+        saved = excel_processor.save_final_results(output_path)
+        excel_processor.close_result_journal(remove=saved)
 
         # 打印详细结果摘要
         # 尝试汇总供应商信息以便显示
@@ -594,6 +597,9 @@ class SemanticTestApp:
 
             new_failed_rows = []
             retry_processed_count = 0
+            save_interval = self.config.auto_save_interval
+            journal_path = f"{output_path}.journal.jsonl"
+            excel_processor.open_result_journal(journal_path)
 
             try:
                 for idx, row_index in enumerate(current_failed_rows, 1):
@@ -614,9 +620,13 @@ class SemanticTestApp:
                         new_failed_rows.append(row_index)
                     elif result == "processed":
                         retry_processed_count += 1
+                    elif result == "interrupted":
+                        # 收到停止信号：本行及其后的记录保持原状态，不再继续重试
+                        new_failed_rows.extend(current_failed_rows[idx - 1 :])
+                        break
 
-                    # 定期保存中间结果（每10条）
-                    if idx % 10 == 0:
+                    # 定期保存中间结果，两次保存之间的结果由结果日志保护
+                    if idx % save_interval == 0:
                         excel_processor.save_intermediate_results(
                             output_path, retry_processed_count
                         )
@@ -625,12 +635,14 @@ class SemanticTestApp:
                 print(
                     f"\n\n{Fore.YELLOW}⚠️  用户中断重试。正在保存当前进度...{Style.RESET_ALL}"
                 )
-                excel_processor.save_final_results(output_path)
+                saved = excel_processor.save_final_results(output_path)
+                excel_processor.close_result_journal(remove=saved)
                 print(f"{Fore.GREEN}✅ 进度已保存到: {output_path}{Style.RESET_ALL}")
                 raise
 
             # 保存最终结果
-            excel_processor.save_final_results(output_path)
+            saved = excel_processor.save_final_results(output_path)
+            excel_processor.close_result_journal(remove=saved)
 
             print(
                 f"\n{Fore.CYAN}重试完成。成功修复: {retry_processed_count} 条，仍失败: {len(new_failed_rows)} 条。{Style.RESET_ALL}"
@@ -674,6 +686,336 @@ class SemanticTestApp:
             return None
         return self.excel_processor
 
+    def _group_rows_for_batch(
+        self,
+        excel_processor: "ExcelProcessor",
+        row_indices: List[int],
+        column_mapping: dict,
+        batch_size: int,
+        use_full_doc_match: bool = False,
+    ) -> List[List[int]]:
+        """
+        将待处理行按文档分组，每组最多 batch_size 条
+
+        Args:
+            excel_processor: Excel 处理器
+            row_indices: 待处理的行索引
+            column_mapping: 列映射配置
+            batch_size: 每组最大记录数，小于等于 1 时每行单独成组
+            use_full_doc_match: 是否使用全量文档匹配（所有行共用同一文档）
+
+        Returns:
+            List[List[int]]: 行索引分组
+        """
+        if batch_size <= 1:
+            return [[row_idx] for row_idx in row_indices]
+
+        if use_full_doc_match:
+            doc_names = [""] * len(row_indices)
+        else:
+            doc_names = excel_processor.get_doc_names(row_indices, column_mapping)
+
+        groups: Dict[str, List[int]] = {}
+        for row_idx, doc_name in zip(row_indices, doc_names):
+            groups.setdefault(doc_name, []).append(row_idx)
+
+        return [
+            rows[i : i + batch_size]
+            for rows in groups.values()
+            for i in range(0, len(rows), batch_size)
+        ]
+
+    @staticmethod
+    def _join_worker_threads(
+        worker_threads: List[threading.Thread],
+        stop_event: threading.Event,
+        timeout: float,
+    ) -> List[threading.Thread]:
+        """
+        在截止时间内等待工作线程退出
+
+        停止信号只能打断供应商自身的等待，阻塞在网络请求中的线程可能迟迟不退出，
+        因此最多等待 timeout 秒；等待期间再次中断则立即停止等待。
+
+        Args:
+            worker_threads: 工作线程列表
+            stop_event: 任务停止信号
+            timeout: 最长等待秒数
+
+        Returns:
+            List[threading.Thread]: 仍未退出的线程
+        """
+        import time
+
+        from semantic_tester.api.base_provider import request_shutdown
+
+        deadline = time.monotonic() + timeout
+        try:
+            for t in worker_threads:
+                t.join(max(0.0, deadline - time.monotonic()))
+        except KeyboardInterrupt:
+            stop_event.set()
+            request_shutdown()
+
+        alive = [t for t in worker_threads if t.is_alive()]
+        if alive:
+            logger.warning("%d 个工作线程未及时退出，先保存已完成的结果", len(alive))
+        return alive
+
+    @staticmethod
+    def _result_writer_loop(
+        save_queue: "queue.Queue[Optional[int]]",
+        excel_processor: "ExcelProcessor",
+        output_path: str,
+    ):
+        """
+        单一写入线程：串行保存中间结果，合并积压的保存请求
+
+        收到 None 时处理完它之前的请求后退出。
+
+        Args:
+            save_queue: 保存请求队列（已处理记录数，None 表示结束）
+            excel_processor: Excel 处理器
+            output_path: 输出文件路径
+        """
+        while True:
+            processed_total = save_queue.get()
+            if processed_total is None:
+                return
+
+            stop_after_save = False
+            while True:
+                try:
+                    pending = save_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if pending is None:
+                    stop_after_save = True
+                    break
+                processed_total = max(processed_total, pending)
+
+            excel_processor.save_intermediate_results(output_path, processed_total)
+            if stop_after_save:
+                return
+
+    def _process_row_group(
+        self,
+        provider: "AIProvider",
+        row_group: List[int],
+        ui: "WorkerTableUI",
+        stop_event: threading.Event,
+        on_row_done: Callable[[], None],
+        row_kwargs: dict,
+    ):
+        """
+        在工作线程中处理一组行
+
+        多条记录先尝试合并为一次请求；批量比对失败或未得到结果的记录逐条处理。
+        每行开始前检查停止信号。
+
+        Args:
+            provider: 当前工作线程使用的供应商
+            row_group: 行索引分组
+            ui: 并发进度界面
+            stop_event: 任务停止信号
+            on_row_done: 每行处理结束后的回调（用于定期保存）
+            row_kwargs: 传给 _process_single_row 的公共参数
+        """
+        thread_id = threading.get_ident()
+
+        batch_done: set = set()
+        if len(row_group) > 1 and not stop_event.is_set():
+            ui.update_worker(
+                thread_id,
+                f"批量分析 {len(row_group)} 条...",
+                row_group[0],
+                provider_name=provider.name,
+            )
+            try:
+                batch_done = self._process_row_batch(
+                    provider,
+                    row_group,
+                    row_kwargs["knowledge_base_dir"],
+                    row_kwargs["column_mapping"],
+                    row_kwargs["result_columns"],
+                    row_kwargs["excel_processor"],
+                    row_kwargs["use_full_doc_match"],
+                )
+            except Exception as e:
+                logger.warning("批量比对异常，将逐条处理: %s", e)
+
+        for row_idx in row_group:
+            if stop_event.is_set():
+                break
+            self._process_worker_row(
+                provider, row_idx, row_idx in batch_done, ui, on_row_done, row_kwargs
+            )
+
+    def _process_worker_row(
+        self,
+        provider: "AIProvider",
+        row_idx: int,
+        already_done: bool,
+        ui: "WorkerTableUI",
+        on_row_done: Callable[[], None],
+        row_kwargs: dict,
+    ):
+        """
+        在工作线程中处理单行并更新界面（异常不会中断工作线程）
+
+        Args:
+            provider: 当前工作线程使用的供应商
+            row_idx: 行索引
+            already_done: 是否已由批量比对保存结果
+            ui: 并发进度界面
+            on_row_done: 处理结束后的回调（用于定期保存）
+            row_kwargs: 传给 _process_single_row 的公共参数
+        """
+        thread_id = threading.get_ident()
+        p_name = provider.name
+        excel_processor = row_kwargs["excel_processor"]
+        result_columns = row_kwargs["result_columns"]
+        current_question = ""
+
+        def worker_stream_callback(content):
+            """实时更新 worker UI 预览"""
+            ui.update_worker(
+                thread_id,
+                "🚀 分析中...",
+                row_idx,
+                preview=content,
+                provider_name=p_name,
+                question=current_question,
+            )
+
+        try:
+            # 获取当前行问题用于展示
+            current_question = excel_processor.get_row_data(
+                row_idx, row_kwargs["column_mapping"]
+            ).get("question", "")
+            ui.update_worker(
+                thread_id,
+                "分析中...",
+                row_idx,
+                provider_name=p_name,
+                question=current_question,
+            )
+
+            # 并发模式下静默处理，以免弄乱 UI
+            if already_done:
+                result = "processed"
+            else:
+                result = self._process_single_row(
+                    row_index=row_idx,
+                    show_comparison_result=False,
+                    quiet=True,
+                    provider_id=provider.id,
+                    stream_callback=worker_stream_callback,  # 注入回调
+                    **row_kwargs,
+                )
+
+            if result == "processed":
+                similarity_col = result_columns["similarity_result"][0]
+                brief_result = excel_processor.get_result(row_idx, similarity_col)
+                ui.update_worker(
+                    thread_id,
+                    "完成",
+                    row_idx,
+                    preview=f"[{brief_result}]",
+                    question=current_question,
+                )
+                ui.increment_progress("processed")
+            elif result == "skipped":
+                ui.update_worker(thread_id, "跳过", row_idx, question=current_question)
+                ui.increment_progress("skipped")
+            elif result == "interrupted":
+                # 未写入结果，不计入进度，下次运行时继续处理
+                ui.update_worker(
+                    thread_id, "已中断", row_idx, question=current_question
+                )
+            else:
+                ui.update_worker(thread_id, "错误", row_idx, question=current_question)
+                ui.increment_progress("error")
+
+        except Exception as e:
+            logger.error("Worker [%s] 异常: %s", p_name, e)
+            ui.update_worker(
+                thread_id,
+                f"错误: {str(e)[:15]}",
+                row_idx,
+                question=current_question,
+            )
+            ui.increment_progress("error")
+        finally:
+            on_row_done()
+
+    def _process_row_batch(
+        self,
+        provider: "AIProvider",
+        row_indices: List[int],
+        knowledge_base_dir: str,
+        column_mapping: dict,
+        result_columns: dict,
+        excel_processor: "ExcelProcessor",
+        use_full_doc_match: bool = False,
+    ) -> set:
+        """
+        将同一文档的多条记录合并为一次请求进行比对
+
+        供应商不支持批量比对、行数据无效或结果缺失的记录不会保存，
+        由调用方逐条处理。
+
+        Returns:
+            set: 已保存结果的行索引
+        """
+        batch_check = getattr(provider, "check_semantic_similarity_batch", None)
+        if batch_check is None:
+            return set()
+
+        from semantic_tester.utils import ValidationUtils  # noqa: F811
+
+        rows = []
+        for row_idx in row_indices:
+            row_data = excel_processor.get_row_data(row_idx, column_mapping)
+            if not ValidationUtils.validate_row_data(row_data):
+                rows.append((row_idx, row_data))
+        if len(rows) < 2:
+            return set()
+
+        doc_content = self._read_document_content(
+            knowledge_base_dir=knowledge_base_dir,
+            doc_name=rows[0][1]["doc_name"],
+            use_full_doc_match=use_full_doc_match,
+        )
+        if not doc_content:
+            return set()
+
+        try:
+            results = batch_check(
+                [(row_data["question"], row_data["ai_answer"]) for _, row_data in rows],
+                doc_content,
+            )
+        except Exception as e:
+            logger.warning("批量比对失败，将逐条处理: %s", e)
+            return set()
+
+        done = set()
+        for (row_idx, row_data), item in zip(rows, results):
+            if item is None:
+                continue
+            result, reason = item
+            self._result_memo[
+                (row_data["doc_name"], row_data["question"], row_data["ai_answer"])
+            ] = (result, reason)
+            excel_processor.save_result(
+                row_index=row_idx,
+                result=result,
+                reason=reason,
+                result_columns=result_columns,
+            )
+            done.add(row_idx)
+        return done
+
     def _process_single_row(
         self,
         row_index: int,
@@ -703,12 +1045,14 @@ class SemanticTestApp:
             stream_callback: 流式输出回调函数
 
         Returns:
-            str: 处理结果状态 ("processed", "skipped", "error")
+            str: 处理结果状态 ("processed", "skipped", "error", "interrupted")；
+                "interrupted" 表示重试等待期间收到停止信号，该行不写入任何结果，
+                下次运行时继续处理
         """
         # 延迟导入
         from semantic_tester.ui import CLIInterface  # noqa: F811
         from semantic_tester.utils import ValidationUtils  # noqa: F811
-        import time
+        from semantic_tester.api.base_provider import shutdown_event
 
         row_number = row_index + 1
 
@@ -717,7 +1061,7 @@ class SemanticTestApp:
 
         # 如果是重试模式，进度显示略有不同（可选）
         if kwargs.get("is_retry", False):
-            logger.info(f"正在重试第 {row_number} 行...")
+            logger.info("正在重试第 %d 行...", row_number)
         elif not quiet:
             # 显示处理进度
             CLIInterface.print_progress(row_number, total_records)
@@ -734,12 +1078,23 @@ class SemanticTestApp:
                 total_records,
                 validation_errors,
                 result_columns,
-                output_path,
                 excel_processor,
                 quiet=quiet,
             )
             return "skipped"
 
+        # 相同的问答在本任务中已有结果时直接复用，无需再次调用 API
+        memo_key = (row_data["doc_name"], row_data["question"], row_data["ai_answer"])
+        memoized = self._result_memo.get(memo_key)
+        if memoized is not None:
+            excel_processor.save_result(
+                row_index=row_index,
+                result=memoized[0],
+                reason=memoized[1],
+                result_columns=result_columns,
+            )
+            return "processed"
+
         # 读取知识库文档内容
         doc_content = self._read_document_content(
             knowledge_base_dir=knowledge_base_dir,
@@ -754,7 +1109,6 @@ class SemanticTestApp:
                 total_records,
                 row_data["doc_name"],
                 result_columns,
-                output_path,
                 excel_processor,
                 quiet=quiet,
             )
@@ -783,6 +1137,7 @@ class SemanticTestApp:
 
                 # 检查结果是否有效
                 if result != "错误":
+                    self._result_memo[memo_key] = (result, reason)
                     # 保存结果
                     excel_processor.save_result(
                         row_index=row_index,
@@ -801,29 +1156,34 @@ class SemanticTestApp:
                             reason=reason,
                         )
 
-                    # 保存中间结果 (非静默模式下)
-                    if not quiet:
-                        excel_processor.save_intermediate_results(
-                            output_path, row_number
-                        )
-
                     return "processed"
 
                 # 如果结果是"错误"，记录警告并重试
                 logger.warning(
-                    f"第 {row_number} 行处理返回错误 (尝试 {attempt + 1}/{max_retries}): {reason}"
+                    "第 %d 行处理返回错误 (尝试 %d/%d): %s",
+                    row_number,
+                    attempt + 1,
+                    max_retries,
+                    reason,
                 )
                 last_error = Exception(reason)
 
             except Exception as e:
+                # 单行的异常不应中断整个任务，记录后按错误结果重试
                 logger.warning(
-                    f"第 {row_number} 行发生异常 (尝试 {attempt + 1}/{max_retries}): {e}"
+                    "第 %d 行发生异常 (尝试 %d/%d): %r",
+                    row_number,
+                    attempt + 1,
+                    max_retries,
+                    e,
+                    exc_info=logger.isEnabledFor(logging.DEBUG),
                 )
                 last_error = e
 
-            # 如果不是最后一次尝试，等待后重试
-            if attempt < max_retries - 1:
-                time.sleep(1)
+            # 如果不是最后一次尝试，指数退避后重试（1s、2s ...）；
+            # 收到停止信号时立即返回，不写入"错误"，以便下次运行继续处理该行
+            if attempt < max_retries - 1 and shutdown_event.wait(2**attempt):
+                return "interrupted"
 
         # 所有重试都失败
         self._handle_processing_error(
@@ -831,7 +1191,6 @@ class SemanticTestApp:
             row_number,
             last_error or Exception("未知错误"),
             result_columns,
-            output_path,
             excel_processor,
             quiet=quiet,
         )
@@ -844,7 +1203,6 @@ class SemanticTestApp:
         total_records: int,
         validation_errors: list,
         result_columns: dict,
-        output_path: str,
         excel_processor: "ExcelProcessor",
         quiet: bool = False,
     ):
@@ -852,10 +1210,11 @@ class SemanticTestApp:
         处理验证错误
         """
         errors_str = "; ".join(validation_errors)
-        error_msg = f"跳过第 {row_number}/{total_records} 条记录：{errors_str}"
 
         if not quiet:
-            logger.warning(error_msg)
+            logger.warning(
+                "跳过第 %d/%d 条记录：%s", row_number, total_records, errors_str
+            )
 
         excel_processor.save_result(
             row_index=row_index,
@@ -864,10 +1223,6 @@ class SemanticTestApp:
             result_columns=result_columns,
         )
 
-        # 保存中间结果
-        if not quiet and row_number % self.config.auto_save_interval == 0:
-            excel_processor.save_intermediate_results(output_path, row_number)
-
     def _handle_missing_document(
         self,
         row_index: int,
@@ -875,7 +1230,6 @@ class SemanticTestApp:
         total_records: int,
         doc_name: str,
         result_columns: dict,
-        output_path: str,
         excel_processor: "ExcelProcessor",
         quiet: bool = False,
     ):
@@ -884,7 +1238,10 @@ class SemanticTestApp:
         """
         if not quiet:
             logger.warning(
-                f"第 {row_number}/{total_records} 条记录：未找到对应的Markdown文件 ({doc_name})"
+                "第 %d/%d 条记录：未找到对应的Markdown文件 (%s)",
+                row_number,
+                total_records,
+                doc_name,
             )
 
         excel_processor.save_result(
@@ -894,10 +1251,6 @@ class SemanticTestApp:
             result_columns=result_columns,
         )
 
-        # 每处理完一条记录就保存结果 (非静默模式下)
-        if not quiet:
-            excel_processor.save_intermediate_results(output_path, row_number)
-
     def _call_semantic_api(
         self,
         row_data: dict,
@@ -931,7 +1284,6 @@ class SemanticTestApp:
         row_number: int,
         error: Exception,
         result_columns: dict,
-        output_path: str,
         excel_processor: "ExcelProcessor",
         quiet: bool = False,
     ):
@@ -939,7 +1291,7 @@ class SemanticTestApp:
         处理处理过程中的错误
         """
         if not quiet:
-            logger.error(f"处理第 {row_number} 行时发生错误: {error}")
+            logger.error("处理第 %d 行时发生错误: %s", row_number, error)
 
         excel_processor.save_result(
             row_index=row_index,
@@ -948,10 +1300,6 @@ class SemanticTestApp:
             result_columns=result_columns,
         )
 
-        # 每处理完一条记录就保存结果 (非静默模式下)
-        if not quiet:
-            excel_processor.save_intermediate_results(output_path, row_number)
-
     def _read_document_content(
         self,
         knowledge_base_dir: str,
@@ -984,15 +1332,35 @@ class SemanticTestApp:
         if not doc_name.lower().endswith(".md"):
             doc_name += ".md"
 
-        # 查找文档文件
-        doc_path = FileUtils.find_file_by_name(
-            knowledge_base_dir, doc_name, recursive=False
-        )
+        # 同一文档在任务内只读取一次
+        if doc_name in self._doc_cache:
+            return self._doc_cache[doc_name]
+
+        # 先查目录索引，未命中时再按原方式查找（兼容大小写不敏感的文件系统）
+        doc_path = self._get_doc_index(knowledge_base_dir).get(
+            doc_name
+        ) or FileUtils.find_file_by_name(knowledge_base_dir, doc_name, recursive=False)
         if not doc_path:
-            return self._read_all_documents_in_folder(knowledge_base_dir)
+            content = self._read_all_documents_in_folder(knowledge_base_dir)
+        else:
+            content = FileUtils.read_file_content(doc_path)
 
-        # 读取文档内容
-        return FileUtils.read_file_content(doc_path)
+        self._doc_cache[doc_name] = content
+        return content
+
+    def _get_doc_index(self, knowledge_base_dir: str) -> Dict[str, str]:
+        """获取知识库顶层文件名到路径的索引 (每次任务只扫描一次目录)"""
+        if self._doc_index is None:
+            index: Dict[str, str] = {}
+            try:
+                with os.scandir(knowledge_base_dir) as entries:
+                    for entry in entries:
+                        if entry.is_file():
+                            index[entry.name] = entry.path
+            except OSError as e:
+                logger.warning(f"扫描知识库目录失败: {e}")
+            self._doc_index = index
+        return self._doc_index
 
     def _read_all_documents_in_folder(self, knowledge_base_dir: str) -> Optional[str]:
         """读取文件夹内所有文档并合并 (带内存缓存)"""
@@ -1096,6 +1464,7 @@ AI客服问答语义比对工具 - 使用说明
 
 用法:
     python main.py [Excel文件路径] [知识库目录]
+    python main.py [Excel文件路径] [知识库目录] --config run.json
     python main.py --help
 
 参数:
@@ -1104,6 +1473,10 @@ AI客服问答语义比对工具 - 使用说明
 
 选项:
     -h, --help     显示此帮助信息
+    --config FILE  从 JSON 文件读取运行配置，跳过交互式询问。可用字段:
+                   excel, knowledge_base_dir, doc_name_col, question_col,
+                   ai_answer_col (列名或从 1 开始的序号), similarity_col,
+                   reason_col (结果列名), output (输出路径)
 
 示例:
     python main.py data.xlsx ./knowledge_base
@@ -1249,11 +1622,19 @@ def _run_command_line_mode(app: SemanticTestApp):
     # 延迟导入
     from semantic_tester.ui import CLIInterface  # noqa: F811
 
-    if len(sys.argv) < 2:
-        return
+    try:
+        args, run_config = _parse_config_argument(sys.argv[1:])
+    except (OSError, ValueError) as e:
+        print(f"错误: 无法读取运行配置: {e}")
+        sys.exit(1)
 
-    excel_path = sys.argv[1]
-    knowledge_base_dir = sys.argv[2] if len(sys.argv) > 2 else None
+    excel_path = args[0] if args else run_config.get("excel")
+    knowledge_base_dir = (
+        args[1] if len(args) > 1 else run_config.get("knowledge_base_dir")
+    )
+    if not excel_path:
+        print("错误: 未指定 Excel 文件路径")
+        sys.exit(1)
 
     # 验证并加载Excel文件
     if not _validate_and_load_excel(app, excel_path):
@@ -1274,14 +1655,24 @@ def _run_command_line_mode(app: SemanticTestApp):
     # 检测并处理文件格式
     format_info = _detect_and_handle_file_format(app)
 
-    # 获取列映射配置
-    column_mapping = app.excel_processor.get_user_column_mapping(
-        auto_config=format_info["is_dify_format"]
+    # 获取列映射配置（运行配置中指定了列时不再询问）
+    column_mapping = _resolve_column_mapping(
+        app, run_config, format_info["is_dify_format"]
     )
+    if column_mapping is None:
+        sys.exit(1)
 
     # 设置结果列和输出路径
-    result_columns = _setup_result_columns(app)
-    output_path = _get_output_path(app, excel_path)
+    result_columns = _setup_result_columns(
+        app,
+        run_config.get("similarity_col", "语义是否与源文档相符"),
+        run_config.get("reason_col", "判断依据"),
+    )
+    if run_config.get("output"):
+        output_path = run_config["output"]
+        app.config.ensure_output_dir(output_path)
+    else:
+        output_path = _get_output_path(app, excel_path)
 
     # 显示处理信息
     _display_processing_info(excel_path, knowledge_base_dir, output_path)
@@ -1305,6 +1696,7 @@ def _run_command_line_mode(app: SemanticTestApp):
         show_comparison_result=False,
         use_full_doc_match=use_full_doc_match,
         provider_configs=provider_configs,
+        batch_size=app.env_manager.get_batch_config().get("semantic_batch_size", 1),
     )
 
     # 显示完成信息
@@ -1322,7 +1714,9 @@ def _validate_and_load_excel(app: SemanticTestApp, excel_path: str) -> bool:
     from semantic_tester.utils import ValidationUtils  # noqa: F811
     from semantic_tester.excel import ExcelProcessor  # noqa: F811
 
-    if not ValidationUtils.is_valid_file_path(excel_path, [".xlsx", ".xls"]):
+    if not ValidationUtils.is_valid_file_path(
+        excel_path, ValidationUtils.EXCEL_EXTENSIONS
+    ):
         print(f"错误: 无效的 Excel 文件路径: {excel_path}")
         return False
 
@@ -1364,16 +1758,114 @@ def _detect_and_handle_file_format(app: SemanticTestApp) -> dict:
     return format_info
 
 
-def _setup_result_columns(app: SemanticTestApp) -> dict:
+def _parse_config_argument(argv: List[str]) -> Tuple[List[str], dict]:
+    """
+    解析 --config 参数，读取非交互运行配置 (JSON)
+
+    Args:
+        argv: 命令行参数（不含程序名）
+
+    Returns:
+        Tuple[List[str], dict]: (其余位置参数, 运行配置；未指定时为空字典)
+    """
+    if "--config" not in argv:
+        return list(argv), {}
+
+    position = argv.index("--config")
+    if position + 1 >= len(argv):
+        raise ValueError("--config 需要指定 JSON 配置文件路径")
+
+    with open(argv[position + 1], "r", encoding="utf-8") as f:
+        run_config = json.load(f)
+    if not isinstance(run_config, dict):
+        raise ValueError("运行配置必须是 JSON 对象")
+
+    return argv[:position] + argv[position + 2 :], run_config
+
+
+# 运行配置中的列配置项 -> 列映射键
+_CONFIG_COLUMN_KEYS = (
+    ("doc_name_col_index", "doc_name_col"),
+    ("question_col_index", "question_col"),
+    ("ai_answer_col_index", "ai_answer_col"),
+)
+
+# 运行配置中必须提供的列
+_REQUIRED_CONFIG_COLUMNS = ("question_col", "ai_answer_col")
+
+
+def _resolve_column_mapping(
+    app: SemanticTestApp, run_config: dict, is_dify_format: bool
+) -> Optional[Dict[str, int]]:
+    """
+    获取列映射：运行配置中指定了任一列时使用配置，否则交互式询问
+
+    Args:
+        app: 应用实例
+        run_config: 运行配置
+        is_dify_format: 是否为 Dify 格式（交互模式下自动配置）
+
+    Returns:
+        Optional[Dict[str, int]]: 列映射，运行配置无效时返回 None
+    """
+    if any(config_key in run_config for _, config_key in _CONFIG_COLUMN_KEYS):
+        return _column_mapping_from_config(app, run_config)
+
+    return app.excel_processor.get_user_column_mapping(auto_config=is_dify_format)
+
+
+def _column_mapping_from_config(
+    app: SemanticTestApp, run_config: dict
+) -> Optional[Dict[str, int]]:
+    """
+    根据运行配置生成列映射（列名或从 1 开始的序号）
+
+    question_col 和 ai_answer_col 为必填项，doc_name_col 可省略。
+
+    Returns:
+        Optional[Dict[str, int]]: 列映射，缺少必填列或列不存在时返回 None
+    """
+    missing = [key for key in _REQUIRED_CONFIG_COLUMNS if run_config.get(key) is None]
+    if missing:
+        print(f"错误: 运行配置缺少必填列: {', '.join(missing)}")
+        return None
+
+    from semantic_tester.excel.utils import get_column_index
+
+    column_names = app.excel_processor.column_names
+    column_mapping = {"doc_name_col_index": -1}
+    for key, config_key in _CONFIG_COLUMN_KEYS:
+        col_input = run_config.get(config_key)
+        if col_input is None:
+            continue
+        col_index = get_column_index(column_names, str(col_input))
+        if col_index == -1:
+            print(f"错误: 运行配置中的列 '{col_input}' ({config_key}) 不存在")
+            return None
+        column_mapping[key] = col_index
+
+    return column_mapping
+
+
+def _setup_result_columns(
+    app: SemanticTestApp,
+    similarity_col: str = "语义是否与源文档相符",
+    reason_col: str = "判断依据",
+) -> dict:
     """
     设置结果列
 
+    Args:
+        app: 应用实例
+        similarity_col: 比对结果列名
+        reason_col: 判断依据列名
+
     Returns:
         dict: 结果列配置
     """
     result_columns = {
-        "similarity_result": ("语义是否与源文档相符", -1),
-        "reason": ("判断依据", -1),
+        "similarity_result": (similarity_col, -1),
+        "reason": (reason_col, -1),
     }
 
     # 设置结果列
@@ -655,4 +655,4 @@ class AnthropicProvider(AIProvider):
 
         # 在锁外执行等待
         if wait_time_outside_lock > 0:
-            time.sleep(wait_time_outside_lock)
+            self._wait_or_shutdown(wait_time_outside_lock)
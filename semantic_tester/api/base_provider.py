@@ -5,13 +5,35 @@ AI供应商抽象基类
 """
 
 import logging
+import re
+import sys
 import threading
-import time
 from abc import ABC, abstractmethod
 from typing import List, Optional, Dict, Any
 
 logger = logging.getLogger(__name__)
 
+# 重试延迟提取规则（按优先级排列；前三个匹配小写后的消息）
+_RETRY_DELAY_LOWER_RES = (
+    re.compile(r"try again in (\d+)s"),
+    re.compile(r"retry in (\d+)s?"),
+    re.compile(r"retry after (\d+)"),
+)
+_RETRY_DELAY_JSON_RE = re.compile(r"['\"]?retryDelay['\"]?:\s*['\"]?(\d+)s?['\"]?")
+
+# 全局停止信号：用户中断任务时置位，所有重试/轮转等待立即返回
+shutdown_event = threading.Event()
+
+
+def request_shutdown():
+    """通知所有供应商停止等待（用户中断时调用）"""
+    shutdown_event.set()
+
+
+def reset_shutdown():
+    """清除停止信号（开始新任务前调用）"""
+    shutdown_event.clear()
+
 
 class AIProvider(ABC):
     """AI 供应商抽象基类"""
@@ -110,10 +132,45 @@ class AIProvider(ABC):
             "dots", text=Text(f" {self.name}: {self.waiting_text}...", style="cyan")
         )
 
-        # 使用 Live 上下文管理器显示加载动画
+        # Live 自带刷新线程，这里只需阻塞等待结束信号
         with Live(spinner, refresh_per_second=10, transient=True):
-            while not stop_event.is_set():
-                time.sleep(0.1)
+            stop_event.wait()
+
+    def _start_waiting_indicator(
+        self, stop_event: threading.Event
+    ) -> Optional[threading.Thread]:
+        """
+        启动等待指示器线程
+
+        输出不是终端（重定向到文件、后台运行）时不显示动画，也不创建线程。
+
+        Args:
+            stop_event: 结束信号
+
+        Returns:
+            Optional[threading.Thread]: 指示器线程，未启动时返回 None
+        """
+        if not sys.stdout.isatty():
+            return None
+
+        waiting_thread = threading.Thread(
+            target=self.show_waiting_indicator, args=(stop_event,), daemon=True
+        )
+        waiting_thread.start()
+        return waiting_thread
+
+    @staticmethod
+    def _wait_or_shutdown(seconds: float) -> bool:
+        """
+        可被中断的等待，替代 time.sleep
+
+        Args:
+            seconds: 等待秒数
+
+        Returns:
+            bool: True 表示等待期间收到了停止信号
+        """
+        return shutdown_event.wait(seconds)
 
     def get_provider_info(self) -> Dict[str, Any]:
         """
@@ -152,25 +209,15 @@ class AIProvider(ABC):
         Returns:
             Optional[int]: 重试延迟秒数，无法提取返回None
         """
-        import re
-
-        # 常见模式 1: "try again in X seconds"
-        match = re.search(r"try again in (\d+)s", error_msg.lower())
-        if match:
-            return int(match.group(1))
-
-        # 常见模式 4: "retry in X seconds"
-        match = re.search(r"retry in (\d+)s?", error_msg.lower())
-        if match:
-            return int(match.group(1))
-
-        # 常见模式 2: "retry after X seconds"
-        match = re.search(r"retry after (\d+)", error_msg.lower())
-        if match:
-            return int(match.group(1))
+        # 常见模式: "try again in Xs" / "retry in Xs" / "retry after X"
+        lowered = error_msg.lower()
+        for pattern in _RETRY_DELAY_LOWER_RES:
+            match = pattern.search(lowered)
+            if match:
+                return int(match.group(1))
 
-        # 常见模式 3: "retryDelay": "12s" (JSON format)
-        match = re.search(r"['\"]?retryDelay['\"]?:\s*['\"]?(\d+)s?['\"]?", error_msg)
+        # JSON 格式: "retryDelay": "12s"
+        match = _RETRY_DELAY_JSON_RE.search(error_msg)
         if match:
             return int(match.group(1))
 
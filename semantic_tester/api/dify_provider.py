@@ -300,17 +300,9 @@ class DifyProvider(AIProvider):
                         f"所有密钥不可用，等待最长冷却时间: {max_cooldown:.1f}s"
                     )
 
-        # 在锁外执行等待
+        # 在锁外执行等待（等待最长冷却时间后所有密钥均已可用，无需再次轮转）
         if wait_time_outside_lock > 0:
-            time.sleep(wait_time_outside_lock)
-            # 等待后需要重新尝试轮转
-            if (
-                wait_time_outside_lock
-                == max(self.key_cooldown_until.values(), default=0)
-                - time.time()
-                + wait_time_outside_lock
-            ):
-                self._rotate_key(force_rotate=True)
+            self._wait_or_shutdown(wait_time_outside_lock)
 
     def _send_dify_request(  # noqa: C901
         self,
@@ -4,12 +4,18 @@ Gemini AI 供应商实现
 实现 Gemini API 的语义相似度检查功能，继承自 AIProvider 抽象基类。
 """
 
+import hashlib
+import heapq
+import itertools
 import json
 import logging
+import os
 import re
+import tempfile
 import time
 import threading
-from typing import List, Dict, Optional, Any
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
 
 try:
     import google.api_core.exceptions
@@ -26,6 +32,14 @@ except ImportError as e:
         f"请安装 Google Generative AI SDK: pip install google-genai\n{error_details}"
     ) from e
 
+try:
+    # orjson 为可选依赖，安装后用于加速响应解析
+    import orjson  # type: ignore
+
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 try:
     from colorama import Fore, Style  # type: ignore
 except ImportError:
@@ -42,10 +56,58 @@ except ImportError:
 from .base_provider import AIProvider
 
 
-from .prompts import SEMANTIC_CHECK_PROMPT
+from .prompts import (
+    GEMINI_SEMANTIC_CHECK_PROMPT,
+    build_batch_check_prompt,
+    parse_batch_check_response,
+    select_relevant_document,
+)
+from .result_cache import SemanticCache
 
 logger = logging.getLogger(__name__)
 
+# 多个渠道可能共用同一个状态文件，读-合并-写过程在进程内串行执行
+_KEY_STATE_FILE_LOCK = threading.Lock()
+
+# 日志中高亮显示的比对结果
+_COLORED_RESULTS = {
+    "是": f"{Style.BRIGHT}{Fore.GREEN}是{Style.RESET_ALL}",
+    "否": f"{Style.BRIGHT}{Fore.RED}否{Style.RESET_ALL}",
+}
+
+# 预编译的 API 密钥格式校验
+_API_KEY_RE = re.compile(r"^[a-zA-Z0-9_-]{20,}$")
+
+# 结构化输出：要求模型直接返回符合 schema 的 JSON，result 取值与提示词一致
+_GENERATION_CONFIG = types.GenerateContentConfig(
+    temperature=0,
+    response_mime_type="application/json",
+    response_schema={
+        "type": "OBJECT",
+        "properties": {
+            "result": {"type": "STRING", "enum": ["是", "否", "错误", "不确定"]},
+            "reason": {"type": "STRING"},
+        },
+        "required": ["result", "reason"],
+    },
+)
+_BATCH_GENERATION_CONFIG = types.GenerateContentConfig(
+    temperature=0,
+    response_mime_type="application/json",
+    response_schema={
+        "type": "ARRAY",
+        "items": {
+            "type": "OBJECT",
+            "properties": {
+                "index": {"type": "INTEGER"},
+                "result": {"type": "STRING", "enum": ["是", "否", "不确定"]},
+                "reason": {"type": "STRING"},
+            },
+            "required": ["index", "result", "reason"],
+        },
+    },
+)
+
 
 class GeminiProvider(AIProvider):
     """Gemini AI 供应商"""
@@ -61,14 +123,36 @@ class GeminiProvider(AIProvider):
 
         self.api_keys = config.get("api_keys", [])
         self.model_name = config.get("model", "gemini-2.5-flash")
+        # 源文档最大字符数，超过时只保留与问题相关的片段（0 表示不截取）
+        self.max_doc_chars = config.get("max_doc_chars", 0)
 
         # 内部状态
         self.client = None
         self.current_key_index = 0
         self.key_last_used_time: Dict[str, float] = {}
         self.key_cooldown_until: Dict[str, float] = {}
+        # 密钥调度堆：(冷却结束时间, 序号, 密钥索引)，同一时间按最久未选中优先
+        self._key_heap: List[Tuple[float, int, int]] = []
+        self._key_heap_seq: Dict[int, int] = {}  # 密钥索引 -> 堆中有效条目的序号
+        self._key_seq_counter = itertools.count()
+        # 每个密钥最近 60 秒内的请求时间，用于在触发 429 之前主动避让（0 表示不限制）
+        self.rpm_limit = config.get("gemini_rpm_limit", 0)
+        self.key_requests: Dict[str, Deque[float]] = {}
+        # 密钥在 RPM 限制下的可用时间，与 429 冷却分开记录（不持久化）
+        self.key_rpm_available_at: Dict[str, float] = {}
         self.first_actual_call = True
         self.lock = threading.Lock()  # 用于多线程并发下的 Key 轮转同步
+        # 密钥冷却状态持久化文件（配置后跨进程保留冷却和最后使用时间），
+        # 文件中按渠道 ID 分区，多个渠道可共用同一文件
+        self.key_state_path: Optional[str] = config.get("key_state_path") or None
+
+        # 可选的比对结果缓存（配置了缓存路径时启用）
+        self.semantic_cache: Optional[SemanticCache] = None
+        cache_path = config.get("semantic_cache_path")
+        if cache_path:
+            self.semantic_cache = SemanticCache(
+                cache_path, config.get("semantic_cache_ttl", 7 * 24 * 3600)
+            )
 
         # 初始化可用密钥和客户端
         self._initialize_api_keys()
@@ -94,7 +178,7 @@ class GeminiProvider(AIProvider):
         Returns:
             bool: 密钥是否有效
         """
-        if not re.match(r"^[a-zA-Z0-9_-]{20,}$", api_key):
+        if not _API_KEY_RE.match(api_key):
             logger.warning(f"API Key格式无效: {api_key[:5]}...")
             return False
 
@@ -117,6 +201,7 @@ class GeminiProvider(AIProvider):
         model: Optional[str] = None,
         stream: bool = False,
         show_thinking: bool = False,
+        stream_callback: Optional[Callable[[str], None]] = None,
     ) -> tuple[str, str]:
         """
         执行语义相似度检查
@@ -128,6 +213,7 @@ class GeminiProvider(AIProvider):
             model: 使用的模型（可选）
             stream: 是否使用流式输出
             show_thinking: 是否显示思维链（仅思考模型有效）
+            stream_callback: 流式输出回调，传入已接收的完整内容（并发模式下更新界面）
 
         Returns:
             tuple[str, str]: (结果, 原因)，结果为"是"/"否"/"错误"
@@ -136,6 +222,14 @@ class GeminiProvider(AIProvider):
             return "错误", "Gemini 供应商未正确配置"
 
         model_to_use = model or self.model_name
+
+        # 命中缓存时直接返回，无需轮转密钥和调用 API
+        doc_hash = self._document_hash(source_document)
+        cached = self._cached_result(question, ai_answer, doc_hash, model_to_use)
+        if cached is not None:
+            logger.debug("命中语义比对缓存")
+            return cached
+
         prompt = self._get_prompt(question, ai_answer, source_document)
 
         max_retries = 5
@@ -150,16 +244,11 @@ class GeminiProvider(AIProvider):
                     return "错误", "无可用 Gemini 模型"
                 continue
 
-            # 创建等待指示器
+            # 只有在非流式模式才显示等待指示器
             stop_event = threading.Event()
-            waiting_thread = threading.Thread(
-                target=self.show_waiting_indicator, args=(stop_event,)
+            waiting_thread = (
+                None if stream else self._start_waiting_indicator(stop_event)
             )
-            waiting_thread.daemon = True
-
-            # 只有在非流式模式才显示等待指示器
-            if not stream:
-                waiting_thread.start()
 
             try:
                 result, reason = self._call_gemini_api(
@@ -170,8 +259,12 @@ class GeminiProvider(AIProvider):
                     stream,
                     show_thinking,
                     stop_event,
+                    stream_callback,
                 )
                 if result != "RETRY":
+                    self._store_result(
+                        question, ai_answer, doc_hash, model_to_use, result, reason
+                    )
                     return result, reason
 
             except Exception as e:
@@ -183,11 +276,142 @@ class GeminiProvider(AIProvider):
 
             finally:
                 stop_event.set()
-                if waiting_thread.is_alive():
+                if waiting_thread is not None:
                     waiting_thread.join(timeout=0.5)
 
         return "错误", "API 调用多次重试失败"
 
+    def check_semantic_similarity_batch(
+        self,
+        items: List[Tuple[str, str]],
+        source_document: str,
+        model: Optional[str] = None,
+    ) -> List[Optional[Tuple[str, str]]]:
+        """
+        批量语义比对：同一文档的多组问答合并为一次请求
+
+        只尝试一次，调用失败或解析无效的条目返回 None，由调用方逐条重试。
+
+        Args:
+            items: (问题, AI回答) 列表
+            source_document: 源文档内容
+            model: 使用的模型（可选）
+
+        Returns:
+            List[Optional[Tuple[str, str]]]: 与 items 一一对应的 (结果, 原因)
+        """
+        results: List[Optional[Tuple[str, str]]] = [None] * len(items)
+        if not items or not self.is_configured():
+            return results
+
+        model_to_use = model or self.model_name
+
+        # 先查缓存，只把未命中的条目发给 API
+        doc_hash = self._document_hash(source_document)
+        results = [
+            self._cached_result(question, ai_answer, doc_hash, model_to_use)
+            for question, ai_answer in items
+        ]
+
+        missing = [i for i, item in enumerate(results) if item is None]
+        if not missing or not self._get_available_client():
+            return results
+
+        batch_items = [items[i] for i in missing]
+        document = select_relevant_document(
+            source_document,
+            " ".join(question for question, _ in batch_items),
+            self.max_doc_chars,
+        )
+        logger.info("正在调用 Gemini API 批量比对 %d 条记录...", len(batch_items))
+
+        self._record_request()
+        try:
+            response = self.client.models.generate_content(  # type: ignore
+                model=model_to_use,
+                contents=[build_batch_check_prompt(batch_items, document)],
+                config=_BATCH_GENERATION_CONFIG,
+            )
+        except Exception as e:
+            logger.warning("Gemini 批量比对失败，将逐条处理: %s", e)
+            self._cool_down_if_rate_limited(e)
+            return results
+
+        response_text = getattr(response, "text", None) or ""
+        parsed = parse_batch_check_response(response_text, len(batch_items))
+        for i, item in zip(missing, parsed):
+            if item is None:
+                continue
+            results[i] = item
+            question, ai_answer = items[i]
+            self._store_result(
+                question, ai_answer, doc_hash, model_to_use, item[0], item[1]
+            )
+
+        return results
+
+    def _document_hash(self, source_document: str) -> Optional[str]:
+        """计算缓存使用的文档哈希（未启用缓存时返回 None）"""
+        if self.semantic_cache is None:
+            return None
+        return SemanticCache.hash_document(source_document)
+
+    def _cached_result(
+        self, question: str, ai_answer: str, doc_hash: Optional[str], model: str
+    ) -> Optional[Tuple[str, str]]:
+        """
+        查询比对结果缓存
+
+        Args:
+            question: 问题内容
+            ai_answer: AI回答内容
+            doc_hash: 源文档哈希（None 表示未启用缓存）
+            model: 模型名称
+
+        Returns:
+            Optional[Tuple[str, str]]: 命中时返回 (结果, 原因)，否则返回 None
+        """
+        if doc_hash is None:
+            return None
+        return self.semantic_cache.get(question, ai_answer, doc_hash, model)
+
+    def _store_result(
+        self,
+        question: str,
+        ai_answer: str,
+        doc_hash: Optional[str],
+        model: str,
+        result: str,
+        reason: str,
+    ):
+        """
+        写入比对结果缓存（未启用缓存时忽略）
+
+        Args:
+            question: 问题内容
+            ai_answer: AI回答内容
+            doc_hash: 源文档哈希（None 表示未启用缓存）
+            model: 模型名称
+            result: 比对结果
+            reason: 判断依据
+        """
+        if doc_hash is not None:
+            self.semantic_cache.set(
+                question, ai_answer, doc_hash, model, result, reason
+            )
+
+    def _cool_down_if_rate_limited(self, e: Exception, default_retry_delay: int = 60):
+        """
+        限流错误 (429) 时让当前密钥进入冷却，后续请求轮转到其他密钥
+
+        Args:
+            e: API 调用抛出的异常
+            default_retry_delay: 无法从错误信息中解析等待时间时的冷却秒数
+        """
+        if isinstance(e, google.api_core.exceptions.ResourceExhausted):
+            retry_after = self._extract_retry_delay(str(e)) or default_retry_delay
+            self._set_key_cooldown(self.current_key_index, retry_after)
+
     def _handle_no_client(
         self, attempt: int, max_retries: int, default_retry_delay: int
     ) -> bool:
@@ -199,8 +423,7 @@ class GeminiProvider(AIProvider):
         """
         logger.warning("无可用 Gemini 客户端，跳过 API 调用")
         if attempt < max_retries - 1:
-            time.sleep(default_retry_delay)
-            return True
+            return not self._wait_or_shutdown(default_retry_delay)
         return False
 
     def _call_gemini_api(  # noqa: C901
@@ -212,6 +435,7 @@ class GeminiProvider(AIProvider):
         stream: bool = False,
         show_thinking: bool = False,
         stop_event: Optional[threading.Event] = None,
+        stream_callback: Optional[Callable[[str], None]] = None,
     ) -> tuple[str, str]:
         """
         调用 Gemini API
@@ -222,19 +446,21 @@ class GeminiProvider(AIProvider):
         import sys
 
         logger.info(
-            f"正在调用 Gemini API 进行语义比对 (尝试 {attempt + 1}/{max_retries})..."
+            "正在调用 Gemini API 进行语义比对 (尝试 %d/%d)...", attempt + 1, max_retries
         )
 
         # 检查是否是思考模型
         is_thinking_model = "thinking" in model_to_use.lower()
 
+        self._record_request()
+
         try:
             if stream:
                 # 流式调用
                 response = self.client.models.generate_content_stream(  # type: ignore
                     model=model_to_use,
                     contents=[prompt],
-                    config=types.GenerateContentConfig(temperature=0),
+                    config=_GENERATION_CONFIG,
                 )
 
                 # 停止等待指示器（如果有）
@@ -249,6 +475,12 @@ class GeminiProvider(AIProvider):
 
                 for chunk in response:
                     if chunk.text:
+                        if stream_callback:
+                            # 交给回调更新界面，不直接打印到控制台
+                            full_response += chunk.text
+                            stream_callback(full_response)
+                            continue
+
                         # 流式输出内容
                         if not first_char_printed:
                             # 如果是思考模型且需要显示思维链
@@ -302,7 +534,7 @@ class GeminiProvider(AIProvider):
                 response = self.client.models.generate_content(  # type: ignore
                     model=model_to_use,
                     contents=[prompt],
-                    config=types.GenerateContentConfig(temperature=0),
+                    config=_GENERATION_CONFIG,
                 )
 
                 if response is None or response.text is None:
@@ -324,46 +556,41 @@ class GeminiProvider(AIProvider):
 
                                 if thinking_parts:
                                     thinking_content = "\n".join(thinking_parts)
-                                    logger.info(f"\n💭 思维过程:\n{thinking_content}\n")
+                                    logger.info(
+                                        "\n💭 思维过程:\n%s\n", thinking_content
+                                    )
                     except Exception as e:
-                        logger.debug(f"提取思维内容失败: {e}")
+                        logger.debug("提取思维内容失败: %s", e)
 
                 response_text = response.text.strip()
 
             # 解析响应
-            if response_text.startswith("```json") and response_text.endswith("```"):
-                response_text = response_text[7:-3].strip()
+            response_text = (
+                response_text.removeprefix("```json").removesuffix("```").strip()
+            )
 
             try:
-                parsed_response = json.loads(response_text)
+                # orjson.JSONDecodeError 是 json.JSONDecodeError 的子类
+                parsed_response = _json_loads(response_text)
                 result = parsed_response.get("result", "无法判断").strip()
                 reason = parsed_response.get("reason", "无").strip()
 
-                colored_result = result
-                if result == "是":
-                    colored_result = (
-                        Style.BRIGHT + Fore.GREEN + result + Style.RESET_ALL
-                    )
-                elif result == "否":
-                    colored_result = Style.BRIGHT + Fore.RED + result + Style.RESET_ALL
-
-                logger.info(f"语义比对结果：{colored_result}")
+                logger.info("语义比对结果：%s", _COLORED_RESULTS.get(result, result))
                 return result, reason
 
             except json.JSONDecodeError as e:
-                logger.warning(f"解析 JSON 失败: {response_text}, 错误: {e}")
+                logger.warning("解析 JSON 失败: %s, 错误: %s", response_text, e)
                 return "错误", f"JSON 解析失败: {e}"
 
         except google.api_core.exceptions.ResourceExhausted as e:
             # 速率限制错误，需要重试
             error_msg = str(e)
-            logger.warning(f"Gemini API 速率限制: {error_msg}")
+            logger.warning("Gemini API 速率限制: %s", error_msg)
 
             if attempt < max_retries - 1:
                 retry_after = self._extract_retry_delay(error_msg) or 60
                 logger.info("检测到 429 错误，立即强制轮转到下一个密钥")
-                current_key = self.api_keys[self.current_key_index]
-                self.key_cooldown_until[current_key] = time.time() + retry_after
+                self._set_key_cooldown(self.current_key_index, retry_after)
                 self._rotate_key(force_rotate=True)
                 return "RETRY", ""
 
@@ -381,25 +608,25 @@ class GeminiProvider(AIProvider):
         error_msg = str(e)
 
         if isinstance(e, json.JSONDecodeError):
-            logger.warning(f"Gemini 返回的 JSON 格式不正确，错误：{error_msg}")
+            logger.warning("Gemini 返回的 JSON 格式不正确，错误：%s", error_msg)
             return False  # JSON解析错误不重试
         elif isinstance(e, google.api_core.exceptions.ResourceExhausted):
-            logger.warning(f"调用 Gemini API 时发生速率限制错误 (429)：{error_msg}")
+            logger.warning("调用 Gemini API 时发生速率限制错误 (429)：%s", error_msg)
             if attempt < max_retries - 1:
                 retry_after = (
                     self._extract_retry_delay(error_msg) or default_retry_delay
                 )
                 logger.info("检测到 429 错误，立即强制轮转到下一个密钥")
-                current_key = self.api_keys[self.current_key_index]
-                self.key_cooldown_until[current_key] = time.time() + retry_after
+                self._set_key_cooldown(self.current_key_index, retry_after)
                 self._rotate_key(force_rotate=True)
                 return True
             return False
         else:
-            logger.error(f"调用 Gemini API 时发生错误：{error_msg}")
+            logger.error("调用 Gemini API 时发生错误：%s", error_msg)
             if attempt < max_retries - 1:
-                logger.warning(f"等待 {default_retry_delay} 秒后重试")
-                time.sleep(default_retry_delay)
+                logger.warning("等待 %d 秒后重试", default_retry_delay)
+                if self._wait_or_shutdown(default_retry_delay):
+                    return False
                 self._rotate_key(force_rotate=True)
                 return True
             return False
@@ -408,10 +635,12 @@ class GeminiProvider(AIProvider):
         self, question: str, ai_answer: str, source_document_content: str
     ) -> str:
         """生成语义比对提示词"""
-        return SEMANTIC_CHECK_PROMPT.format(
+        return GEMINI_SEMANTIC_CHECK_PROMPT.format(
             question=question,
             ai_answer=ai_answer,
-            source_document=source_document_content,
+            source_document=select_relevant_document(
+                source_document_content, question, self.max_doc_chars
+            ),
         )
 
     def _initialize_api_keys(self):
@@ -421,9 +650,20 @@ class GeminiProvider(AIProvider):
             return
 
         current_time = time.time()
+        saved_state = self._load_key_state()
         for key in self.api_keys:
-            self.key_last_used_time[key] = current_time
-            self.key_cooldown_until[key] = 0.0
+            state = saved_state.get(self._key_state_id(key), {})
+            self.key_last_used_time[key] = state.get("last_used", current_time)
+            cooldown_until = state.get("cooldown_until", 0.0)
+            self.key_cooldown_until[key] = (
+                cooldown_until if cooldown_until > current_time else 0.0
+            )
+
+        # 当前密钥最后入堆，轮转时优先选择其他密钥
+        key_count = len(self.api_keys)
+        for offset in range(1, key_count + 1):
+            key_index = (self.current_key_index + offset) % key_count
+            self._push_key(key_index, self.key_cooldown_until[self.api_keys[key_index]])
 
         logger.debug(f"已初始化 {len(self.api_keys)} 个 Gemini API 密钥")
 
@@ -437,7 +677,7 @@ class GeminiProvider(AIProvider):
         try:
             self.client = genai.Client(api_key=current_api_key)
             logger.debug(
-                f"Gemini API 客户端已配置，使用密钥索引: {self.current_key_index}"
+                "Gemini API 客户端已配置，使用密钥索引: %d", self.current_key_index
             )
             self.key_last_used_time[current_api_key] = time.time()
         except Exception as e:
@@ -454,77 +694,241 @@ class GeminiProvider(AIProvider):
         self._rotate_key()
         return self.client
 
-    def _rotate_key(self, force_rotate: bool = False):
-        """轮转到下一个 API 密钥（线程安全）"""
-        if not self.api_keys:
+    @staticmethod
+    def _key_state_id(api_key: str) -> str:
+        """生成密钥在状态文件中的标识（哈希值，不落盘明文密钥）"""
+        return hashlib.blake2b(api_key.encode("utf-8"), digest_size=8).hexdigest()
+
+    def _read_state_file(self) -> Dict[str, Any]:
+        """
+        读取整个状态文件
+
+        Returns:
+            Dict[str, Any]: 渠道 ID -> 该渠道的密钥状态；文件不存在或损坏时为空
+        """
+        if not self.key_state_path or not os.path.exists(self.key_state_path):
+            return {}
+
+        try:
+            with open(self.key_state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取密钥状态文件失败，忽略: {e}")
+            return {}
+
+        return state if isinstance(state, dict) else {}
+
+    def _load_key_state(self) -> Dict[str, Dict[str, float]]:
+        """
+        读取本渠道持久化的密钥状态
+
+        Returns:
+            Dict[str, Dict[str, float]]: 密钥标识 -> {"cooldown_until", "last_used"}
+        """
+        channel_state = self._read_state_file().get(self.id)
+        return channel_state if isinstance(channel_state, dict) else {}
+
+    def _key_state_snapshot(self) -> Dict[str, Dict[str, float]]:
+        """生成本渠道密钥状态的快照（调用方需持有 self.lock）"""
+        return {
+            self._key_state_id(key): {
+                "cooldown_until": self.key_cooldown_until.get(key, 0.0),
+                "last_used": self.key_last_used_time.get(key, 0.0),
+            }
+            for key in self.api_keys
+        }
+
+    def _flush_state(self, snapshot: Dict[str, Dict[str, float]]):
+        """
+        将本渠道的密钥状态合并写入状态文件（不要在 self.lock 内调用）
+
+        先读取文件中其他渠道的状态再整体替换，临时文件名唯一，
+        共用同一状态文件的渠道不会互相覆盖。
+
+        Args:
+            snapshot: _key_state_snapshot 生成的状态快照
+        """
+        if not self.key_state_path:
             return
 
-        # 用于记录需要在锁外执行的等待时间
-        wait_time_outside_lock = 0.0
+        directory = os.path.dirname(self.key_state_path) or "."
+        tmp_path = None
+        try:
+            with _KEY_STATE_FILE_LOCK:
+                state = self._read_state_file()
+                state[self.id] = snapshot
+
+                os.makedirs(directory, exist_ok=True)
+                with tempfile.NamedTemporaryFile(
+                    "w",
+                    encoding="utf-8",
+                    dir=directory,
+                    prefix=".key_state.",
+                    suffix=".tmp",
+                    delete=False,
+                ) as f:
+                    tmp_path = f.name
+                    json.dump(state, f)
+                os.replace(tmp_path, self.key_state_path)
+                tmp_path = None
+        except OSError as e:
+            logger.warning(f"写入密钥状态文件失败: {e}")
+        finally:
+            if tmp_path is not None:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
+    def _push_key(self, key_index: int, cooldown_until: float):
+        """将密钥放入调度堆（旧条目按序号惰性失效）"""
+        seq = next(self._key_seq_counter)
+        self._key_heap_seq[key_index] = seq
+        heapq.heappush(self._key_heap, (cooldown_until, seq, key_index))
+
+    def _set_key_cooldown(self, key_index: int, retry_after: float):
+        """
+        标记密钥进入冷却
 
-        with self.lock:  # 使用线程锁确保整个轮转过程的原子性
-            # 如果未启用自动轮转且不是强制轮转，则不进行轮转
-            if not self.auto_rotate and not force_rotate:
-                return
+        Args:
+            key_index: 密钥索引
+            retry_after: 冷却秒数
+        """
+        with self.lock:
+            cooldown_until = time.time() + retry_after
+            self.key_cooldown_until[self.api_keys[key_index]] = cooldown_until
+            self._push_key(key_index, cooldown_until)
+            snapshot = self._key_state_snapshot() if self.key_state_path else None
 
-            current_time = time.time()
+        # 只在冷却状态变化时写盘，且在锁外进行文件 I/O
+        if snapshot is not None:
+            self._flush_state(snapshot)
 
-            for _ in range(len(self.api_keys)):
-                self.current_key_index = (self.current_key_index + 1) % len(
-                    self.api_keys
-                )
-                next_key = self.api_keys[self.current_key_index]
+    def _pop_next_key(self) -> Tuple[int, float]:
+        """
+        弹出最早可用的密钥（调用方需持有锁）
 
-                cooldown_until = self.key_cooldown_until.get(next_key, 0.0)
-                cooldown_remaining = max(0.0, cooldown_until - current_time)
-                time_since_last_use = current_time - self.key_last_used_time.get(
-                    next_key, 0.0
-                )
+        Returns:
+            Tuple[int, float]: (密钥索引, 冷却结束时间)
+        """
+        while True:
+            cooldown_until, seq, key_index = heapq.heappop(self._key_heap)
+            if self._key_heap_seq.get(key_index) != seq:
+                continue  # 已被更新的旧条目
+
+            # 冷却时间或 RPM 窗口可能已变化，以两者中较晚的可用时间为准
+            actual = self._key_available_at(self.api_keys[key_index])
+            if actual != cooldown_until:
+                self._push_key(key_index, actual)
+                continue
 
-                if force_rotate:
-                    logger.info(f"强制轮转: 新密钥索引: {self.current_key_index}")
-                    self.key_last_used_time[next_key] = current_time
-                    self._configure_client()
-                    return
-
-                if cooldown_remaining <= 0:
-                    if self.first_actual_call:
-                        logger.info(f"首次实际调用，密钥 {self.current_key_index} 可用")
-                        self.first_actual_call = False
-                    elif time_since_last_use < 60:
-                        # 记录需要等待的时间，稍后在锁外执行
-                        wait_time_outside_lock = 60 - time_since_last_use
-                        logger.info(
-                            f"密钥 {self.current_key_index} 需要等待: {wait_time_outside_lock:.1f}s"
-                        )
+            return key_index, cooldown_until
 
-                    logger.info(f"密钥 {self.current_key_index} 可用")
-                    self.key_last_used_time[next_key] = current_time
-                    self._configure_client()
-                    break  # 退出循环，稍后在锁外等待
-                else:
-                    logger.info(
-                        f"密钥 {self.current_key_index} 冷却中: 剩余 {cooldown_remaining:.1f}s"
-                    )
+    def _key_available_at(self, api_key: str) -> float:
+        """
+        密钥的最早可用时间：429 冷却与 RPM 窗口中较晚者（调用方需持有锁）
+
+        Args:
+            api_key: API 密钥
+
+        Returns:
+            float: 可用时间戳，0 表示当前可用
+        """
+        return max(
+            self.key_cooldown_until.get(api_key, 0.0),
+            self.key_rpm_available_at.get(api_key, 0.0),
+        )
+
+    def _record_request(self):
+        """记录当前密钥发出的一次请求，并更新其在 RPM 限制下的可用时间"""
+        if self.rpm_limit <= 0 or not self.api_keys:
+            return
+
+        with self.lock:
+            api_key = self.api_keys[self.current_key_index]
+            current_time = time.time()
+            timestamps = self.key_requests.setdefault(api_key, deque())
+            timestamps.append(current_time)
+
+            window_start = current_time - 60
+            while timestamps and timestamps[0] <= window_start:
+                timestamps.popleft()
+
+            # 窗口已满时，密钥在窗口内最早的请求过期后才可再次使用
+            self.key_rpm_available_at[api_key] = (
+                timestamps[-self.rpm_limit] + 60
+                if len(timestamps) >= self.rpm_limit
+                else 0.0
+            )
+
+    def _rotate_key(self, force_rotate: bool = False):
+        """轮转到最早可用的 API 密钥（线程安全）"""
+        if not self.api_keys:
+            return
+
+        with self.lock:  # 使用线程锁确保整个轮转过程的原子性
+            current_time = time.time()
+
+            # 如果未启用自动轮转且不是强制轮转，则不进行轮转，
+            # 只在当前密钥达到 RPM 上限时等待窗口释放
+            if not self.auto_rotate and not force_rotate:
+                current_key = self.api_keys[self.current_key_index]
+                wait_time_outside_lock = (
+                    self.key_rpm_available_at.get(current_key, 0.0) - current_time
+                )
             else:
-                # 所有密钥都在冷却中
-                max_cooldown = (
-                    max(self.key_cooldown_until.values(), default=0) - current_time
+                wait_time_outside_lock = self._select_next_key(
+                    current_time, force_rotate
                 )
-                if max_cooldown > 0:
-                    wait_time_outside_lock = max_cooldown
-                    logger.warning(
-                        f"所有密钥不可用，等待最长冷却时间: {max_cooldown:.1f}s"
-                    )
 
         # 在锁外执行等待，避免长时间持有锁阻塞其他线程
         if wait_time_outside_lock > 0:
-            time.sleep(wait_time_outside_lock)
-            # 等待后需要重新尝试轮转
-            if (
-                wait_time_outside_lock
-                == max(self.key_cooldown_until.values(), default=0)
-                - time.time()
-                + wait_time_outside_lock
-            ):
-                self._rotate_key(force_rotate=True)
+            self._wait_or_shutdown(wait_time_outside_lock)
+
+    def _select_next_key(self, current_time: float, force_rotate: bool) -> float:
+        """
+        切换到最早可用的密钥（调用方需持有锁）
+
+        Args:
+            current_time: 当前时间戳
+            force_rotate: 是否为强制轮转
+
+        Returns:
+            float: 使用该密钥前需要在锁外等待的秒数
+        """
+        wait_time = 0.0
+        key_index, available_at = self._pop_next_key()
+        next_key = self.api_keys[key_index]
+        available_remaining = available_at - current_time
+
+        if force_rotate:
+            logger.info("强制轮转: 新密钥索引: %d", key_index)
+            # 强制轮转不等待 429 冷却，但不能超出新密钥的 RPM 限制
+            wait_time = self.key_rpm_available_at.get(next_key, 0.0) - current_time
+        elif available_remaining > 0:
+            # 堆顶仍不可用，说明所有密钥都在冷却中或已达 RPM 上限
+            wait_time = available_remaining
+            logger.warning(
+                "所有密钥不可用，等待最早可用的密钥 %d: %.1fs",
+                key_index,
+                available_remaining,
+            )
+        elif self.first_actual_call:
+            logger.info("首次实际调用，密钥 %d 可用", key_index)
+            self.first_actual_call = False
+        else:
+            time_since_last_use = current_time - self.key_last_used_time.get(
+                next_key, 0.0
+            )
+            # 启用 RPM 限制时由滑动窗口控制请求速率，不再固定每个密钥间隔 60 秒
+            if self.rpm_limit <= 0 and time_since_last_use < 60:
+                # 记录需要等待的时间，稍后在锁外执行
+                wait_time = 60 - time_since_last_use
+                logger.info("密钥 %d 需要等待: %.1fs", key_index, wait_time)
+            logger.info("密钥 %d 可用", key_index)
+
+        self.current_key_index = key_index
+        self.key_last_used_time[next_key] = current_time
+        self._push_key(key_index, available_at)
+        self._configure_client()
+        return wait_time
@@ -37,6 +37,12 @@ from .prompts import SEMANTIC_CHECK_PROMPT
 
 logger = logging.getLogger(__name__)
 
+# 日志中高亮显示的比对结果
+_COLORED_RESULTS = {
+    "是": f"{Style.BRIGHT}{Fore.GREEN}是{Style.RESET_ALL}",
+    "否": f"{Style.BRIGHT}{Fore.RED}否{Style.RESET_ALL}",
+}
+
 
 class OpenAIProvider(AIProvider):
     """OpenAI AI 供应商"""
@@ -401,14 +407,11 @@ class OpenAIProvider(AIProvider):
             result: 语义比对结果
             text_mode: 是否为文本解析模式
         """
-        colored_result = result
-        if result == "是":
-            colored_result = Style.BRIGHT + Fore.GREEN + result + Style.RESET_ALL
-        elif result == "否":
-            colored_result = Style.BRIGHT + Fore.RED + result + Style.RESET_ALL
-
-        mode_text = "（文本解析）" if text_mode else ""
-        logger.info(f"语义比对结果{mode_text}：{colored_result}")
+        logger.info(
+            "语义比对结果%s：%s",
+            "（文本解析）" if text_mode else "",
+            _COLORED_RESULTS.get(result, result),
+        )
 
     def _get_prompt(
         self, question: str, ai_answer: str, source_document_content: str
@@ -511,4 +514,4 @@ class OpenAIProvider(AIProvider):
 
         # 在锁外执行等待
         if wait_time_outside_lock > 0:
-            time.sleep(wait_time_outside_lock)
+            self._wait_or_shutdown(wait_time_outside_lock)
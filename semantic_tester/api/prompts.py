@@ -4,8 +4,28 @@
 注意：提示词现在可以通过 .env.config 文件配置
 """
 
-# 默认语义检查提示词（当配置文件中没有配置时使用）
-SEMANTIC_CHECK_PROMPT = """请判断以下AI客服回答与源知识库文档内容在语义上是否相符。
+import functools
+import json
+import math
+import re
+from collections import Counter
+from typing import List, Optional, Sequence, Tuple
+
+# 文档分块：按 Markdown 标题或空行切分
+_CHUNK_SPLIT_RE = re.compile(r"\n(?=#+ )|\n\s*\n")
+_ASCII_WORD_RE = re.compile(r"[a-z0-9]+")
+_CJK_RUN_RE = re.compile(r"[\u4e00-\u9fff]+")
+
+# 合并后单个分块的目标长度（字符）
+_CHUNK_TARGET_CHARS = 1500
+# 被省略内容的分隔标记
+_OMITTED_MARK = "\n...\n"
+# BM25 参数
+_BM25_K1 = 1.5
+_BM25_B = 0.75
+
+# 语义检查提示词的组成部分
+_PROMPT_INSTRUCTIONS = """请判断以下AI客服回答与源知识库文档内容在语义上是否相符。
 
 判断标准：
 1. 如果AI客服回答的内容能够从源知识库文档中推断出来，或者与源文档的核心信息一致，则认为"相符"。
@@ -25,18 +45,126 @@ SEMANTIC_CHECK_PROMPT = """请判断以下AI客服回答与源知识库文档内
     "reason": "详细的判断依据，说明为什么是相符或不相符，请引用源文档内容作为佐证"
 }}
 
-问题点：
+"""
+_PROMPT_QA_SECTION = """问题点：
 {question}
 
 AI客服回答：
 {ai_answer}
 
+"""
+_PROMPT_DOCUMENT_SECTION = """源知识库文档内容：
+---
+{source_document}
+---
+
+"""
+_PROMPT_FOOTER = '请直接返回JSON格式结果，不要包含其他内容。记住：result 字段只能是这四个值之一："是"、"否"、"错误"、"不确定"。'
+
+# 默认语义检查提示词（当配置文件中没有配置时使用）
+SEMANTIC_CHECK_PROMPT = (
+    _PROMPT_INSTRUCTIONS
+    + _PROMPT_QA_SECTION
+    + _PROMPT_DOCUMENT_SECTION
+    + _PROMPT_FOOTER
+)
+
+# Gemini 使用的提示词：内容与默认提示词相同，但文档在问答之前，
+# 同一文档的请求共享更长的提示词前缀
+GEMINI_SEMANTIC_CHECK_PROMPT = (
+    _PROMPT_INSTRUCTIONS
+    + _PROMPT_DOCUMENT_SECTION
+    + _PROMPT_QA_SECTION
+    + _PROMPT_FOOTER
+)
+
+
+# 批量语义检查提示词：同一文档的多组问答合并为一次请求
+SEMANTIC_BATCH_CHECK_PROMPT = """请逐条判断以下每组AI客服回答与源知识库文档内容在语义上是否相符。
+
+判断标准：
+1. 如果AI客服回答的内容能够从源知识库文档中推断出来，或者与源文档的核心信息一致，则认为"相符"。
+2. 如果AI客服回答的内容与源文档相悖，或者包含源文档中没有的信息且无法合理推断，则认为"不相符"。
+3. 如果信息不足以做出明确判断，则标记为"不确定"。
+
+**重要：result 字段必须严格使用以下三种值之一："是"、"否"、"不确定"。**
+
 源知识库文档内容：
 ---
 {source_document}
 ---
 
-请直接返回JSON格式结果，不要包含其他内容。记住：result 字段只能是这四个值之一："是"、"否"、"错误"、"不确定"。"""
+{items}
+
+请严格按照以下JSON数组格式返回结果，每组问答对应一个元素，index 与编号一致：
+[
+    {{"index": 1, "result": "是" 或 "否" 或 "不确定", "reason": "详细的判断依据，请引用源文档内容作为佐证"}}
+]
+
+请直接返回JSON数组，不要包含其他内容。"""
+
+# 批量结果中允许的 result 值（"错误" 需要逐条重新判断）
+_BATCH_VALID_RESULTS = frozenset({"是", "否", "不确定"})
+_JSON_FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+def build_batch_check_prompt(
+    items: Sequence[Tuple[str, str]], source_document: str
+) -> str:
+    """
+    生成批量语义检查提示词
+
+    Args:
+        items: (问题, AI回答) 列表
+        source_document: 源文档内容
+
+    Returns:
+        str: 提示词
+    """
+    blocks = [
+        f"【第 {index} 组】\n问题点：\n{question}\n\nAI客服回答：\n{ai_answer}"
+        for index, (question, ai_answer) in enumerate(items, start=1)
+    ]
+    return SEMANTIC_BATCH_CHECK_PROMPT.format(
+        source_document=source_document, items="\n\n".join(blocks)
+    )
+
+
+def parse_batch_check_response(
+    response_text: str, count: int
+) -> List[Optional[Tuple[str, str]]]:
+    """
+    解析批量语义检查的响应
+
+    Args:
+        response_text: 模型返回的文本
+        count: 本批问答数量
+
+    Returns:
+        List[Optional[Tuple[str, str]]]: 按编号排列的 (结果, 原因)，
+        缺失或无效的条目为 None
+    """
+    results: List[Optional[Tuple[str, str]]] = [None] * count
+    try:
+        parsed = json.loads(_JSON_FENCE_RE.sub("", response_text.strip()))
+    except json.JSONDecodeError:
+        return results
+
+    if not isinstance(parsed, list):
+        return results
+
+    for entry in parsed:
+        if not isinstance(entry, dict):
+            continue
+        try:
+            index = int(entry.get("index")) - 1
+        except (TypeError, ValueError):
+            continue
+        result = str(entry.get("result", "")).strip()
+        if 0 <= index < count and result in _BATCH_VALID_RESULTS:
+            results[index] = (result, str(entry.get("reason", "无")).strip())
+
+    return results
 
 
 def get_semantic_check_prompt(env_manager=None) -> str:
@@ -52,3 +180,98 @@ def get_semantic_check_prompt(env_manager=None) -> str:
     if env_manager and hasattr(env_manager, "get_semantic_check_prompt"):
         return env_manager.get_semantic_check_prompt()
     return SEMANTIC_CHECK_PROMPT
+
+
+def _tokenize(text: str) -> List[str]:
+    """分词：英文/数字按单词，中文按相邻两字切分"""
+    lowered = text.lower()
+    tokens = _ASCII_WORD_RE.findall(lowered)
+    for run in _CJK_RUN_RE.findall(lowered):
+        if len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i : i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+@functools.lru_cache(maxsize=64)
+def _split_document(document: str) -> Tuple[Tuple[str, Counter, int], ...]:
+    """将文档切分为分块并统计词频（按文档内容缓存）"""
+    chunks: List[str] = []
+    current = ""
+    for part in _CHUNK_SPLIT_RE.split(document):
+        part = part.strip()
+        if not part:
+            continue
+        if current and len(current) + len(part) > _CHUNK_TARGET_CHARS:
+            chunks.append(current)
+            current = part
+        else:
+            current = f"{current}\n\n{part}" if current else part
+    if current:
+        chunks.append(current)
+
+    result = []
+    for chunk in chunks:
+        counts = Counter(_tokenize(chunk))
+        result.append((chunk, counts, sum(counts.values())))
+    return tuple(result)
+
+
+def select_relevant_document(
+    source_document: str, question: str, max_chars: int
+) -> str:
+    """
+    截取与问题最相关的文档片段
+
+    文档长度超过 max_chars 时，按 BM25 对分块打分，在长度预算内保留得分最高的
+    分块，并按原文顺序拼接。
+
+    Args:
+        source_document: 源文档内容
+        question: 问题内容
+        max_chars: 文档最大字符数，小于等于 0 表示不截取
+
+    Returns:
+        str: 截取后的文档内容
+    """
+    if max_chars <= 0 or len(source_document) <= max_chars:
+        return source_document
+
+    chunks = _split_document(source_document)
+    if not chunks:
+        return source_document[:max_chars]
+
+    query_terms = set(_tokenize(question))
+    chunk_count = len(chunks)
+    avg_length = sum(length for _, _, length in chunks) / chunk_count or 1.0
+    idf = {}
+    for term in query_terms:
+        df = sum(1 for _, counts, _ in chunks if term in counts)
+        idf[term] = math.log(1 + (chunk_count - df + 0.5) / (df + 0.5))
+
+    def score(index: int) -> float:
+        _, counts, length = chunks[index]
+        norm = _BM25_K1 * (1 - _BM25_B + _BM25_B * length / avg_length)
+        total = 0.0
+        for term in query_terms:
+            tf = counts.get(term, 0)
+            if tf:
+                total += idf[term] * tf * (_BM25_K1 + 1) / (tf + norm)
+        return total
+
+    # 得分相同时保持原文顺序
+    ranked = sorted(range(chunk_count), key=score, reverse=True)
+    selected = []
+    used = 0
+    for index in ranked:
+        # 除第一个分块外，每个分块还需要一个省略标记作为分隔
+        size = len(chunks[index][0]) + (len(_OMITTED_MARK) if selected else 0)
+        if used + size <= max_chars:
+            selected.append(index)
+            used += size
+
+    if not selected:
+        return source_document[:max_chars]
+
+    return _OMITTED_MARK.join(chunks[index][0] for index in sorted(selected))
@@ -103,10 +103,15 @@ class ProviderManager:
         """获取多渠道(新)供应商列表"""
         return self.channels_list
 
-    def validate_all_configured_channels(self) -> List[Dict[str, Any]]:
+    def validate_all_configured_channels(
+        self, skip_probe: bool = False
+    ) -> List[Dict[str, Any]]:
         """
         实时并发验证所有已配置渠道的 API 密钥有效性
 
+        Args:
+            skip_probe: 是否跳过在线验证，仅检查配置（无效密钥在首次调用时失败并被冷却）
+
         Returns:
             List[Dict[str, Any]]: 验证结果列表，包含 {id, name, type, valid, message}
         """
@@ -140,6 +145,9 @@ class ProviderManager:
             try:
                 if not api_key:
                     msg = "未配置 API 密钥"
+                elif skip_probe:
+                    is_valid = provider.is_configured()
+                    msg = "已跳过在线验证" if is_valid else "配置不完整"
                 else:
                     is_valid = provider.validate_api_key(api_key)
                     msg = "验证通过" if is_valid else "API 密钥无效"
@@ -0,0 +1,239 @@
+"""
+语义比对结果缓存
+
+使用 SQLite（标准库 sqlite3）持久化语义比对结果，相同（或仅空白、大小写、
+全角/半角形式不同）的问答在同一源文档、同一模型下再次出现时直接复用结果，
+无需再次调用 API。标点和数字属于内容，保留在缓存键中（"9.5元" 与 "95元" 不同）。
+完全相同的输入先经过内存 LRU，命中时不访问数据库。
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 不写入缓存的结果（技术性错误需要下次重新判断）
+_UNCACHEABLE_RESULTS = frozenset({"错误", "RETRY"})
+
+# 数据库被其他连接锁定时的最长等待时间（秒）
+_BUSY_TIMEOUT_SECONDS = 10.0
+
+
+class SemanticCache:
+    """基于 SQLite 的语义比对结果缓存"""
+
+    def __init__(
+        self,
+        db_path: str,
+        ttl_seconds: int = 7 * 24 * 3600,
+        memory_size: int = 8192,
+    ):
+        """
+        初始化结果缓存
+
+        Args:
+            db_path: SQLite 数据库文件路径
+            ttl_seconds: 缓存有效期（秒），小于等于 0 表示永不过期
+            memory_size: 内存精确匹配缓存的最大条目数，0 表示禁用
+        """
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.memory_size = memory_size
+        self._lock = threading.Lock()
+        # 精确匹配键 -> (结果, 原因, 写入时间)
+        self._memory: "OrderedDict[str, Tuple[str, str, float]]" = OrderedDict()
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # 多个工作线程共享同一连接，由 self._lock 串行化访问；
+        # 多个供应商各自打开连接访问同一文件，WAL 模式下读写互不阻塞
+        self._conn = sqlite3.connect(
+            db_path, timeout=_BUSY_TIMEOUT_SECONDS, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS semantic_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    doc_hash TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    question TEXT NOT NULL,
+                    ai_answer TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    reason TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+                """
+            )
+
+    @staticmethod
+    def normalize_text(text: str) -> str:
+        """
+        归一化文本（NFKC、忽略大小写、合并空白；保留标点和数字）
+
+        Args:
+            text: 原文本
+
+        Returns:
+            str: 归一化后的文本
+        """
+        if not text:
+            return ""
+
+        normalized = unicodedata.normalize("NFKC", text).casefold()
+        return " ".join(normalized.split())
+
+    @staticmethod
+    def hash_document(source_document: str) -> str:
+        """
+        计算源文档内容的哈希，用于区分不同文档下的缓存
+
+        Args:
+            source_document: 源文档内容
+
+        Returns:
+            str: 十六进制哈希值
+        """
+        return hashlib.blake2b(
+            (source_document or "").encode("utf-8"), digest_size=16
+        ).hexdigest()
+
+    @staticmethod
+    def _make_exact_key(
+        question: str, ai_answer: str, doc_hash: str, model: str
+    ) -> str:
+        """生成精确匹配键（不做归一化）"""
+        raw = "\0".join((question or "", ai_answer or "", doc_hash, model))
+        return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+    def _is_expired(self, created_at: float) -> bool:
+        """判断缓存条目是否过期"""
+        return self.ttl_seconds > 0 and time.time() - created_at > self.ttl_seconds
+
+    def _remember(self, exact_key: str, entry: Tuple[str, str, float]):
+        """写入内存 LRU（调用方需持有锁）"""
+        if self.memory_size <= 0:
+            return
+        self._memory[exact_key] = entry
+        self._memory.move_to_end(exact_key)
+        if len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _make_key(
+        self, question: str, ai_answer: str, doc_hash: str, model: str
+    ) -> str:
+        """生成缓存键"""
+        raw = "\0".join(
+            (
+                self.normalize_text(question),
+                self.normalize_text(ai_answer),
+                doc_hash,
+                model,
+            )
+        )
+        return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+    def get(
+        self, question: str, ai_answer: str, doc_hash: str, model: str
+    ) -> Optional[Tuple[str, str]]:
+        """
+        查询缓存
+
+        Args:
+            question: 问题内容
+            ai_answer: AI回答内容
+            doc_hash: 源文档哈希
+            model: 模型名称
+
+        Returns:
+            Optional[Tuple[str, str]]: 命中时返回 (结果, 原因)，否则返回 None
+            （数据库读取失败时按未命中处理）
+        """
+        exact_key = self._make_exact_key(question, ai_answer, doc_hash, model)
+        with self._lock:
+            entry = self._memory.get(exact_key)
+            if entry is not None:
+                if not self._is_expired(entry[2]):
+                    self._memory.move_to_end(exact_key)
+                    return entry[0], entry[1]
+                del self._memory[exact_key]
+
+        key = self._make_key(question, ai_answer, doc_hash, model)
+        with self._lock:
+            try:
+                row = self._conn.execute(
+                    "SELECT result, reason, created_at FROM semantic_cache WHERE cache_key = ?",
+                    (key,),
+                ).fetchone()
+            except sqlite3.Error as e:
+                logger.warning("读取语义缓存失败，按未命中处理: %s", e)
+                return None
+
+            if row is None or self._is_expired(row[2]):
+                return None
+
+            self._remember(exact_key, row)
+
+        return row[0], row[1]
+
+    def set(
+        self,
+        question: str,
+        ai_answer: str,
+        doc_hash: str,
+        model: str,
+        result: str,
+        reason: str,
+    ):
+        """
+        写入缓存（技术性错误结果不缓存）
+
+        Args:
+            question: 问题内容
+            ai_answer: AI回答内容
+            doc_hash: 源文档哈希
+            model: 模型名称
+            result: 比对结果
+            reason: 判断依据
+        """
+        if result in _UNCACHEABLE_RESULTS:
+            return
+
+        key = self._make_key(question, ai_answer, doc_hash, model)
+        created_at = time.time()
+        try:
+            with self._lock, self._conn:
+                self._remember(
+                    self._make_exact_key(question, ai_answer, doc_hash, model),
+                    (result, reason, created_at),
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO semantic_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        key,
+                        doc_hash,
+                        model,
+                        question,
+                        ai_answer,
+                        result,
+                        reason,
+                        created_at,
+                    ),
+                )
+        except sqlite3.Error as e:
+            logger.warning("写入语义缓存失败: %s", e)
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
@@ -157,6 +157,16 @@ class EnvManager:
             ),
             "waiting_text": self.env_loader.get_str("WAITING_TEXT", "正在处理"),
             "waiting_delay": self.env_loader.get_float("WAITING_DELAY", 0.1),
+            "semantic_cache_path": self.env_loader.get_str("SEMANTIC_CACHE_PATH", ""),
+            "semantic_cache_ttl": self.env_loader.get_int(
+                "SEMANTIC_CACHE_TTL", 7 * 24 * 3600
+            ),
+            "max_doc_chars": self.env_loader.get_int("MAX_DOC_CHARS", 0),
+            "semantic_batch_size": self.env_loader.get_int("SEMANTIC_BATCH_SIZE", 1),
+            "gemini_rpm_limit": self.env_loader.get_int("GEMINI_RPM_LIMIT", 60),
+            "key_state_path": self.env_loader.get_str(
+                "KEY_STATE_PATH", "logs/key_state.json"
+            ),
         }
 
     def get_api_config(self) -> dict:
@@ -188,6 +198,14 @@ class EnvManager:
 
         return self.env_loader.get_bool("ENABLE_THINKING", True)
 
+    def get_skip_key_validation(self) -> bool:
+        """获取是否跳过启动时的 API 密钥在线验证"""
+        value = os.getenv("SKIP_KEY_VALIDATION")
+        if value is not None:
+            return value.lower() in ("true", "1", "yes", "on")
+
+        return self.env_loader.get_bool("SKIP_KEY_VALIDATION", False)
+
     def print_env_status(self):
         """打印环境变量状态"""
         print("\n=== 环境配置状态 ===")
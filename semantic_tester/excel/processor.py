@@ -4,19 +4,30 @@ Excel 处理器
 处理 Excel 文件的读取、格式检测、数据处理和保存。
 """
 
+import json
 import logging
 import os
 import threading
 import sys
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any, Union
 
 import pandas as pd
 from colorama import Fore, Style
 
 from .utils import get_column_index, get_or_add_column
 
+try:
+    import xlsxwriter  # type: ignore # noqa: F401
+
+    _HAS_XLSXWRITER = True
+except ImportError:
+    _HAS_XLSXWRITER = False
+
 logger = logging.getLogger(__name__)
 
+# 行数达到该值时改用更快的写入方式（只写值，不带 pandas 的表头样式）
+_FAST_WRITE_MIN_ROWS = 5000
+
 
 class ExcelProcessor:
     """Excel 文件处理器"""
@@ -31,11 +42,13 @@ class ExcelProcessor:
         self.excel_path = excel_path
         self.df: Optional[pd.DataFrame] = None
         self.column_names: List[str] = []
-        self.workbook: Optional[Any] = None
-        self.worksheet: Optional[Any] = None
+        self._workbook: Optional[Any] = None  # 按需加载的 openpyxl 工作簿
         self.is_dify_format = False
         self.format_info: dict[str, Any] = {}
         self._lock = threading.Lock()  # 线程锁，确保并发写入安全
+        self._journal: Optional[Any] = None  # 结果日志 (JSONL) 文件句柄
+        # prepare_row_data 预先清洗的行数据：(缓存键, 文档名, 问题, 回答)
+        self._row_arrays: Optional[Tuple[Any, Any, Any, Any]] = None
 
     def load_excel(self) -> bool:
         """
@@ -60,17 +73,30 @@ class ExcelProcessor:
             # 获取列名并转换为字符串
             self.column_names = [str(col) for col in self.df.columns]
 
-            # 加载工作簿用于后续操作
-            from openpyxl import load_workbook
-
-            self.workbook = load_workbook(self.excel_path)
-            self.worksheet = self.workbook.active
+            # 工作簿改为首次访问时再加载，避免重复解析整个文件
+            self._workbook = None
+            self._row_arrays = None
 
             return True
         except Exception as e:
             logger.error(f"无法读取 Excel 文件 '{self.excel_path}'：{e}")
             return False
 
+    @property
+    def workbook(self) -> Optional[Any]:
+        """openpyxl 工作簿（首次访问时加载）"""
+        if self._workbook is None and self.df is not None:
+            from openpyxl import load_workbook
+
+            self._workbook = load_workbook(self.excel_path)
+        return self._workbook
+
+    @property
+    def worksheet(self) -> Optional[Any]:
+        """当前活动工作表"""
+        workbook = self.workbook
+        return workbook.active if workbook is not None else None
+
     def detect_format(self) -> Dict:
         """
         检测 Excel 文件格式（是否为 dify_chat_tester 输出格式）
@@ -601,18 +627,65 @@ class ExcelProcessor:
         assert (
             self.df is not None
         ), "DataFrame must be loaded before setting up result columns"
-        similarity_col_name = result_columns["similarity_result"][0]
-        reason_col_name = result_columns["reason"][0]
+        for col_name in (
+            result_columns["similarity_result"][0],
+            result_columns["reason"][0],
+        ):
+            # 结果列不存在时直接以 object 类型创建
+            if col_name not in self.df.columns:
+                self.df[col_name] = pd.Series(dtype="object")
+            # 已有列仅在不是 object 时转换，确保能够存储字符串，解决FutureWarning
+            elif self.df[col_name].dtype != object:
+                self.df[col_name] = self.df[col_name].astype("object")
+
+    def _row_arrays_key(self, column_mapping: Dict[str, int]) -> Tuple:
+        """生成预清洗行数据的缓存键（DataFrame 被替换或列映射变化时失效）"""
+        return (
+            id(self.df),
+            len(self.df) if self.df is not None else 0,
+            column_mapping["doc_name_col_index"],
+            column_mapping["question_col_index"],
+            column_mapping["ai_answer_col_index"],
+        )
 
-        # 检查结果列是否存在，如果不存在则创建，并指定dtype为object
-        if similarity_col_name not in self.df.columns:
-            self.df[similarity_col_name] = pd.Series(dtype="object")
-        if reason_col_name not in self.df.columns:
-            self.df[reason_col_name] = pd.Series(dtype="object")
+    def prepare_row_data(self, column_mapping: Dict[str, int]):
+        """
+        整列清洗文档名、问题和回答（去空白、空值替换为默认值）
 
-        # 强制转换列的dtype为object，确保能够存储字符串，解决FutureWarning
-        self.df[similarity_col_name] = self.df[similarity_col_name].astype("object")
-        self.df[reason_col_name] = self.df[reason_col_name].astype("object")
+        之后 get_row_data 对同一列映射直接按位置取值，规则保持一致。
+
+        Args:
+            column_mapping: 列映射配置
+        """
+        assert self.df is not None, "DataFrame must be loaded before getting row data"
+        rows = slice(None)
+        self._row_arrays = (
+            self._row_arrays_key(column_mapping),
+            self._cleaned_column(
+                column_mapping["doc_name_col_index"], "未知文档", rows
+            ),
+            self._cleaned_column(column_mapping["question_col_index"], "", rows),
+            self._cleaned_column(column_mapping["ai_answer_col_index"], "", rows),
+        )
+
+    def _cleaned_column(
+        self, col_index: int, default: str, rows: Union[slice, List[int]]
+    ) -> List[str]:
+        """
+        整列清洗指定行的单元格（去空白、空值替换为默认值）
+
+        Args:
+            col_index: 列索引，-1 表示该列未映射
+            default: 空值或未映射时的默认值
+            rows: 行位置（切片或行索引列表）
+
+        Returns:
+            List[str]: 清洗后的单元格文本
+        """
+        if col_index == -1:
+            return [default] * len(self.df.index[rows])
+        values = self.df.iloc[rows, col_index]
+        return values.astype(str).str.strip().where(values.notna(), default).tolist()
 
     def get_row_data(
         self, row_index: int, column_mapping: Dict[str, int]
@@ -628,32 +701,50 @@ class ExcelProcessor:
             Dict[str, str]: 行数据
         """
         assert self.df is not None, "DataFrame must be loaded before getting row data"
-        row = self.df.iloc[row_index]
+        arrays = self._row_arrays
+        if arrays is not None and arrays[0] == self._row_arrays_key(column_mapping):
+            return {
+                "doc_name": arrays[1][row_index],
+                "question": arrays[2][row_index],
+                "ai_answer": arrays[3][row_index],
+            }
 
-        doc_name_col_index = column_mapping["doc_name_col_index"]
-        question_col_index = column_mapping["question_col_index"]
-        ai_answer_col_index = column_mapping["ai_answer_col_index"]
+        # 按位置直接取标量，避免为每行构造 Series
+        iat = self.df.iat
+
+        def cell_text(col_index: int, default: str) -> str:
+            value = iat[row_index, col_index]
+            return str(value).strip() if pd.notna(value) else default
 
+        doc_name_col_index = column_mapping["doc_name_col_index"]
         if doc_name_col_index == -1:
             doc_name = "未知文档"
         else:
-            doc_name = (
-                str(row.iloc[doc_name_col_index]).strip()
-                if pd.notna(row.iloc[doc_name_col_index])
-                else "未知文档"
-            )
-        question = (
-            str(row.iloc[question_col_index]).strip()
-            if pd.notna(row.iloc[question_col_index])
-            else ""
-        )
-        ai_answer = (
-            str(row.iloc[ai_answer_col_index]).strip()
-            if pd.notna(row.iloc[ai_answer_col_index])
-            else ""
-        )
+            doc_name = cell_text(doc_name_col_index, "未知文档")
 
-        return {"doc_name": doc_name, "question": question, "ai_answer": ai_answer}
+        return {
+            "doc_name": doc_name,
+            "question": cell_text(column_mapping["question_col_index"], ""),
+            "ai_answer": cell_text(column_mapping["ai_answer_col_index"], ""),
+        }
+
+    def get_doc_names(
+        self, rows: List[int], column_mapping: Dict[str, int]
+    ) -> List[str]:
+        """
+        批量获取多行的文档名称（一次取出整列，规则与 get_row_data 一致）
+
+        Args:
+            rows: 行索引列表
+            column_mapping: 列映射配置
+
+        Returns:
+            List[str]: 与 rows 顺序对应的文档名称
+        """
+        assert self.df is not None, "DataFrame must be loaded before getting row data"
+        return self._cleaned_column(
+            column_mapping["doc_name_col_index"], "未知文档", rows
+        )
 
     def save_result(
         self,
@@ -678,6 +769,130 @@ class ExcelProcessor:
         with self._lock:
             self.df.at[row_index, similarity_col_name] = result
             self.df.at[row_index, reason_col_name] = reason
+            if self._journal is not None:
+                self._journal.write(
+                    json.dumps(
+                        {"row": row_index, "result": result, "reason": reason},
+                        ensure_ascii=False,
+                    )
+                    + "\n"
+                )
+                self._journal.flush()
+
+    def open_result_journal(self, journal_path: str):
+        """
+        打开结果日志，此后每条结果在保存时立即追加一行 JSON
+
+        两次 Excel 保存之间若程序中断，可通过 replay_result_journal 恢复。
+
+        Args:
+            journal_path: 结果日志 (JSONL) 文件路径
+        """
+        self.close_result_journal()
+        with self._lock:
+            self._journal = open(journal_path, "a", encoding="utf-8")
+
+    def close_result_journal(self, remove: bool = False):
+        """
+        关闭结果日志
+
+        Args:
+            remove: 是否同时删除日志文件（结果已完整写入 Excel 时）
+        """
+        with self._lock:
+            journal, self._journal = self._journal, None
+        if journal is None:
+            return
+
+        journal.close()
+        if remove:
+            try:
+                os.remove(journal.name)
+            except OSError as e:
+                logger.warning(f"删除结果日志失败: {e}")
+
+    def replay_result_journal(
+        self, journal_path: str, result_columns: Dict[str, Tuple[str, int]]
+    ) -> int:
+        """
+        从结果日志恢复上次中断前未写入 Excel 的结果
+
+        Args:
+            journal_path: 结果日志 (JSONL) 文件路径
+            result_columns: 结果列配置
+
+        Returns:
+            int: 恢复的结果数量
+        """
+        if self.df is None or not os.path.exists(journal_path):
+            return 0
+
+        similarity_col_name = result_columns["similarity_result"][0]
+        reason_col_name = result_columns["reason"][0]
+        total_rows = len(self.df)
+
+        restored = 0
+        with open(journal_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    row_index = int(entry["row"])
+                except (ValueError, KeyError, TypeError):
+                    # 中断时最后一行可能只写了一半
+                    continue
+                if 0 <= row_index < total_rows:
+                    self.df.at[row_index, similarity_col_name] = entry.get("result")
+                    self.df.at[row_index, reason_col_name] = entry.get("reason")
+                    restored += 1
+
+        logger.info(f"从结果日志 {journal_path} 恢复了 {restored} 条结果")
+        return restored
+
+    @staticmethod
+    def _write_excel_atomic(df: pd.DataFrame, output_path: str):
+        """
+        先写入临时文件再替换目标文件，避免中断时留下损坏的 Excel
+
+        Args:
+            df: 要保存的数据
+            output_path: 输出文件路径
+        """
+        root, ext = os.path.splitext(output_path)
+        tmp_path = f"{root}.tmp{ext or '.xlsx'}"
+        try:
+            if len(df) < _FAST_WRITE_MIN_ROWS:
+                df.to_excel(tmp_path, index=False)
+            elif _HAS_XLSXWRITER:
+                df.to_excel(tmp_path, index=False, engine="xlsxwriter")
+            else:
+                ExcelProcessor._write_values_only(df, tmp_path)
+            os.replace(tmp_path, output_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+            raise
+
+    @staticmethod
+    def _write_values_only(df: pd.DataFrame, output_path: str):
+        """
+        使用 openpyxl 只写模式逐行写出数据（大表且未安装 xlsxwriter 时）
+
+        Args:
+            df: 要保存的数据
+            output_path: 输出文件路径
+        """
+        from openpyxl import Workbook
+
+        workbook = Workbook(write_only=True)
+        worksheet = workbook.create_sheet()
+        worksheet.append([str(col) for col in df.columns])
+        values = df.astype(object).where(df.notna(), None)
+        for row in values.itertuples(index=False, name=None):
+            worksheet.append(row)
+        workbook.save(output_path)
 
     def save_intermediate_results(self, output_path: str, processed_count: int):
         """
@@ -691,8 +906,10 @@ class ExcelProcessor:
             self.df is not None
         ), "DataFrame must be loaded before saving intermediate results"
         try:
+            # 仅在复制快照时持锁，写文件期间工作线程仍可继续写入结果
             with self._lock:
-                self.df.to_excel(output_path, index=False)
+                snapshot = self.df.copy()
+            self._write_excel_atomic(snapshot, output_path)
             logger.info(
                 f"已保存中间结果到 {output_path} (已处理 {processed_count} 条记录)。"
             )
@@ -712,20 +929,24 @@ class ExcelProcessor:
 
             logger.error(f"保存中间结果失败: {e}")
 
-    def save_final_results(self, output_path: str):
+    def save_final_results(self, output_path: str) -> bool:
         """
         保存最终结果（线程安全）
 
         Args:
             output_path: 输出文件路径
+
+        Returns:
+            bool: 是否保存成功
         """
         assert (
             self.df is not None
         ), "DataFrame must be loaded before saving final results"
         try:
             with self._lock:  # 使用锁保护并发写入
-                self.df.to_excel(output_path, index=False)
+                self._write_excel_atomic(self.df, output_path)
             logger.info(f"最终结果已保存到 {output_path}")
+            return True
         except Exception as e:
             # 检查是否为权限错误（通常是文件被占用）
             if "Permission denied" in str(e) or isinstance(e, PermissionError):
@@ -742,9 +963,9 @@ class ExcelProcessor:
                     ):
                         try:
                             with self._lock:
-                                self.df.to_excel(output_path, index=False)
+                                self._write_excel_atomic(self.df, output_path)
                             logger.info(f"最终结果已保存到 {output_path}")
-                            return
+                            return True
                         except Exception as retry_e:
                             if "Permission denied" in str(retry_e) or isinstance(
                                 retry_e, PermissionError
@@ -755,9 +976,10 @@ class ExcelProcessor:
                                 break
                     else:
                         logger.warning("用户放弃保存最终结果")
-                        return
+                        return False
 
             logger.error(f"保存最终结果失败: {e}")
+            return False
 
     def get_total_records(self) -> int:
         """
@@ -793,9 +1015,17 @@ class ExcelProcessor:
         if not os.path.exists(output_path):
             return 0
 
+        similarity_col_name = result_columns["similarity_result"][0]
+        reason_col_name = result_columns["reason"][0]
+        wanted_columns = {similarity_col_name, reason_col_name}
+
         try:
-            # 读取现有结果文件
-            existing_df = pd.read_excel(output_path)
+            # 只读取两列结果列，且不做类型推断
+            existing_df = pd.read_excel(
+                output_path,
+                usecols=lambda col: str(col) in wanted_columns,
+                dtype=object,
+            )
 
             # 验证行数是否一致
             if len(existing_df) != len(self.df):
@@ -804,9 +1034,6 @@ class ExcelProcessor:
                     "无法完全恢复进度。将尝试按索引合并。"
                 )
 
-            similarity_col_name = result_columns["similarity_result"][0]
-            reason_col_name = result_columns["reason"][0]
-
             # 检查结果文件是否包含结果列
             if (
                 similarity_col_name not in existing_df.columns
@@ -865,6 +1092,27 @@ class ExcelProcessor:
         # 检查值是否非空且不是空字符串
         return pd.notna(val) and str(val).strip() != ""
 
+    def get_pending_rows(self, result_columns: Dict[str, Tuple[str, int]]) -> List[int]:
+        """
+        获取尚无结果的行索引（整列向量化判断，与 has_result 规则一致）
+
+        Args:
+            result_columns: 结果列配置
+
+        Returns:
+            List[int]: 待处理的行索引列表
+        """
+        if self.df is None:
+            return []
+
+        similarity_col_name = result_columns["similarity_result"][0]
+        if similarity_col_name not in self.df.columns:
+            return list(range(len(self.df)))
+
+        column = self.df[similarity_col_name]
+        has_value = column.notna() & column.astype(str).str.strip().ne("")
+        return (~has_value).to_numpy().nonzero()[0].tolist()
+
     def get_result(self, row_index: int, column_name: str) -> str:
         """
         获取指定行指定列的结果值
@@ -889,3 +1137,53 @@ class ExcelProcessor:
         if pd.notna(val):
             return str(val).strip()
         return ""
+
+    def mark_empty_rows(
+        self,
+        rows: List[int],
+        column_mapping: Dict[str, int],
+        result_columns: Dict[str, Tuple[str, int]],
+    ) -> List[int]:
+        """
+        将问题或 AI 回答为空的行直接标记为"跳过"（整列向量化判断）
+
+        判断规则和原因文本与 ValidationUtils.validate_row_data 一致。
+
+        Args:
+            rows: 待检查的行索引列表
+            column_mapping: 列映射配置
+            result_columns: 结果列配置
+
+        Returns:
+            List[int]: 被标记为跳过的行索引列表
+        """
+        if self.df is None or not rows:
+            return []
+
+        def is_blank(col_index: int):
+            values = self.df.iloc[rows, col_index]
+            return (values.isna() | values.astype(str).str.strip().eq("")).to_numpy()
+
+        question_blank = is_blank(column_mapping["question_col_index"])
+        answer_blank = is_blank(column_mapping["ai_answer_col_index"])
+        skip_mask = question_blank | answer_blank
+        if not skip_mask.any():
+            return []
+
+        reasons = [
+            "; ".join(
+                error
+                for error, blank in (("问题内容为空", q), ("AI回答内容为空", a))
+                if blank
+            )
+            for q, a in zip(question_blank[skip_mask], answer_blank[skip_mask])
+        ]
+        skipped_rows = [row for row, skip in zip(rows, skip_mask) if skip]
+
+        similarity_col_name = result_columns["similarity_result"][0]
+        reason_col_name = result_columns["reason"][0]
+        with self._lock:
+            self.df.loc[skipped_rows, similarity_col_name] = "跳过"
+            self.df.loc[skipped_rows, reason_col_name] = reasons
+
+        return skipped_rows
@@ -5,14 +5,47 @@ Excel 工具函数
 """
 
 import logging
-from typing import List
+import weakref
+from typing import Dict, List, Optional, Tuple
 
 import pandas as pd
+from openpyxl.worksheet.cell_range import CellRange
 from openpyxl.worksheet.worksheet import Worksheet
 from openpyxl.cell import MergedCell
 
 logger = logging.getLogger(__name__)
 
+_MergedLookup = Dict[Tuple[int, int], CellRange]
+
+# 每个工作表的 (行, 列) -> 所属合并区域 索引，工作表释放后自动清理
+_merged_lookup_cache: "weakref.WeakKeyDictionary[Worksheet, _MergedLookup]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _build_merged_lookup(worksheet: Worksheet) -> _MergedLookup:
+    """遍历一次合并区域，建立单元格到合并区域的索引"""
+    lookup = {
+        cell: merged_range
+        for merged_range in worksheet.merged_cells.ranges
+        for cell in merged_range.cells
+    }
+    _merged_lookup_cache[worksheet] = lookup
+    return lookup
+
+
+def _find_merged_range(worksheet: Worksheet, row: int, col: int) -> Optional[CellRange]:
+    """
+    查找单元格所属的合并区域
+
+    命中缓存且该区域仍然存在时直接返回，否则重建索引（合并区域有变化）。
+    """
+    lookup = _merged_lookup_cache.get(worksheet)
+    merged_range = lookup.get((row, col)) if lookup is not None else None
+    if merged_range is None or merged_range not in worksheet.merged_cells.ranges:
+        merged_range = _build_merged_lookup(worksheet).get((row, col))
+    return merged_range
+
 
 def write_cell_safely(worksheet: Worksheet, row: int, col: int, value: str):
     """
@@ -27,12 +60,12 @@ def write_cell_safely(worksheet: Worksheet, row: int, col: int, value: str):
     """
     cell_obj = worksheet.cell(row=row, column=col)
     if isinstance(cell_obj, MergedCell):
-        # 如果是合并单元格的一部分，找到其合并区域的左上角单元格
-        for merged_range in worksheet.merged_cells.ranges:
-            if cell_obj.coordinate in merged_range:
-                min_col, min_row, max_col, max_row = merged_range.bounds
-                worksheet.cell(row=min_row, column=min_col).value = value  # type: ignore
-                return
+        # 如果是合并单元格的一部分，写入其合并区域的左上角单元格
+        merged_range = _find_merged_range(worksheet, row, col)
+        if merged_range is not None:
+            worksheet.cell(
+                row=merged_range.min_row, column=merged_range.min_col
+            ).value = value  # type: ignore
     else:
         cell_obj.value = value
 
@@ -8,6 +8,7 @@ Dify Chat Tester 输入模板生成器
 import os
 import pandas as pd
 from datetime import datetime
+from types import MappingProxyType
 from typing import List, Dict, Any, Optional
 from colorama import Fore, Style
 
@@ -27,13 +28,28 @@ class DifyTemplateGenerator:
     ]
 
     # 支持的供应商响应列名
-    SUPPLIER_RESPONSE_COLUMNS = {
-        "dify": "Dify响应",
-        "openai": "OpenAI兼容接口响应",
-        "anthropic": "Anthropic兼容接口响应",
-        "iflow": "iFlow响应",
-        "gemini": "Gemini响应",
-    }
+    SUPPLIER_RESPONSE_COLUMNS = MappingProxyType(
+        {
+            "dify": "Dify响应",
+            "openai": "OpenAI兼容接口响应",
+            "anthropic": "Anthropic兼容接口响应",
+            "iflow": "iFlow响应",
+            "gemini": "Gemini响应",
+        }
+    )
+
+    # 各供应商的示例回答（只读）
+    _SAMPLE_RESPONSES = MappingProxyType(
+        {
+            "dify": "您好！人工智能（Artificial Intelligence，简称AI）是计算机科学的一个分支，致力于创建能够执行通常需要人类智能的任务的系统。这包括学习、推理、问题解决、感知和语言理解等能力。",
+            "openai": "人工智能是一种模拟人类智能的技术，通过算法和大数据让机器能够学习、推理和决策。它在图像识别、自然语言处理、自动驾驶等领域有广泛应用。",
+            "anthropic": "人工智能是指由机器展现的智能，特别是计算机系统模拟人类智能过程的能力。包括学习（获取信息和规则）、使用规则进行推理或结论，以及自我修正等。",
+            "iflow": "人工智能是研究、开发用于模拟、延伸和扩展人的智能的理论、方法、技术及应用系统的技术科学。它试图了解智能的实质，并生产出一种新的能以人类智能相似的方式做出反应的智能机器。",
+            "gemini": "人工智能是计算机科学的一个分支，旨在创建能够执行通常需要人类智能的任务的系统。这些系统可以通过学习大量数据来识别模式、做出决策和解决问题。",
+        }
+    )
+
+    _DEFAULT_SAMPLE_RESPONSE = "这是一个AI回答示例。请根据您的具体需求修改此内容。"
 
     def __init__(self):
         """初始化模板生成器"""
@@ -42,8 +58,7 @@ class DifyTemplateGenerator:
 
     def _ensure_templates_dir(self):
         """确保模板目录存在"""
-        if not os.path.exists(self.templates_dir):
-            os.makedirs(self.templates_dir)
+        os.makedirs(self.templates_dir, exist_ok=True)
 
     def generate_basic_template(self, supplier: str = "dify") -> Optional[str]:
         """
@@ -55,15 +70,8 @@ class DifyTemplateGenerator:
         Returns:
             str: 生成的模板文件路径
         """
-        # 根据供应商确定响应列名
-        response_col = self.SUPPLIER_RESPONSE_COLUMNS.get(
-            supplier.lower(), f"{supplier}响应"
-        )
-
         # 构建列结构
-        columns = self.STANDARD_COLUMNS.copy()
-        # 替换响应列
-        columns[3] = response_col
+        columns = self._build_columns(supplier)
 
         # 创建示例数据
         sample_data = self._create_sample_data(columns, supplier)
@@ -90,6 +98,43 @@ class DifyTemplateGenerator:
         print(f"{Fore.GREEN}✅ 已生成 {supplier} 模板: {filepath}{Style.RESET_ALL}")
         return filepath
 
+    def generate_all_templates(self, suppliers: List[str]) -> Optional[str]:
+        """
+        在同一个工作簿中为每个供应商生成一个工作表
+
+        只打开一次工作簿，相比逐个调用 generate_basic_template 省去了
+        重复的工作簿初始化和文件写入。
+
+        Args:
+            suppliers: 供应商列表
+
+        Returns:
+            str: 生成的模板文件路径
+        """
+        from openpyxl import Workbook
+
+        if not suppliers:
+            return None
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"dify_chat_tester_all_template_{timestamp}.xlsx"
+        filepath = os.path.join(self.templates_dir, filename)
+
+        try:
+            # write_only 模式按行流式写出，不在内存中维护单元格对象
+            wb = Workbook(write_only=True)
+            for supplier in suppliers:
+                # Excel 工作表名称最长 31 个字符
+                ws = wb.create_sheet(title=supplier[:31])
+                ws.append(self._build_columns(supplier))
+            wb.save(filepath)
+        except Exception as e:
+            print(f"❌ 模板生成失败: {e}")
+            return None
+
+        print(f"{Fore.GREEN}✅ 已生成全部供应商模板: {filepath}{Style.RESET_ALL}")
+        return filepath
+
     def generate_multi_supplier_template(self, suppliers: List[str]) -> Optional[str]:
         """
         生成多供应商模板
@@ -139,6 +184,15 @@ class DifyTemplateGenerator:
         print(f"{Fore.GREEN}✅ 已生成多供应商模板: {filepath}{Style.RESET_ALL}")
         return filepath
 
+    def _build_columns(self, supplier: str) -> List[str]:
+        """构建单供应商模板的列结构"""
+        columns = self.STANDARD_COLUMNS.copy()
+        # 替换响应列
+        columns[3] = self.SUPPLIER_RESPONSE_COLUMNS.get(
+            supplier.lower(), f"{supplier}响应"
+        )
+        return columns
+
     def _create_sample_data(self, columns: List[str], supplier: str) -> Dict[str, Any]:
         """创建单供应商示例数据"""
         sample_data = {
@@ -151,10 +205,11 @@ class DifyTemplateGenerator:
         }
 
         # 添加供应商特定的响应
+        supplier_key = supplier.lower()
         response_col = self.SUPPLIER_RESPONSE_COLUMNS.get(
-            supplier.lower(), f"{supplier}响应"
+            supplier_key, f"{supplier}响应"
         )
-        sample_data[response_col] = self._get_sample_response(supplier)
+        sample_data[response_col] = self._get_sample_response(supplier_key)
 
         # 确保所有列都有值
         for col in columns:
@@ -178,10 +233,11 @@ class DifyTemplateGenerator:
 
         # 添加各供应商响应
         for supplier in suppliers:
+            supplier_key = supplier.lower()
             response_col = self.SUPPLIER_RESPONSE_COLUMNS.get(
-                supplier.lower(), f"{supplier}响应"
+                supplier_key, f"{supplier}响应"
             )
-            sample_data[response_col] = self._get_sample_response(supplier)
+            sample_data[response_col] = self._get_sample_response(supplier_key)
 
         # 确保所有列都有值
         for col in columns:
@@ -190,32 +246,24 @@ class DifyTemplateGenerator:
 
         return sample_data
 
-    def _get_sample_response(self, supplier: str) -> str:
-        """获取供应商示例回答"""
-        responses = {
-            "dify": "您好！人工智能（Artificial Intelligence，简称AI）是计算机科学的一个分支，致力于创建能够执行通常需要人类智能的任务的系统。这包括学习、推理、问题解决、感知和语言理解等能力。",
-            "openai": "人工智能是一种模拟人类智能的技术，通过算法和大数据让机器能够学习、推理和决策。它在图像识别、自然语言处理、自动驾驶等领域有广泛应用。",
-            "anthropic": "人工智能是指由机器展现的智能，特别是计算机系统模拟人类智能过程的能力。包括学习（获取信息和规则）、使用规则进行推理或结论，以及自我修正等。",
-            "iflow": "人工智能是研究、开发用于模拟、延伸和扩展人的智能的理论、方法、技术及应用系统的技术科学。它试图了解智能的实质，并生产出一种新的能以人类智能相似的方式做出反应的智能机器。",
-            "gemini": "人工智能是计算机科学的一个分支，旨在创建能够执行通常需要人类智能的任务的系统。这些系统可以通过学习大量数据来识别模式、做出决策和解决问题。",
-        }
-
-        return responses.get(
-            supplier.lower(), "这是一个AI回答示例。请根据您的具体需求修改此内容。"
-        )
+    def _get_sample_response(self, supplier_key: str) -> str:
+        """获取供应商示例回答（supplier_key 需已转为小写）"""
+        return self._SAMPLE_RESPONSES.get(supplier_key, self._DEFAULT_SAMPLE_RESPONSE)
 
     def list_available_templates(self) -> List[str]:
         """列出可用的模板文件"""
-        if not os.path.exists(self.templates_dir):
+        # scandir 直接复用目录项中的文件类型信息，无需逐个 stat
+        try:
+            with os.scandir(self.templates_dir) as it:
+                return sorted(
+                    entry.path
+                    for entry in it
+                    if entry.name.endswith(".xlsx")
+                    and entry.is_file(follow_symlinks=False)
+                )
+        except FileNotFoundError:
             return []
 
-        templates = []
-        for file in os.listdir(self.templates_dir):
-            if file.endswith(".xlsx"):
-                templates.append(os.path.join(self.templates_dir, file))
-
-        return sorted(templates)
-
     def show_template_info(self):
         """显示模板生成信息"""
         print(f"\n{Fore.CYAN}=== Dify Chat Tester 模板生成器 ==={Style.RESET_ALL}")
@@ -4,10 +4,22 @@
 提供各种格式化功能的工具函数。
 """
 
+import functools
 import re
 import textwrap
 from typing import Dict, List, Optional
 
+# 代码块围栏后的语言标签（其后必须有空白，避免误删同一行的内容）
+_FENCE_LANG_RE = re.compile(r"[\w+.-]+(?=\s)")
+
+
+@functools.lru_cache(maxsize=32)
+def _get_text_wrapper(width: int, indent: str) -> textwrap.TextWrapper:
+    """按 (width, indent) 缓存 TextWrapper，避免每次调用重新构建"""
+    return textwrap.TextWrapper(
+        width=width, initial_indent=indent, subsequent_indent=indent
+    )
+
 
 class FormatUtils:
     """格式化工具类"""
@@ -135,10 +147,7 @@ class FormatUtils:
         if not text:
             return []
 
-        wrapped_lines = textwrap.wrap(
-            text, width=width, initial_indent=indent, subsequent_indent=indent
-        )
-        return wrapped_lines
+        return _get_text_wrapper(width, indent).wrap(text)
 
     @staticmethod
     def format_table(
@@ -236,11 +245,15 @@ class FormatUtils:
         if not text:
             return ""
 
-        # 移除 Markdown 代码块标记
-        if text.startswith("```json") and text.endswith("```"):
-            text = text[7:-3].strip()
-        elif text.startswith("```") and text.endswith("```"):
-            text = text[3:-3].strip()
+        # 移除 Markdown 代码块标记（只有前缀命中时才检查后缀，语言标签任意）
+        if text.startswith("```") and len(text) >= 6 and text.endswith("```"):
+            body = text[3:-3]
+            # 只去掉紧跟围栏的语言标签（```json / ```yaml），同一行的内容保留，
+            # 例如 ```json {"a": 1}
+            tag = _FENCE_LANG_RE.match(body)
+            if tag:
+                body = body[tag.end() :]
+            return body.strip()
 
         return text
 
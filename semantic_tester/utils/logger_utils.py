@@ -4,15 +4,41 @@
 提供日志配置和管理的工具函数。
 """
 
+import atexit
 import logging
 import os
+import queue
 import sys
-from typing import List, Optional
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# console_print 使用的 ANSI 颜色代码
+_ANSI_RESET = "\033[0m"
+_CONSOLE_COLORS = {
+    "INFO": "\033[37m",  # 白色
+    "SUCCESS": "\033[92m",  # 绿色
+    "WARNING": "\033[93m",  # 黄色
+    "ERROR": "\033[91m",  # 红色
+}
+_CONSOLE_DEFAULT_COLOR = _CONSOLE_COLORS["INFO"]
 
 
 class LoggerUtils:
     """日志工具类"""
 
+    # 后台日志监听器：实际的文件/控制台 I/O 在该线程中完成
+    _listener: Optional[QueueListener] = None
+    _queue_handler: Optional[QueueHandler] = None
+    # 最近一次 setup_logging 的配置，用于跳过重复配置
+    _current_config: Optional[tuple] = None
+    _atexit_registered: bool = False
+    # 已解析的日志目录缓存：首选日志目录 -> 实际使用的日志目录
+    _resolved_log_dir_cache: Dict[str, str] = {}
+    # 启动信息面板缓存（首次打印时构建）
+    _cached_banner: Optional[Any] = None
+
     @staticmethod
     def _get_log_directory(log_dir: str) -> str:
         """
@@ -35,21 +61,27 @@ class LoggerUtils:
         # 首选：程序所在目录的logs文件夹
         preferred_log_dir = os.path.join(app_dir, log_dir)
 
+        cached = LoggerUtils._resolved_log_dir_cache.get(preferred_log_dir)
+        if cached and os.path.isdir(cached):
+            return cached
+
         # 测试是否有写入权限
         try:
             os.makedirs(preferred_log_dir, exist_ok=True)
-            # 尝试写入测试文件
-            test_file = os.path.join(preferred_log_dir, ".write_test")
-            with open(test_file, "w") as f:
-                f.write("test")
-            os.remove(test_file)
-            return preferred_log_dir
-        except (OSError, PermissionError):
+            writable = os.access(preferred_log_dir, os.W_OK)
+        except OSError:
+            writable = False
+
+        if writable:
+            resolved = preferred_log_dir
+        else:
             # 如果没有写入权限，使用用户主目录
             home_dir = os.path.expanduser("~")
-            fallback_log_dir = os.path.join(home_dir, ".semantic_tester", log_dir)
-            os.makedirs(fallback_log_dir, exist_ok=True)
-            return fallback_log_dir
+            resolved = os.path.join(home_dir, ".semantic_tester", log_dir)
+            os.makedirs(resolved, exist_ok=True)
+
+        LoggerUtils._resolved_log_dir_cache[preferred_log_dir] = resolved
+        return resolved
 
     @staticmethod
     def setup_logging(
@@ -74,6 +106,22 @@ class LoggerUtils:
         # 获取日志目录（智能选择）
         actual_log_dir = LoggerUtils._get_log_directory(log_dir)
 
+        # 配置未变化且日志管道仍在工作时，无需重建处理器
+        config = (
+            actual_log_dir,
+            log_level,
+            log_file,
+            quiet_console,
+            max_bytes,
+            backup_count,
+        )
+        if (
+            config == LoggerUtils._current_config
+            and LoggerUtils._listener is not None
+            and LoggerUtils._queue_handler in logging.getLogger().handlers
+        ):
+            return
+
         # 配置日志格式
         # 文件使用详细格式，控制台使用简洁格式
         file_formatter = logging.Formatter(
@@ -81,7 +129,8 @@ class LoggerUtils:
         )
         console_formatter = logging.Formatter("%(levelname)s: %(message)s")
 
-        # 清除现有的处理器
+        # 停止旧的后台监听器并清除现有的处理器
+        LoggerUtils._stop_listener()
         root_logger = logging.getLogger()
         for handler in root_logger.handlers[:]:
             root_logger.removeHandler(handler)
@@ -91,8 +140,6 @@ class LoggerUtils:
         root_logger.setLevel(level)
 
         # 文件处理器 - 使用RotatingFileHandler实现日志轮转
-        from logging.handlers import RotatingFileHandler
-
         log_file_path = os.path.join(actual_log_dir, log_file)
         file_handler = RotatingFileHandler(
             log_file_path,
@@ -102,7 +149,6 @@ class LoggerUtils:
         )
         file_handler.setFormatter(file_formatter)
         file_handler.setLevel(level)
-        root_logger.addHandler(file_handler)
 
         # 控制台处理器 - 简洁输出
         if quiet_console:
@@ -110,19 +156,79 @@ class LoggerUtils:
             console_handler.setFormatter(console_formatter)
             # 控制台只显示WARNING及以上级别的信息，避免冗余输出
             console_handler.setLevel(logging.WARNING)
-            root_logger.addHandler(console_handler)
         else:
             # 详细控制台输出（调试模式）
             console_handler = logging.StreamHandler(sys.stdout)
             console_handler.setFormatter(file_formatter)
             console_handler.setLevel(level)
-            root_logger.addHandler(console_handler)
+
+        # 调用线程只负责入队，格式化、写文件与轮转由后台监听器完成
+        log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+        queue_handler = QueueHandler(log_queue)
+        root_logger.addHandler(queue_handler)
+        listener = QueueListener(
+            log_queue, file_handler, console_handler, respect_handler_level=True
+        )
+        listener.start()
+        LoggerUtils._listener = listener
+        LoggerUtils._queue_handler = queue_handler
+        LoggerUtils._current_config = config
+
+        if not LoggerUtils._atexit_registered:
+            atexit.register(LoggerUtils._shutdown_logging)
+            LoggerUtils._atexit_registered = True
 
         # 记录日志系统初始化信息
         logging.info(
             f"日志系统已初始化：目录={actual_log_dir}, 级别={log_level}, 最大={max_bytes / 1024 / 1024:.1f}MB, 备份={backup_count}"
         )
 
+    @staticmethod
+    def _stop_listener():
+        """
+        停止后台日志监听器（会先处理完队列中剩余的日志记录）并关闭其处理器
+
+        同时从根日志器移除队列处理器，避免之后的记录进入无人处理的队列。
+        """
+        queue_handler = LoggerUtils._queue_handler
+        if queue_handler is not None:
+            LoggerUtils._queue_handler = None
+            logging.getLogger().removeHandler(queue_handler)
+            queue_handler.close()
+
+        listener = LoggerUtils._listener
+        if listener is None:
+            return
+        LoggerUtils._listener = None
+        LoggerUtils._current_config = None
+        listener.stop()
+        # 及时释放日志文件句柄（Windows 下未关闭的文件会阻碍日志轮转）
+        for handler in listener.handlers:
+            handler.close()
+
+    @staticmethod
+    def _shutdown_logging():
+        """进程退出时清理日志系统"""
+        LoggerUtils._stop_listener()
+        logging.shutdown()
+
+    @staticmethod
+    def _get_output_handlers() -> List[logging.Handler]:
+        """
+        获取实际负责输出的处理器
+
+        Returns:
+            List[logging.Handler]: 根日志器上的非队列处理器及后台监听器中的处理器
+        """
+        handlers = [
+            handler
+            for handler in logging.getLogger().handlers
+            if not isinstance(handler, QueueHandler)
+        ]
+        if LoggerUtils._listener is not None:
+            handlers.extend(LoggerUtils._listener.handlers)
+        return handlers
+
     @staticmethod
     def get_logger(name: str) -> logging.Logger:
         """
@@ -146,19 +252,8 @@ class LoggerUtils:
         """
         log_level = getattr(logging, level.upper(), logging.INFO)
         logging.getLogger().setLevel(log_level)
-        # 只在文件中记录，不在控制台显示
-        file_logger = logging.FileHandler("logs/semantic_test.log", encoding="utf-8")
-        file_logger.emit(
-            logging.LogRecord(
-                name="root",
-                level=logging.INFO,
-                pathname="",
-                lineno=0,
-                msg=f"日志级别已设置为: {level}",
-                args=(),
-                exc_info=None,
-            )
-        )
+        # 调试信息：只在新级别为 DEBUG 时记录，不会出现在常规控制台输出中
+        logger.debug("日志级别已设置为: %s", level)
 
     @staticmethod
     def console_print(message: str, level: str = "INFO"):
@@ -169,17 +264,9 @@ class LoggerUtils:
             message: 要显示的消息
             level: 消息级别 (INFO, SUCCESS, WARNING, ERROR)
         """
-        colors = {
-            "INFO": "\033[37m",  # 白色
-            "SUCCESS": "\033[92m",  # 绿色
-            "WARNING": "\033[93m",  # 黄色
-            "ERROR": "\033[91m",  # 红色
-            "RESET": "\033[0m",  # 重置
-        }
-
-        color = colors.get(level, colors["INFO"])
-        reset = colors["RESET"]
-        print(f"{color}{message}{reset}")
+        color = _CONSOLE_COLORS.get(level, _CONSOLE_DEFAULT_COLOR)
+        sys.stdout.write(f"{color}{message}{_ANSI_RESET}\n")
+        sys.stdout.flush()
 
     @staticmethod
     def set_temp_log_level(
@@ -200,15 +287,14 @@ class LoggerUtils:
             root_logger.setLevel(log_level)
         else:
             # 设置特定处理器的级别
-            for handler in root_logger.handlers:
+            for handler in LoggerUtils._get_output_handlers():
                 if handler in target_handlers:
                     handler.setLevel(log_level)
 
     @staticmethod
     def silence_console_temporarily():
         """临时静默控制台输出"""
-        root_logger = logging.getLogger()
-        for handler in root_logger.handlers:
+        for handler in LoggerUtils._get_output_handlers():
             if isinstance(handler, logging.StreamHandler) and not isinstance(
                 handler, logging.FileHandler
             ):
@@ -218,8 +304,7 @@ class LoggerUtils:
     @staticmethod
     def restore_console_level():
         """恢复控制台输出级别"""
-        root_logger = logging.getLogger()
-        for handler in root_logger.handlers:
+        for handler in LoggerUtils._get_output_handlers():
             if isinstance(handler, logging.StreamHandler) and not isinstance(
                 handler, logging.FileHandler
             ):
@@ -230,13 +315,31 @@ class LoggerUtils:
     def print_startup_banner():
         """打印启动信息（标题和应用信息合并显示）"""
         from rich.console import Console
+
+        console = Console()
+
+        # 面板内容在进程内不会变化，只构建一次
+        if LoggerUtils._cached_banner is None:
+            LoggerUtils._cached_banner = LoggerUtils._build_startup_banner()
+
+        console.print()
+        console.print(LoggerUtils._cached_banner)
+        console.print()
+
+    @staticmethod
+    def _build_startup_banner() -> Any:
+        """
+        构建启动信息面板
+
+        Returns:
+            rich.panel.Panel: 启动信息面板
+        """
+        from rich.console import Group
         from rich.panel import Panel
         from rich.text import Text
         from rich import box
         from semantic_tester import __version__, __author__, __email__, __license__
 
-        console = Console()
-
         # 创建信息文本
         info_text = Text()
         # info_text.append("\n")  # 移除空行分隔
@@ -254,12 +357,10 @@ class LoggerUtils:
         )
 
         # 组合内容
-        from rich.console import Group
-
         panel_content = Group(info_text)
 
         # 创建面板
-        panel = Panel(
+        return Panel(
             panel_content,
             border_style="bright_cyan",
             box=box.ROUNDED,
@@ -268,10 +369,6 @@ class LoggerUtils:
             expand=False,
         )
 
-        console.print()
-        console.print(panel)
-        console.print()
-
     @staticmethod
     def print_app_info():
         """打印应用信息（已废弃，功能合并到 print_startup_banner）"""
@@ -290,18 +387,24 @@ class LoggerUtils:
         configured = providers_info.get("configured", 0)
         current = providers_info.get("current", "无")
 
-        print(f"📊 AI供应商状态: {configured}/{total} 已配置 | 当前: {current}")
-        print()
+        sys.stdout.write(
+            f"📊 AI供应商状态: {configured}/{total} 已配置 | 当前: {current}\n\n"
+        )
+        sys.stdout.flush()
 
     @staticmethod
     def print_simple_menu():
         """打印简洁的主菜单"""
-        print("🎯 请选择操作:")
-        print("   1. 开始新的语义分析")
-        print("   2. 查看使用说明")
-        print("   3. AI供应商管理")
-        print("   4. 退出程序")
-        print()
+        # 整块菜单一次写出
+        sys.stdout.write(
+            "🎯 请选择操作:\n"
+            "   1. 开始新的语义分析\n"
+            "   2. 查看使用说明\n"
+            "   3. AI供应商管理\n"
+            "   4. 退出程序\n"
+            "\n"
+        )
+        sys.stdout.flush()
 
     @staticmethod
     def log_system_info():
@@ -317,24 +420,15 @@ class LoggerUtils:
     @staticmethod
     def log_package_info():
         """记录关键包版本信息"""
-        try:
-            import pandas
-            import google
-            import openpyxl
+        # 通过安装元数据读取版本，无需导入 pandas 等重量级包
+        from importlib.metadata import PackageNotFoundError, version
 
-            logging.info("=== 包版本信息 ===")
-            logging.info(f"pandas: {pandas.__version__}")
-
-            # 尝试获取 Google 包版本信息
+        logging.info("=== 包版本信息 ===")
+        for package in ("pandas", "google-genai", "openpyxl"):
             try:
-                google_version = getattr(google, "__version__", "unknown")
-                logging.info(f"google-generativeai: {google_version}")
-            except AttributeError:
-                logging.info("google-generativeai: version unavailable")
-
-            logging.info(f"openpyxl: {openpyxl.__version__}")
-        except ImportError as e:
-            logging.warning(f"无法获取包版本信息: {e}")
+                logging.info("%s: %s", package, version(package))
+            except PackageNotFoundError:
+                logging.info("%s: 未安装", package)
 
     @staticmethod
     def create_progress_logger(
@@ -368,23 +462,43 @@ class ProgressLogger:
         self.description = description
         self.current_item = 0
         self.logger = logging.getLogger(__name__)
+        # 只在整数百分比变化时输出日志，避免逐条记录
+        self._last_logged_pct = -1
+        # 预先计算百分比系数，将每次除法换成乘法
+        self._pct_scale = 100.0 / total_items if total_items else 0.0
 
     def update(self, increment: int = 1, message: str = ""):
         """
         更新进度
 
+        仅当整数百分比发生变化、到达终点或带有附加消息时才输出日志。
+
         Args:
             increment: 增量
             message: 附加消息
         """
         self.current_item += increment
-        percentage = (self.current_item / self.total_items) * 100
-
-        msg = f"{self.description}: {self.current_item}/{self.total_items} ({percentage:.1f}%)"
-        if message:
-            msg += f" - {message}"
-
-        self.logger.info(msg)
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+
+        pct = self.current_item * 100 // self.total_items if self.total_items else 100
+        if (
+            pct == self._last_logged_pct
+            and self.current_item != self.total_items
+            and not message
+        ):
+            return
+        self._last_logged_pct = pct
+
+        # 使用 %-风格参数，由日志系统在需要输出时再格式化
+        self.logger.info(
+            "%s: %d/%d (%.1f%%)%s",
+            self.description,
+            self.current_item,
+            self.total_items,
+            self.current_item * self._pct_scale,
+            f" - {message}" if message else "",
+        )
 
     def finish(self, message: str = "完成"):
         """
@@ -394,7 +508,11 @@ class ProgressLogger:
             message: 完成消息
         """
         self.logger.info(
-            f"{self.description}: {self.total_items}/{self.total_items} (100.0%) - {message}"
+            "%s: %d/%d (100.0%%) - %s",
+            self.description,
+            self.total_items,
+            self.total_items,
+            message,
         )
 
 
@@ -411,12 +529,23 @@ class ColoredFormatter(logging.Formatter):
     }
     RESET = "\033[0m"
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # 预先构建带颜色的级别名称，避免每条记录重复拼接字符串
+        self._colored_levelnames = {
+            level: f"{color}{level}{self.RESET}" for level, color in self.COLORS.items()
+        }
+
     def format(self, record):
         """格式化日志记录"""
-        # 添加颜色
-        if record.levelname in self.COLORS:
-            record.levelname = (
-                f"{self.COLORS[record.levelname]}{record.levelname}{self.RESET}"
-            )
+        original_levelname = record.levelname
+        colored = self._colored_levelnames.get(original_levelname)
+        if colored is None:
+            return super().format(record)
 
-        return super().format(record)
+        # 临时替换 levelname，格式化后恢复，避免影响其他处理器
+        record.levelname = colored
+        try:
+            return super().format(record)
+        finally:
+            record.levelname = original_levelname
@@ -4,24 +4,62 @@
 提供各种验证功能的工具函数。
 """
 
+import functools
 import os
 import re
-from typing import List, Dict, Any, Optional
+from typing import (
+    Any,
+    BinaryIO,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+# 预编译的正则表达式
+_API_KEY_RE = re.compile(r"^[a-zA-Z0-9_-]{20,}$")
+_EMAIL_RE = re.compile(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$")
+_URL_RE = re.compile(
+    r"^https?://(?:[-\w.])+(?:[:\d]+)?(?:/(?:[\w/_.])*(?:\?(?:[\w&=%.])*)?(?:#(?:\w*))?)?$"
+)
+_CTRL_RE = re.compile(r"[\x00-\x1f\x7f-\x9f]")
+
+# 列映射中必需的键（保持顺序以便错误信息稳定）
+_REQUIRED_COLUMN_KEYS = (
+    "doc_name_col_index",
+    "question_col_index",
+    "ai_answer_col_index",
+)
+
+# 文件名中不安全字符的替换表
+_UNSAFE_FILENAME_TABLE = str.maketrans({char: "_" for char in '<>:"/\\|?*'})
+
+
+@functools.lru_cache(maxsize=32)
+def _normalize_extensions(extensions: Tuple[str, ...]) -> FrozenSet[str]:
+    """将扩展名列表转换为小写集合（按参数缓存）"""
+    return frozenset(ext.lower() for ext in extensions)
 
 
 class ValidationUtils:
     """验证工具类"""
 
+    # 支持的 Excel 扩展名（小写），可直接传给 is_valid_file_path
+    EXCEL_EXTENSIONS: FrozenSet[str] = frozenset({".xlsx", ".xls"})
+
     @staticmethod
     def is_valid_file_path(
-        file_path: str, extensions: Optional[List[str]] = None
+        file_path: str, extensions: Optional[Iterable[str]] = None
     ) -> bool:
         """
         验证文件路径是否有效
 
         Args:
             file_path: 文件路径
-            extensions: 允许的文件扩展名列表
+            extensions: 允许的文件扩展名（不区分大小写）
 
         Returns:
             bool: 是否有效
@@ -29,15 +67,13 @@ class ValidationUtils:
         if not file_path or not isinstance(file_path, str):
             return False
 
-        if not os.path.isfile(file_path):
-            return False
-
+        # 先做廉价的扩展名检查，再访问文件系统
         if extensions:
             file_ext = os.path.splitext(file_path)[1].lower()
-            if file_ext not in [ext.lower() for ext in extensions]:
+            if file_ext not in _normalize_extensions(tuple(extensions)):
                 return False
 
-        return True
+        return os.path.isfile(file_path)
 
     @staticmethod
     def is_valid_directory_path(dir_path: str) -> bool:
@@ -70,8 +106,7 @@ class ValidationUtils:
             return False
 
         # Gemini API 密钥通常是字母、数字、下划线和连字符的组合，长度至少20个字符
-        pattern = r"^[a-zA-Z0-9_-]{20,}$"
-        return bool(re.match(pattern, api_key))
+        return bool(_API_KEY_RE.match(api_key))
 
     @staticmethod
     def validate_column_mapping(
@@ -93,15 +128,15 @@ class ValidationUtils:
             errors.append("列映射不能为空")
             return errors
 
-        required_keys = [
-            "doc_name_col_index",
-            "question_col_index",
-            "ai_answer_col_index",
-        ]
-        for key in required_keys:
-            if key not in column_mapping:
-                errors.append(f"缺少必需的列映射: {key}")
+        errors.extend(
+            f"缺少必需的列映射: {key}"
+            for key in _REQUIRED_COLUMN_KEYS
+            if key not in column_mapping
+        )
 
+        # 单次遍历同时检查类型、范围和重复索引
+        seen = set()
+        has_duplicate = False
         for key, index in column_mapping.items():
             if not isinstance(index, int):
                 errors.append(f"列索引必须是整数: {key}")
@@ -110,42 +145,51 @@ class ValidationUtils:
                     f"列索引超出范围: {key} = {index} (范围: 0-{total_columns - 1})"
                 )
 
-        # 检查是否有重复的列索引
-        indices = list(column_mapping.values())
-        if len(indices) != len(set(indices)):
+            if index in seen:
+                has_duplicate = True
+            else:
+                seen.add(index)
+
+        if has_duplicate:
             errors.append("列映射中有重复的列索引")
 
         return errors
 
     @staticmethod
-    def validate_excel_file(file_path: str) -> List[str]:
+    def validate_excel_file(file_path: Union[str, BinaryIO]) -> List[str]:
         """
         验证 Excel 文件
 
         Args:
-            file_path: Excel 文件路径
+            file_path: Excel 文件路径，或已打开的 .xlsx 二进制文件对象
 
         Returns:
             List[str]: 错误信息列表，空列表表示验证通过
         """
         errors = []
 
-        if not ValidationUtils.is_valid_file_path(file_path, [".xlsx", ".xls"]):
+        is_path = isinstance(file_path, str)
+        if is_path and not ValidationUtils.is_valid_file_path(
+            file_path, ValidationUtils.EXCEL_EXTENSIONS
+        ):
             errors.append("文件不存在或不是有效的 Excel 文件")
             return errors
 
         try:
-            import pandas as pd
+            if is_path and file_path.lower().endswith(".xls"):
+                # openpyxl 不支持旧版 .xls，仍由 pandas + xlrd 读取
+                import pandas as pd
 
-            # 尝试读取文件
-            try:
-                df = pd.read_excel(file_path, engine="openpyxl")
-            except Exception:
                 df = pd.read_excel(file_path, engine="xlrd")
+                is_empty = df.empty
+                column_count = len(df.columns)
+            else:
+                # 只读模式下仅读取表头和第一行数据，无需加载整个工作表
+                is_empty, column_count = ValidationUtils._peek_xlsx(file_path)
 
-            if df.empty:
+            if is_empty:
                 errors.append("Excel 文件为空")
-            elif len(df.columns) < 3:
+            elif column_count < 3:
                 errors.append(
                     "Excel 文件至少需要包含 3 列（文档名称、问题点、AI客服回答）"
                 )
@@ -155,6 +199,41 @@ class ValidationUtils:
 
         return errors
 
+    @staticmethod
+    def _peek_xlsx(file_path: Union[str, BinaryIO]) -> Tuple[bool, int]:
+        """
+        读取 .xlsx 文件的表头和第一行数据
+
+        Args:
+            file_path: Excel 文件路径或二进制文件对象
+
+        Returns:
+            Tuple[bool, int]: (是否没有数据行, 列数)
+        """
+        from openpyxl import load_workbook
+
+        wb = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            rows = wb.active.iter_rows(max_row=2, values_only=True)
+            header = next(rows, None)
+            first_row = next(rows, None)
+        finally:
+            wb.close()
+
+        def used_width(row) -> int:
+            # 只读模式下行会按工作表尺寸补齐 None，去掉末尾的空单元格
+            if not row:
+                return 0
+            width = len(row)
+            while width and row[width - 1] is None:
+                width -= 1
+            return width
+
+        is_empty = header is None or not any(
+            cell is not None for cell in (first_row or ())
+        )
+        return is_empty, max(used_width(header), used_width(first_row))
+
     @staticmethod
     def validate_knowledge_base_directory(dir_path: str) -> List[str]:
         """
@@ -172,55 +251,112 @@ class ValidationUtils:
             errors.append("目录不存在或无效")
             return errors
 
-        # 检查是否包含 Markdown 文件
-        md_files = []
+        # 检查是否包含 Markdown 文件（找到第一个即可）
         try:
-            for root, dirs, files in os.walk(dir_path):
-                for file in files:
-                    if file.lower().endswith(".md"):
-                        md_files.append(os.path.join(root, file))
+            has_markdown = ValidationUtils._contains_markdown(dir_path)
         except Exception as e:
             errors.append(f"读取目录时出错: {str(e)}")
             return errors
 
-        if not md_files:
+        if not has_markdown:
             errors.append("目录中未找到 Markdown 文件 (.md)")
 
         return errors
 
     @staticmethod
-    def validate_email(email: str) -> bool:
+    def _contains_markdown(dir_path: str) -> bool:
+        """
+        惰性遍历目录，找到第一个 Markdown 文件即返回
+
+        与 os.walk 一致：不进入符号链接目录，跳过无法读取的子目录。
+
+        Args:
+            dir_path: 目录路径
+
+        Returns:
+            bool: 是否包含 .md 文件
+        """
+        pending = [dir_path]
+        while pending:
+            current = pending.pop()
+            try:
+                entries = os.scandir(current)
+            except OSError:
+                if current == dir_path:
+                    raise
+                continue
+
+            with entries:
+                for entry in entries:
+                    if entry.name.lower().endswith(".md") and entry.is_file():
+                        return True
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+
+        return False
+
+    @staticmethod
+    def validate_email(email: str, strict: bool = False) -> bool:
         """
         验证邮箱地址格式
 
         Args:
             email: 邮箱地址
+            strict: 是否使用完整的正则校验
 
         Returns:
             bool: 是否有效
         """
-        if not email:
+        if not email or not isinstance(email, str):
             return False
 
-        pattern = r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$"
-        return bool(re.match(pattern, email))
+        if strict:
+            return bool(_EMAIL_RE.match(email))
+
+        # 快速校验：local@domain.tld，仅允许 ASCII 字符
+        local, at, domain = email.rpartition("@")
+        if not at or not local or not email.isascii():
+            return False
+
+        dot = domain.rfind(".")
+        if dot <= 0 or dot > len(domain) - 3:
+            return False
+
+        return (
+            all(ch.isalnum() or ch in "._%+-" for ch in local)
+            and all(ch.isalnum() or ch in ".-" for ch in domain[:dot])
+            and domain[dot + 1 :].isalpha()
+        )
 
     @staticmethod
-    def validate_url(url: str) -> bool:
+    def validate_url(url: str, strict: bool = False) -> bool:
         """
         验证 URL 格式
 
         Args:
             url: URL 地址
+            strict: 是否使用完整的正则校验
 
         Returns:
             bool: 是否有效
         """
-        if not url:
+        if not url or not isinstance(url, str):
+            return False
+
+        if strict:
+            return bool(_URL_RE.match(url))
+
+        # 快速校验：http(s) 协议、主机部分非空且不含空白字符
+        if url.startswith("https://"):
+            rest = url[8:]
+        elif url.startswith("http://"):
+            rest = url[7:]
+        else:
             return False
 
-        pattern = r"^https?://(?:[-\w.])+(?:[:\d]+)?(?:/(?:[\w/_.])*(?:\?(?:[\w&=%.])*)?(?:#(?:\w*))?)?$"
-        return bool(re.match(pattern, url))
+        return (
+            bool(rest) and rest[0] not in "/?#" and not any(ch.isspace() for ch in rest)
+        )
 
     @staticmethod
     def validate_numeric_range(
@@ -237,10 +373,14 @@ class ValidationUtils:
         Returns:
             bool: 是否在有效范围内
         """
-        try:
-            num_value = float(value)
-        except (ValueError, TypeError):
-            return False
+        # 数值类型直接比较，只有其他类型才需要 float() 转换
+        if isinstance(value, (int, float)):
+            num_value = value
+        else:
+            try:
+                num_value = float(value)
+            except (ValueError, TypeError):
+                return False
 
         if min_val is not None and num_value < min_val:
             return False
@@ -295,7 +435,9 @@ class ValidationUtils:
         missing_fields = []
 
         for field in required_fields:
-            if field not in data or data[field] is None or data[field] == "":
+            # 每个字段只查一次字典；缺失的键与 None 一样由 get 返回 None
+            value = data.get(field)
+            if value is None or value == "":
                 missing_fields.append(field)
 
         return missing_fields
@@ -314,15 +456,11 @@ class ValidationUtils:
         if not filename:
             return "unnamed"
 
-        # 移除或替换不安全字符
-        unsafe_chars = '<>:"/\\|?*'
-        sanitized = filename
-
-        for char in unsafe_chars:
-            sanitized = sanitized.replace(char, "_")
+        # 替换不安全字符（单次遍历）
+        sanitized = filename.translate(_UNSAFE_FILENAME_TABLE)
 
         # 移除控制字符
-        sanitized = re.sub(r"[\x00-\x1f\x7f-\x9f]", "", sanitized)
+        sanitized = _CTRL_RE.sub("", sanitized)
 
         # 移除首尾的空格和点
         sanitized = sanitized.strip(" .")
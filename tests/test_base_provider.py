@@ -38,3 +38,20 @@ def test_base_provider_helpers_and_waiting_indicator():
     stop = threading.Event()
     stop.set()
     provider.show_waiting_indicator(stop)
+
+
+def test_start_waiting_indicator_skipped_without_tty(monkeypatch):
+    provider = DummyProvider()
+    monkeypatch.setattr("sys.stdout.isatty", lambda: False)
+
+    assert provider._start_waiting_indicator(threading.Event()) is None
+
+
+def test_extract_retry_delay_patterns():
+    provider = DummyProvider()
+
+    assert provider._extract_retry_delay("Please TRY AGAIN IN 12s") == 12
+    assert provider._extract_retry_delay("retry in 7 seconds") == 7
+    assert provider._extract_retry_delay("Retry after 30") == 30
+    assert provider._extract_retry_delay("{'retryDelay': '45s'}") == 45
+    assert provider._extract_retry_delay("quota exceeded") is None
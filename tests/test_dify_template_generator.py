@@ -0,0 +1,35 @@
+import os
+
+from openpyxl import load_workbook
+
+from semantic_tester.utils.dify_template_generator import DifyTemplateGenerator
+
+
+def test_generate_all_templates_writes_one_sheet_per_supplier(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    generator = DifyTemplateGenerator()
+
+    filepath = generator.generate_all_templates(["dify", "openai", "gemini"])
+
+    assert filepath is not None
+    assert os.path.dirname(filepath) == "templates"
+    assert (tmp_path / filepath).is_file()
+
+    wb = load_workbook(tmp_path / filepath, read_only=True)
+    try:
+        assert wb.sheetnames == ["dify", "openai", "gemini"]
+        for supplier in wb.sheetnames:
+            header = next(wb[supplier].iter_rows(max_row=1, values_only=True))
+            assert list(header) == generator._build_columns(supplier)
+        assert "Dify响应" in next(wb["dify"].iter_rows(values_only=True))
+        assert "Gemini响应" in next(wb["gemini"].iter_rows(values_only=True))
+    finally:
+        wb.close()
+
+
+def test_generate_all_templates_without_suppliers_writes_nothing(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    generator = DifyTemplateGenerator()
+
+    assert generator.generate_all_templates([]) is None
+    assert os.listdir(tmp_path / "templates") == []
@@ -0,0 +1,237 @@
+from unittest.mock import MagicMock, patch
+
+from main import SemanticTestApp
+from semantic_tester.utils import FileUtils
+
+
+def test_read_document_content_reads_each_document_once(tmp_path):
+    (tmp_path / "a.md").write_text("内容A", encoding="utf-8")
+    (tmp_path / "b.md").write_text("内容B", encoding="utf-8")
+    app = SemanticTestApp(env_manager=MagicMock(), config=MagicMock())
+
+    with patch.object(
+        FileUtils, "read_file_content", wraps=FileUtils.read_file_content
+    ) as mock_read:
+        for _ in range(3):
+            assert app._read_document_content(str(tmp_path), "a") == "内容A"
+            assert app._read_document_content(str(tmp_path), "b.md") == "内容B"
+
+    assert mock_read.call_count == 2
+
+
+def test_read_document_content_missing_doc_falls_back_to_folder(tmp_path):
+    (tmp_path / "a.md").write_text("内容A", encoding="utf-8")
+    app = SemanticTestApp(env_manager=MagicMock(), config=MagicMock())
+
+    content = app._read_document_content(str(tmp_path), "missing")
+
+    assert content is not None and "内容A" in content
+
+
+def test_group_rows_for_batch_by_document():
+    app = SemanticTestApp(env_manager=MagicMock(), config=MagicMock())
+    processor = MagicMock()
+    docs = ["a", "b", "a", "a", "b"]
+    processor.get_doc_names.side_effect = lambda rows, _: [docs[i] for i in rows]
+
+    assert app._group_rows_for_batch(processor, [0, 1, 2], {}, 1) == [[0], [1], [2]]
+    assert app._group_rows_for_batch(processor, list(range(5)), {}, 2) == [
+        [0, 2],
+        [3],
+        [1, 4],
+    ]
+    assert app._group_rows_for_batch(
+        processor, list(range(5)), {}, 4, use_full_doc_match=True
+    ) == [[0, 1, 2, 3], [4]]
+
+
+def test_duplicate_rows_reuse_result(tmp_path):
+    import pandas as pd
+
+    from semantic_tester.excel.processor import ExcelProcessor
+
+    (tmp_path / "a.md").write_text("内容A", encoding="utf-8")
+    app = SemanticTestApp(env_manager=MagicMock(), config=MagicMock())
+    processor = ExcelProcessor("unused.xlsx")
+    processor.df = pd.DataFrame(
+        {"doc": ["a", "a"], "q": ["问题", "问题"], "a": ["回答", "回答"]}
+    )
+    result_columns = {"similarity_result": ("结果", 3), "reason": ("原因", 4)}
+    processor.setup_result_columns(result_columns)
+    mapping = {
+        "doc_name_col_index": 0,
+        "question_col_index": 1,
+        "ai_answer_col_index": 2,
+    }
+
+    with patch.object(
+        app, "_call_semantic_api", return_value=("是", "一致")
+    ) as mock_call:
+        for row in (0, 1):
+            assert (
+                app._process_single_row(
+                    row_index=row,
+                    total_records=2,
+                    knowledge_base_dir=str(tmp_path),
+                    column_mapping=mapping,
+                    result_columns=result_columns,
+                    output_path=str(tmp_path / "out.xlsx"),
+                    show_comparison_result=False,
+                    excel_processor=processor,
+                    quiet=True,
+                )
+                == "processed"
+            )
+
+    assert mock_call.call_count == 1
+    assert processor.get_result(1, "结果") == "是"
+    assert processor.get_result(1, "原因") == "一致"
+
+
+def _single_row_setup(tmp_path):
+    import pandas as pd
+
+    from semantic_tester.excel.processor import ExcelProcessor
+
+    (tmp_path / "a.md").write_text("内容A", encoding="utf-8")
+    app = SemanticTestApp(env_manager=MagicMock(), config=MagicMock())
+    processor = ExcelProcessor("unused.xlsx")
+    processor.df = pd.DataFrame({"doc": ["a"], "q": ["问题"], "a": ["回答"]})
+    result_columns = {"similarity_result": ("结果", 3), "reason": ("原因", 4)}
+    processor.setup_result_columns(result_columns)
+    kwargs = dict(
+        row_index=0,
+        total_records=1,
+        knowledge_base_dir=str(tmp_path),
+        column_mapping={
+            "doc_name_col_index": 0,
+            "question_col_index": 1,
+            "ai_answer_col_index": 2,
+        },
+        result_columns=result_columns,
+        output_path=str(tmp_path / "out.xlsx"),
+        show_comparison_result=False,
+        excel_processor=processor,
+        quiet=True,
+    )
+    return app, processor, kwargs
+
+
+def test_process_single_row_recovers_from_api_exception(tmp_path):
+    from semantic_tester.api.base_provider import shutdown_event
+
+    app, processor, kwargs = _single_row_setup(tmp_path)
+
+    with patch.object(
+        app,
+        "_call_semantic_api",
+        side_effect=[ConnectionError("boom"), ("是", "一致")],
+    ), patch.object(shutdown_event, "wait", return_value=False) as mock_wait:
+        status = app._process_single_row(**kwargs)
+
+    assert status == "processed"
+    mock_wait.assert_called_once_with(1)
+    assert processor.get_result(0, "结果") == "是"
+
+
+def test_process_single_row_interrupted_leaves_row_pending(tmp_path):
+    from semantic_tester.api.base_provider import shutdown_event
+
+    app, processor, kwargs = _single_row_setup(tmp_path)
+
+    with patch.object(
+        app, "_call_semantic_api", side_effect=ConnectionError("boom")
+    ), patch.object(shutdown_event, "wait", return_value=True):
+        status = app._process_single_row(**kwargs)
+
+    # 中断时不写入"错误"，该行在下次运行时仍待处理
+    assert status == "interrupted"
+    assert processor.get_pending_rows(kwargs["result_columns"]) == [0]
+
+
+def test_process_row_group_falls_back_to_single_rows_and_honours_stop(tmp_path):
+    import threading
+
+    app, processor, kwargs = _single_row_setup(tmp_path)
+    row_kwargs = {
+        key: kwargs[key]
+        for key in (
+            "total_records",
+            "knowledge_base_dir",
+            "column_mapping",
+            "result_columns",
+            "output_path",
+            "excel_processor",
+        )
+    }
+    row_kwargs["use_full_doc_match"] = False
+    provider = MagicMock()
+    provider.name, provider.id = "p", "p"
+    ui = MagicMock()
+    on_row_done = MagicMock()
+    stop_event = threading.Event()
+
+    # 批量比对抛出异常时不影响工作线程，逐条处理每一行
+    with patch.object(
+        app, "_process_row_batch", side_effect=RuntimeError("boom")
+    ), patch.object(app, "_process_single_row", return_value="error") as mock_single:
+        app._process_row_group(
+            provider, [0, 0], ui, stop_event, on_row_done, row_kwargs
+        )
+    assert mock_single.call_count == 2
+    assert on_row_done.call_count == 2
+    ui.increment_progress.assert_called_with("error")
+
+    # 收到停止信号后不再处理组内剩余的行
+    stop_event.set()
+    with patch.object(app, "_process_single_row") as mock_single:
+        app._process_row_group(
+            provider, [0, 0], ui, stop_event, on_row_done, row_kwargs
+        )
+    mock_single.assert_not_called()
+
+
+def test_result_writer_loop_merges_backlog_and_drains_before_exit():
+    import queue
+
+    processor = MagicMock()
+    save_queue = queue.Queue()
+    for item in (10, 20, None):
+        save_queue.put(item)
+
+    # 停止信号之前积压的保存请求合并为一次保存，然后退出
+    SemanticTestApp._result_writer_loop(save_queue, processor, "out.xlsx")
+
+    processor.save_intermediate_results.assert_called_once_with("out.xlsx", 20)
+    assert save_queue.empty()
+
+
+def test_join_worker_threads_gives_up_on_stuck_worker():
+    import threading
+    import time
+
+    from semantic_tester.api.base_provider import reset_shutdown, shutdown_event
+
+    release = threading.Event()
+    stuck = threading.Thread(target=release.wait, daemon=True)
+    done = threading.Thread(target=lambda: None, daemon=True)
+    stuck.start()
+    done.start()
+    stop_event = threading.Event()
+
+    # 阻塞在网络请求中的线程不会让保存流程无限期等待
+    start = time.monotonic()
+    alive = SemanticTestApp._join_worker_threads([stuck, done], stop_event, 0.2)
+    assert time.monotonic() - start < 2
+    assert alive == [stuck]
+    assert not stop_event.is_set()
+
+    # 等待期间再次中断：立即停止等待并发出停止信号
+    with patch.object(stuck, "join", side_effect=KeyboardInterrupt):
+        try:
+            alive = SemanticTestApp._join_worker_threads([stuck], stop_event, 60)
+            assert alive == [stuck]
+            assert stop_event.is_set() and shutdown_event.is_set()
+        finally:
+            reset_shutdown()
+            release.set()
@@ -4,6 +4,8 @@ import pytest
 
 from semantic_tester.config import environment as env_mod
 
+_TRUTHY = frozenset({"true", "1", "yes", "on"})
+
 
 class DummyLoader:
     def __init__(self, cfg: dict):
@@ -19,12 +21,10 @@ class DummyLoader:
         return int(self._cfg.get(key, default))
 
     def get_bool(self, key: str, default: bool = False) -> bool:
-        return str(self._cfg.get(key, str(default))).lower() in (
-            "true",
-            "1",
-            "yes",
-            "on",
-        )
+        value = self._cfg.get(key, default)
+        if isinstance(value, bool):
+            return value
+        return str(value).lower() in _TRUTHY
 
     def get_list(self, key: str, default=None, separator=","):
         if default is None:
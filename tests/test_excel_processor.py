@@ -1,13 +1,15 @@
+import io
 import os
-import tempfile
+from pathlib import Path
 
+import numpy as np
 import pandas as pd
 
 from semantic_tester.excel.processor import ExcelProcessor
 
 
-def _create_dify_like_excel(path: str) -> None:
-    """Create a minimal Dify Chat Tester like Excel file for testing."""
+def _build_dify_like_xlsx() -> bytes:
+    """Serialize a minimal Dify Chat Tester like Excel file once."""
     df = pd.DataFrame(
         {
             "时间戳": ["2025-01-01 00:00:00"],
@@ -16,89 +18,300 @@ def _create_dify_like_excel(path: str) -> None:
             "是否成功": ["是"],
         }
     )
-    df.to_excel(path, index=False)
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
+        df.to_excel(writer, index=False)
+    return buffer.getvalue()
+
+
+_DIFY_LIKE_XLSX = _build_dify_like_xlsx()
+
+
+def _create_dify_like_excel(path: str) -> None:
+    """Create a minimal Dify Chat Tester like Excel file for testing."""
+    Path(path).write_bytes(_DIFY_LIKE_XLSX)
 
 
-def test_excel_processor_dify_format_end_to_end():
+def test_excel_processor_dify_format_end_to_end(tmp_path, monkeypatch):
     """Exercise主要非交互路径：加载->检测格式->自动映射->读写结果->断点续传。"""
 
-    with tempfile.TemporaryDirectory() as tmpdir:
-        excel_path = os.path.join(tmpdir, "dify.xlsx")
-        _create_dify_like_excel(excel_path)
+    tmpdir = str(tmp_path)
+    excel_path = os.path.join(tmpdir, "dify.xlsx")
+    _create_dify_like_excel(excel_path)
 
-        processor = ExcelProcessor(excel_path)
+    processor = ExcelProcessor(excel_path)
 
-        # 基础信息
-        assert processor.validate_file_exists() is True
-        assert processor.get_total_records() == 0
+    # 基础信息
+    assert processor.validate_file_exists() is True
+    assert processor.get_total_records() == 0
 
-        # 加载 Excel
-        assert processor.load_excel() is True
-        assert processor.get_total_records() == 1
-        assert "原始问题" in processor.column_names
+    # 加载 Excel
+    assert processor.load_excel() is True
+    assert processor.get_total_records() == 1
+    assert "原始问题" in processor.column_names
 
-        # 检测格式，应识别为 Dify 格式
-        fmt = processor.detect_format()
-        assert fmt["is_dify_format"] is True
-        assert fmt["question_col"] == "原始问题"
-        assert fmt["response_cols"] == ["Dify响应"]
+    # 检测格式，应识别为 Dify 格式
+    fmt = processor.detect_format()
+    assert fmt["is_dify_format"] is True
+    assert fmt["question_col"] == "原始问题"
+    assert fmt["response_cols"] == ["Dify响应"]
 
-        # 显示格式信息（主要是打印，不抛异常即可）
-        processor.display_format_info()
+    # 显示格式信息（主要是打印，不抛异常即可）
+    processor.display_format_info()
 
-        # 自动添加文档名称列
-        processor.auto_add_document_column()
-        assert "文档名称" in processor.column_names
+    # 自动添加文档名称列
+    processor.auto_add_document_column()
+    assert "文档名称" in processor.column_names
 
-        # 自动列映射
-        column_mapping = processor.get_user_column_mapping(auto_config=True)
-        assert set(column_mapping.keys()) == {
-            "doc_name_col_index",
-            "question_col_index",
-            "ai_answer_col_index",
-        }
+    # 自动列映射
+    column_mapping = processor.get_user_column_mapping(auto_config=True)
+    assert set(column_mapping.keys()) == {
+        "doc_name_col_index",
+        "question_col_index",
+        "ai_answer_col_index",
+    }
 
-        # 结果列配置（自动模式）
-        result_columns = processor.get_result_columns(auto_config=True)
-        assert set(result_columns.keys()) == {"similarity_result", "reason"}
+    # 结果列配置（自动模式）
+    result_columns = processor.get_result_columns(auto_config=True)
+    assert set(result_columns.keys()) == {"similarity_result", "reason"}
 
-        # 设置结果列 dtype
-        processor.setup_result_columns(result_columns)
+    # 设置结果列 dtype
+    processor.setup_result_columns(result_columns)
 
-        # 读取行数据
-        row_data = processor.get_row_data(0, column_mapping)
-        assert row_data["question"] == "今天天气怎么样？"
-        assert row_data["ai_answer"] == "今天天气很好。"
+    # 读取行数据
+    row_data = processor.get_row_data(0, column_mapping)
+    assert row_data["question"] == "今天天气怎么样？"
+    assert row_data["ai_answer"] == "今天天气很好。"
 
-        # 写入结果并检查 has_result / get_result
-        processor.save_result(0, "是", "回答与文档一致", result_columns)
-        assert processor.has_result(0, result_columns) is True
+    # 写入结果并检查 has_result / get_result
+    processor.save_result(0, "是", "回答与文档一致", result_columns)
+    assert processor.has_result(0, result_columns) is True
 
-        sim_col_name = result_columns["similarity_result"][0]
-        assert processor.get_result(0, sim_col_name) == "是"
+    sim_col_name = result_columns["similarity_result"][0]
+    assert processor.get_result(0, sim_col_name) == "是"
 
-        # 保存中间结果和最终结果
-        intermediate_path = os.path.join(tmpdir, "intermediate.xlsx")
-        final_path = os.path.join(tmpdir, "final.xlsx")
+    # 保存中间结果和最终结果
+    intermediate_path = os.path.join(tmpdir, "intermediate.xlsx")
+    final_path = os.path.join(tmpdir, "final.xlsx")
 
+    # 中间结果与最终结果走同一个写入函数，这里只捕获快照，省去一次 xlsx 序列化
+    written = {}
+    with monkeypatch.context() as mp:
+        mp.setattr(
+            ExcelProcessor,
+            "_write_excel_atomic",
+            staticmethod(lambda df, path: written.__setitem__(path, df)),
+        )
         processor.save_intermediate_results(intermediate_path, processed_count=1)
-        assert os.path.exists(intermediate_path)
-
-        processor.save_final_results(final_path)
-        assert os.path.exists(final_path)
-
-        # 断点续传：从已有结果文件加载结果
-        processor2 = ExcelProcessor(excel_path)
-        assert processor2.load_excel() is True
-        processor2.detect_format()
-        processor2.auto_add_document_column()
-        column_mapping2 = processor2.get_user_column_mapping(auto_config=True)
-        result_columns2 = processor2.get_result_columns(auto_config=True)
-
-        loaded = processor2.load_existing_results(final_path, result_columns2)
-        assert loaded == 1
-        assert processor2.has_result(0, result_columns2) is True
-
-        # get_result 在第二个处理器上同样可用
-        sim_col_name2 = result_columns2["similarity_result"][0]
-        assert processor2.get_result(0, sim_col_name2) == "是"
+    assert list(written) == [intermediate_path]
+    assert written[intermediate_path].at[0, sim_col_name] == "是"
+
+    processor.save_final_results(final_path)
+    assert os.path.exists(final_path)
+
+    # 断点续传：从已有结果文件加载结果
+    processor2 = ExcelProcessor(excel_path)
+    assert processor2.load_excel() is True
+    processor2.detect_format()
+    processor2.auto_add_document_column()
+    column_mapping2 = processor2.get_user_column_mapping(auto_config=True)
+    result_columns2 = processor2.get_result_columns(auto_config=True)
+
+    loaded = processor2.load_existing_results(final_path, result_columns2)
+    assert loaded == 1
+    assert processor2.has_result(0, result_columns2) is True
+
+    # get_result 在第二个处理器上同样可用
+    sim_col_name2 = result_columns2["similarity_result"][0]
+    assert processor2.get_result(0, sim_col_name2) == "是"
+
+
+def test_save_intermediate_results_writes_outside_lock(monkeypatch, tmp_path):
+    """写入中间结果时不持有锁，工作线程可以继续保存结果"""
+    processor = ExcelProcessor("unused.xlsx")
+    processor.df = pd.DataFrame({"a": [1, 2]})
+
+    lock_held = []
+
+    def fake_to_excel(self, path, index=False):
+        lock_held.append(processor._lock.locked())
+        open(path, "w").close()
+
+    monkeypatch.setattr(pd.DataFrame, "to_excel", fake_to_excel)
+    processor.save_intermediate_results(str(tmp_path / "out.xlsx"), processed_count=2)
+
+    assert lock_held == [False]
+    # 临时文件已原子替换为目标文件
+    assert os.listdir(tmp_path) == ["out.xlsx"]
+
+
+def test_result_journal_roundtrip(tmp_path):
+    """结果日志可在中断后恢复未写入 Excel 的结果"""
+    result_columns = {"similarity_result": ("结果", 2), "reason": ("原因", 3)}
+    journal_path = str(tmp_path / "out.xlsx.journal.jsonl")
+
+    processor = ExcelProcessor("unused.xlsx")
+    processor.df = pd.DataFrame({"q": ["a", "b", "c"], "结果": None, "原因": None})
+    processor.open_result_journal(journal_path)
+    processor.save_result(0, "是", "一致", result_columns)
+    processor.save_result(2, "否", "不符", result_columns)
+    processor.close_result_journal()
+
+    # 模拟中断时写了一半的最后一行
+    with open(journal_path, "a", encoding="utf-8") as f:
+        f.write('{"row": 1, "res')
+
+    restored = ExcelProcessor("unused.xlsx")
+    restored.df = pd.DataFrame({"q": ["a", "b", "c"], "结果": None, "原因": None})
+    assert restored.replay_result_journal(journal_path, result_columns) == 2
+    assert restored.has_result(0, result_columns)
+    assert not restored.has_result(1, result_columns)
+    assert restored.get_result(2, "原因") == "不符"
+
+    processor.open_result_journal(journal_path)
+    processor.close_result_journal(remove=True)
+    assert not os.path.exists(journal_path)
+
+
+def test_get_row_data_and_pending_rows():
+    result_columns = {"similarity_result": ("结果", 3), "reason": ("原因", 4)}
+    processor = ExcelProcessor("unused.xlsx")
+    processor.df = pd.DataFrame(
+        {
+            "doc": ["a.md", None, "c.md"],
+            "q": [" 问题1 ", "问题2", None],
+            "a": ["回答1", None, "回答3"],
+            "结果": ["是", "  ", None],
+            "原因": ["ok", None, None],
+        }
+    )
+    mapping = {
+        "doc_name_col_index": 0,
+        "question_col_index": 1,
+        "ai_answer_col_index": 2,
+    }
+
+    assert processor.get_row_data(0, mapping) == {
+        "doc_name": "a.md",
+        "question": "问题1",
+        "ai_answer": "回答1",
+    }
+    assert processor.get_row_data(1, mapping) == {
+        "doc_name": "未知文档",
+        "question": "问题2",
+        "ai_answer": "",
+    }
+
+    pending = processor.get_pending_rows(result_columns)
+    assert pending == [1, 2]
+    assert pending == [
+        i for i in range(3) if not processor.has_result(i, result_columns)
+    ]
+
+
+def test_mark_empty_rows_matches_row_validation():
+    from semantic_tester.utils import ValidationUtils
+
+    result_columns = {"similarity_result": ("结果", 3), "reason": ("原因", 4)}
+    processor = ExcelProcessor("unused.xlsx")
+    processor.df = pd.DataFrame(
+        {
+            "doc": ["a.md", "b.md", "c.md", "d.md"],
+            "q": ["问题1", "  ", None, "问题4"],
+            "a": ["回答1", "回答2", None, ""],
+            "结果": None,
+            "原因": None,
+        }
+    )
+    mapping = {
+        "doc_name_col_index": 0,
+        "question_col_index": 1,
+        "ai_answer_col_index": 2,
+    }
+
+    skipped = processor.mark_empty_rows([0, 1, 2, 3], mapping, result_columns)
+
+    assert skipped == [1, 2, 3]
+    assert processor.get_result(0, "结果") == ""
+    for row in skipped:
+        expected = "; ".join(
+            ValidationUtils.validate_row_data(processor.get_row_data(row, mapping))
+        )
+        assert processor.get_result(row, "结果") == "跳过"
+        assert processor.get_result(row, "原因") == expected
+
+
+def test_get_doc_names_matches_get_row_data():
+    processor = ExcelProcessor("unused.xlsx")
+    processor.df = pd.DataFrame(
+        {"doc": [" a.md ", None, 3, ""], "q": ["q"] * 4, "a": ["a"] * 4}
+    )
+    mapping = {
+        "doc_name_col_index": 0,
+        "question_col_index": 1,
+        "ai_answer_col_index": 2,
+    }
+
+    rows = [3, 0, 1, 2]
+    assert processor.get_doc_names(rows, mapping) == [
+        processor.get_row_data(row, mapping)["doc_name"] for row in rows
+    ]
+    assert (
+        processor.get_doc_names(rows, {**mapping, "doc_name_col_index": -1})
+        == ["未知文档"] * 4
+    )
+
+
+def test_large_sheet_written_values_only(monkeypatch, tmp_path):
+    from semantic_tester.excel import processor as processor_module
+
+    monkeypatch.setattr(processor_module, "_FAST_WRITE_MIN_ROWS", 2)
+    monkeypatch.setattr(processor_module, "_HAS_XLSXWRITER", False)
+    df = pd.DataFrame(
+        {"q": ["a", "b", "c"], "结果": ["是", None, "否"], "n": [1, 2, 3]}
+    )
+    output_path = str(tmp_path / "out.xlsx")
+
+    ExcelProcessor._write_excel_atomic(df, output_path)
+
+    pd.testing.assert_frame_equal(pd.read_excel(output_path), df)
+    assert os.listdir(tmp_path) == ["out.xlsx"]
+
+
+def test_prepare_row_data_matches_per_cell_reads():
+    processor = ExcelProcessor("unused.xlsx")
+    processor.df = pd.DataFrame(
+        {
+            "doc": [" a.md ", None, 3],
+            "q": [" 问题1 ", None, 2.5],
+            "a": ["回答", "", None],
+        }
+    )
+    mapping = {
+        "doc_name_col_index": 0,
+        "question_col_index": 1,
+        "ai_answer_col_index": 2,
+    }
+    expected = [processor.get_row_data(row, mapping) for row in range(3)]
+
+    processor.prepare_row_data(mapping)
+
+    assert [processor.get_row_data(row, mapping) for row in range(3)] == expected
+    # 列映射不同时回退到逐格读取
+    swapped = {**mapping, "question_col_index": 2, "ai_answer_col_index": 1}
+    assert processor.get_row_data(0, swapped)["question"] == "回答"
+
+
+def test_setup_result_columns_converts_only_non_object_columns():
+    result_columns = {"similarity_result": ("结果", -1), "reason": ("原因", -1)}
+    processor = ExcelProcessor("unused.xlsx")
+    processor.df = pd.DataFrame(
+        {"q": ["a", "b"], "原因": ["x", "y"], "结果": [1.0, None]}
+    )
+    reason_values = processor.df["原因"].to_numpy()
+
+    processor.setup_result_columns(result_columns)
+
+    assert processor.df["结果"].dtype == object
+    # 已是 object 的列不再复制
+    assert np.shares_memory(processor.df["原因"].to_numpy(), reason_values)
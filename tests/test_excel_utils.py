@@ -1,3 +1,4 @@
+import pytest
 from openpyxl import Workbook
 
 from semantic_tester.excel.utils import (
@@ -5,13 +6,30 @@ from semantic_tester.excel.utils import (
     get_column_index,
     get_or_add_column,
 )
-import pandas as pd
 
 
-def test_write_cell_safely_handles_merged_cells():
-    wb = Workbook()
-    ws = wb.active
+class FakeDF:
+    """get_or_add_column 只用到列赋值，用轻量替身代替 DataFrame"""
 
+    def __init__(self, columns):
+        self.columns = list(columns)
+
+    def __setitem__(self, key, value):
+        self.columns.append(key)
+
+
+@pytest.fixture(scope="module")
+def wb():
+    return Workbook()
+
+
+@pytest.fixture
+def ws(wb):
+    # 每个用例使用新的工作表，共享同一个 Workbook
+    return wb.create_sheet()
+
+
+def test_write_cell_safely_handles_merged_cells(ws):
     # 合并 A1:C1，并向中间单元格写值，应写到左上角 A1
     ws.merge_cells("A1:C1")
 
@@ -35,7 +53,7 @@ def test_get_column_index_and_get_or_add_column():
     assert get_column_index(cols, "B") == 1
     assert get_column_index(cols, "X") == -1
 
-    df = pd.DataFrame({"A": [1], "B": [2]})
+    df = FakeDF(["A", "B"])
     col_names = list(df.columns)
 
     # 选择已有列
@@ -51,3 +69,19 @@ def test_get_column_index_and_get_or_add_column():
     idx_name = get_or_add_column(df, col_names, "result")
     assert col_names[idx_name] == "result"
     assert "result" in df.columns
+
+    # 新增后的列可立即按列名查到；同名列取第一个
+    assert get_or_add_column(df, col_names, "result") == idx_name
+    assert get_column_index(["A", "B", "A"], "A") == 0
+
+
+def test_write_cell_safely_tracks_merge_changes(ws):
+    ws.merge_cells("A1:B2")
+    write_cell_safely(ws, 2, 2, "first")  # B2 -> A1
+    assert ws["A1"].value == "first"
+
+    # 合并区域变化后重新定位左上角
+    ws.unmerge_cells("A1:B2")
+    ws.merge_cells("B2:C3")
+    write_cell_safely(ws, 3, 3, "second")  # C3 -> B2
+    assert ws["B2"].value == "second"
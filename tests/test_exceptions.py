@@ -63,30 +63,21 @@ class TestExceptions:
 class TestFriendlyErrorMessage:
     """测试友好错误消息转换"""
 
-    def test_auth_error_401(self):
-        """测试 401 认证错误"""
-        msg = friendly_error_message("Error", status_code=401)
-        assert "认证失败" in msg
-
-    def test_rate_limit_error_429(self):
-        """测试 429 速率限制"""
-        msg = friendly_error_message("Error", status_code=429)
-        assert "频率限制" in msg
-
-    def test_server_error_500(self):
-        """测试服务端错误"""
-        msg = friendly_error_message("Error", status_code=500)
-        assert "服务端错误" in msg
-
-    def test_network_error_timeout(self):
-        """测试超时错误"""
-        msg = friendly_error_message("read timed out")
-        assert "无法连接" in msg
-
-    def test_ssl_error(self):
-        """测试 SSL 错误"""
-        msg = friendly_error_message("ssl certificate_verify_failed")
-        assert "SSL" in msg
+    @pytest.mark.parametrize(
+        "message,status_code,needle",
+        [
+            ("Error", 401, "认证失败"),
+            ("Error", 429, "频率限制"),
+            ("Error", 500, "服务端错误"),
+            ("read timed out", None, "无法连接"),
+            ("ssl certificate_verify_failed", None, "SSL"),
+        ],
+        ids=["auth_401", "rate_limit_429", "server_500", "timeout", "ssl"],
+    )
+    def test_known_errors(self, message, status_code, needle):
+        """测试常见错误（认证、限流、服务端、超时、SSL）的友好提示"""
+        msg = friendly_error_message(message, status_code=status_code)
+        assert needle in msg
 
     def test_unknown_error_passthrough(self):
         """测试未知错误原样返回"""
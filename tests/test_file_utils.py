@@ -1,42 +1,41 @@
 import os
-import tempfile
 
 from semantic_tester.utils.file_utils import FileUtils
 
 
-def test_ensure_directory_exists_creates_and_reports_true():
-    with tempfile.TemporaryDirectory() as tmpdir:
-        target_dir = os.path.join(tmpdir, "subdir")
-        assert not os.path.exists(target_dir)
+def test_ensure_directory_exists_creates_and_reports_true(tmp_path):
+    tmpdir = str(tmp_path)
+    target_dir = os.path.join(tmpdir, "subdir")
+    assert not os.path.exists(target_dir)
 
-        ok = FileUtils.ensure_directory_exists(target_dir)
+    ok = FileUtils.ensure_directory_exists(target_dir)
 
-        assert ok is True
-        assert os.path.isdir(target_dir)
+    assert ok is True
+    assert os.path.isdir(target_dir)
 
 
 def test_ensure_directory_exists_invalid_dir_returns_false():
     assert FileUtils.ensure_directory_exists("") is False
 
 
-def test_find_markdown_files_recursive_and_non_recursive():
-    with tempfile.TemporaryDirectory() as tmpdir:
-        # Create directory structure
-        root_md = os.path.join(tmpdir, "root.md")
-        subdir = os.path.join(tmpdir, "sub")
-        os.makedirs(subdir)
-        sub_md = os.path.join(subdir, "sub.md")
-        other = os.path.join(subdir, "file.txt")
+def test_find_markdown_files_recursive_and_non_recursive(tmp_path):
+    tmpdir = str(tmp_path)
+    # Create directory structure
+    root_md = os.path.join(tmpdir, "root.md")
+    subdir = os.path.join(tmpdir, "sub")
+    os.makedirs(subdir)
+    sub_md = os.path.join(subdir, "sub.md")
+    other = os.path.join(subdir, "file.txt")
 
-        for path in (root_md, sub_md, other):
-            with open(path, "w", encoding="utf-8") as f:
-                f.write("x")
+    for path in (root_md, sub_md, other):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("x")
 
-        recursive = FileUtils.find_markdown_files(tmpdir, recursive=True)
-        non_recursive = FileUtils.find_markdown_files(tmpdir, recursive=False)
+    recursive = FileUtils.find_markdown_files(tmpdir, recursive=True)
+    non_recursive = FileUtils.find_markdown_files(tmpdir, recursive=False)
 
-        assert set(map(os.path.basename, recursive)) == {"root.md", "sub.md"}
-        assert set(map(os.path.basename, non_recursive)) == {"root.md"}
+    assert set(map(os.path.basename, recursive)) == {"root.md", "sub.md"}
+    assert set(map(os.path.basename, non_recursive)) == {"root.md"}
 
 
 def test_find_markdown_files_on_missing_dir_returns_empty():
@@ -44,14 +43,14 @@ def test_find_markdown_files_on_missing_dir_returns_empty():
     assert files == []
 
 
-def test_read_file_content_success_and_missing():
-    with tempfile.TemporaryDirectory() as tmpdir:
-        path = os.path.join(tmpdir, "a.txt")
-        with open(path, "w", encoding="utf-8") as f:
-            f.write("hello")
+def test_read_file_content_success_and_missing(tmp_path):
+    tmpdir = str(tmp_path)
+    path = os.path.join(tmpdir, "a.txt")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("hello")
 
-        assert FileUtils.read_file_content(path) == "hello"
-        assert FileUtils.read_file_content(os.path.join(tmpdir, "missing.txt")) is None
+    assert FileUtils.read_file_content(path) == "hello"
+    assert FileUtils.read_file_content(os.path.join(tmpdir, "missing.txt")) is None
 
 
 def test_read_file_content_decoding_error_returns_none(tmp_path):
@@ -62,82 +61,114 @@ def test_read_file_content_decoding_error_returns_none(tmp_path):
     assert FileUtils.read_file_content(str(path)) is None
 
 
-def test_find_file_by_name_direct_and_recursive():
-    with tempfile.TemporaryDirectory() as tmpdir:
-        subdir = os.path.join(tmpdir, "sub")
-        os.makedirs(subdir)
-        target = os.path.join(subdir, "target.md")
-        with open(target, "w", encoding="utf-8"):
-            pass
+def test_read_file_content_normalizes_newlines_like_text_mode(tmp_path):
+    path = tmp_path / "crlf.md"
+    path.write_bytes("第一行\r\n第二行\r第三行\n".encode("utf-8"))
+
+    with open(path, "r", encoding="utf-8") as f:
+        expected = f.read()
+
+    assert (
+        FileUtils.read_file_content(str(path)) == expected == "第一行\n第二行\n第三行\n"
+    )
+
+
+def test_find_file_by_name_direct_and_recursive(tmp_path):
+    tmpdir = str(tmp_path)
+    subdir = os.path.join(tmpdir, "sub")
+    os.makedirs(subdir)
+    target = os.path.join(subdir, "target.md")
+    with open(target, "w", encoding="utf-8"):
+        pass
 
-        # Direct path must match exact filename in root
-        assert FileUtils.find_file_by_name(tmpdir, "target.md", recursive=False) is None
+    # Direct path must match exact filename in root
+    assert FileUtils.find_file_by_name(tmpdir, "target.md", recursive=False) is None
 
-        found = FileUtils.find_file_by_name(tmpdir, "target.md", recursive=True)
-        assert os.path.abspath(found) == os.path.abspath(target)
+    found = FileUtils.find_file_by_name(tmpdir, "target.md", recursive=True)
+    assert os.path.abspath(found) == os.path.abspath(target)
 
 
 def test_find_file_by_name_missing_directory_returns_none():
     assert FileUtils.find_file_by_name("/no/such/dir", "a.txt", recursive=True) is None
 
 
-def test_get_and_format_file_size(monkeypatch):
-    with tempfile.TemporaryDirectory() as tmpdir:
-        path = os.path.join(tmpdir, "a.bin")
-        data = b"1234567890"  # 10 bytes
-        with open(path, "wb") as f:
-            f.write(data)
+def test_get_and_format_file_size(monkeypatch, tmp_path):
+    tmpdir = str(tmp_path)
+    path = os.path.join(tmpdir, "a.bin")
+    data = b"1234567890"  # 10 bytes
+    with open(path, "wb") as f:
+        f.write(data)
 
-        size = FileUtils.get_file_size(path)
-        assert size == len(data)
-        assert FileUtils.get_file_size(os.path.join(tmpdir, "none")) == 0
+    size = FileUtils.get_file_size(path)
+    assert size == len(data)
+    assert FileUtils.get_file_size(os.path.join(tmpdir, "none")) == 0
 
-        # Just ensure formatting returns a non-empty human readable string
-        formatted = FileUtils.format_file_size(size)
-        assert formatted.endswith("B")
+    # Just ensure formatting returns a non-empty human readable string
+    formatted = FileUtils.format_file_size(size)
+    assert formatted.endswith("B")
 
-        # get_file_size 在底层 os.path.getsize 抛异常时应返回 0
-        def bad_getsize(_path):  # type: ignore[unused-argument]
-            raise OSError("boom")
+    # 目录不是普通文件，应返回 0
+    assert FileUtils.get_file_size(tmpdir) == 0
 
-        monkeypatch.setattr(
-            "semantic_tester.utils.file_utils.os.path.getsize",
-            bad_getsize,
-        )
-        assert FileUtils.get_file_size(path) == 0
+    # get_file_size 在底层 os.stat 抛异常时应返回 0
+    def bad_stat(_path):  # type: ignore[unused-argument]
+        raise OSError("boom")
+
+    monkeypatch.setattr(
+        "semantic_tester.utils.file_utils.os.stat",
+        bad_stat,
+    )
+    assert FileUtils.get_file_size(path) == 0
 
 
 def test_format_file_size_zero():
     assert FileUtils.format_file_size(0) == "0 B"
 
 
-def test_backup_file_and_safe_filename_and_relative_path(monkeypatch):
-    with tempfile.TemporaryDirectory() as tmpdir:
-        path = os.path.join(tmpdir, "a.txt")
-        with open(path, "w", encoding="utf-8") as f:
-            f.write("data")
+def test_backup_file_and_safe_filename_and_relative_path(monkeypatch, tmp_path):
+    tmpdir = str(tmp_path)
+    path = os.path.join(tmpdir, "a.txt")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("data")
+
+    assert FileUtils.backup_file(path) is True
+
+    # 备份不存在的文件返回 False
+    missing = os.path.join(tmpdir, "missing.txt")
+    assert FileUtils.backup_file(missing) is False
+
+    safe = FileUtils.safe_filename("a<>:/\\|?* .txt")
+    # Illegal characters should be removed/replaced and name should be non-empty
+    assert "<" not in safe and ">" not in safe
+    assert "?" not in safe and "*" not in safe
+    assert safe  # non-empty
+
+    rel = FileUtils.get_relative_path(path, tmpdir)
+    assert rel == os.path.basename(path)
 
-        assert FileUtils.backup_file(path) is True
+    # get_relative_path 在 os.path.relpath 抛出 ValueError 时应回退为原路径
+    def bad_relpath(_path, _base):  # type: ignore[unused-argument]
+        raise ValueError("nope")
 
-        # 备份不存在的文件返回 False
-        missing = os.path.join(tmpdir, "missing.txt")
-        assert FileUtils.backup_file(missing) is False
+    monkeypatch.setattr(
+        "semantic_tester.utils.file_utils.os.path.relpath",
+        bad_relpath,
+    )
+    assert FileUtils.get_relative_path(path, tmpdir) == path
 
-        safe = FileUtils.safe_filename("a<>:/\\|?* .txt")
-        # Illegal characters should be removed/replaced and name should be non-empty
-        assert "<" not in safe and ">" not in safe
-        assert "?" not in safe and "*" not in safe
-        assert safe  # non-empty
 
-        rel = FileUtils.get_relative_path(path, tmpdir)
-        assert rel == os.path.basename(path)
+def test_read_files_bulk_preserves_order_and_missing(tmp_path):
+    paths = []
+    for name in ("b.md", "a.md", "c.md"):
+        path = tmp_path / name
+        path.write_text(name, encoding="utf-8")
+        paths.append(str(path))
+    missing = str(tmp_path / "missing.md")
+    paths.append(missing)
 
-        # get_relative_path 在 os.path.relpath 抛出 ValueError 时应回退为原路径
-        def bad_relpath(_path, _base):  # type: ignore[unused-argument]
-            raise ValueError("nope")
+    contents = FileUtils.read_files_bulk(paths, max_workers=2)
 
-        monkeypatch.setattr(
-            "semantic_tester.utils.file_utils.os.path.relpath",
-            bad_relpath,
-        )
-        assert FileUtils.get_relative_path(path, tmpdir) == path
+    assert list(contents) == paths
+    assert contents[paths[0]] == "b.md"
+    assert contents[missing] is None
+    assert FileUtils.read_files_bulk([]) == {}
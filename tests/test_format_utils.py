@@ -25,6 +25,12 @@ def test_format_file_size_and_duration_and_percentage():
 def test_wrap_and_table_and_number():
     lines = FormatUtils.wrap_text("a b c d", width=3)
     assert lines  # non-empty
+    assert FormatUtils.wrap_text("aa bb cc", width=6, indent="> ") == [
+        "> aa",
+        "> bb",
+        "> cc",
+    ]
+    assert FormatUtils.wrap_text("", width=3) == []
 
     table = FormatUtils.format_table([["a", "b"], ["c", "d"]], headers=["h1", "h2"])
     assert "h1" in table and "a" in table
@@ -42,6 +48,17 @@ def test_api_key_preview_and_clean_json_and_error_details():
 
     json_text = '```json\n{"a": 1}\n```'
     assert FormatUtils.clean_json_text(json_text) == '{"a": 1}'
+    assert FormatUtils.clean_json_text("```yaml\na: 1\n```") == "a: 1"
+    assert FormatUtils.clean_json_text('```\n{"a": 1}\n```') == '{"a": 1}'
+    assert FormatUtils.clean_json_text('```json {"a": 1}```') == '{"a": 1}'
+    # JSON 从围栏所在行开始时，首行内容不能丢失
+    assert FormatUtils.clean_json_text('```json {"a": 1}\n```') == '{"a": 1}'
+    assert (
+        FormatUtils.clean_json_text('```json {"a": 1,\n"b": 2}\n```')
+        == '{"a": 1,\n"b": 2}'
+    )
+    assert FormatUtils.clean_json_text('```{"a": 1}\n```') == '{"a": 1}'
+    assert FormatUtils.clean_json_text('{"a": 1}') == '{"a": 1}'
 
     details = FormatUtils.extract_error_details(
         "ResourceExhausted: 'retryDelay': '60s'"
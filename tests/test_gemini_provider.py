@@ -0,0 +1,108 @@
+from unittest.mock import MagicMock, patch
+
+from semantic_tester.api import gemini_provider
+from semantic_tester.api.gemini_provider import GeminiProvider
+
+
+def _make_provider():
+    with patch.object(GeminiProvider, "_configure_client"):
+        provider = GeminiProvider(
+            {"name": "Gemini", "id": "gemini", "api_keys": ["k" * 39]}
+        )
+    provider.client = MagicMock()
+    provider._get_available_client = MagicMock(return_value=True)
+    return provider
+
+
+def test_check_semantic_similarity_requests_structured_json():
+    provider = _make_provider()
+    provider.client.models.generate_content.return_value = MagicMock(
+        text='{"result": "是", "reason": "一致"}'
+    )
+
+    assert provider.check_semantic_similarity("q", "a", "doc") == ("是", "一致")
+
+    config = provider.client.models.generate_content.call_args.kwargs["config"]
+    assert config is gemini_provider._GENERATION_CONFIG
+    assert config.response_mime_type == "application/json"
+    assert config.response_schema["properties"]["result"]["enum"] == [
+        "是",
+        "否",
+        "错误",
+        "不确定",
+    ]
+
+
+def test_check_semantic_similarity_stream_callback_receives_content():
+    provider = _make_provider()
+    provider.client.models.generate_content_stream.return_value = [
+        MagicMock(text='{"result": "否", '),
+        MagicMock(text='"reason": "不符"}'),
+    ]
+    received = []
+
+    result = provider.check_semantic_similarity(
+        "q", "a", "doc", stream=True, stream_callback=received.append
+    )
+
+    assert result == ("否", "不符")
+    assert received == ['{"result": "否", ', '{"result": "否", "reason": "不符"}']
+
+
+def test_key_cooldown_persists_across_instances(tmp_path):
+    state_path = tmp_path / "key_state.json"
+    config = {
+        "name": "Gemini",
+        "id": "gemini",
+        "api_keys": ["key1", "key2"],
+        "key_state_path": str(state_path),
+    }
+    with patch.object(GeminiProvider, "_configure_client"):
+        first = GeminiProvider(config)
+        first._set_key_cooldown(0, 300)
+
+        # 状态文件只记录密钥哈希
+        assert "key1" not in state_path.read_text(encoding="utf-8")
+
+        second = GeminiProvider(config)
+
+    assert second.key_cooldown_until["key1"] == first.key_cooldown_until["key1"]
+    assert second.key_cooldown_until["key2"] == 0.0
+
+    with patch.object(GeminiProvider, "_configure_client"):
+        second._rotate_key(force_rotate=True)
+    assert second.current_key_index == 1
+
+
+def test_key_state_shared_file_is_partitioned_by_channel(tmp_path):
+    state_path = tmp_path / "key_state.json"
+
+    def make(channel_id):
+        return GeminiProvider(
+            {
+                "name": channel_id,
+                "id": channel_id,
+                "api_keys": ["key1", "key2"],
+                "key_state_path": str(state_path),
+            }
+        )
+
+    with patch.object(GeminiProvider, "_configure_client"):
+        first, second = make("ch1"), make("ch2")
+        first._set_key_cooldown(0, 300)
+        second._set_key_cooldown(1, 300)
+
+        # 两个渠道的冷却各自保留，互不覆盖
+        assert make("ch1").key_cooldown_until["key1"] > 0
+        assert make("ch1").key_cooldown_until["key2"] == 0.0
+        assert make("ch2").key_cooldown_until["key2"] > 0
+
+        # 普通轮转不写盘
+        mtime = state_path.stat().st_mtime_ns
+        with patch.object(gemini_provider.os, "replace") as mock_replace:
+            first._rotate_key(force_rotate=True)
+        mock_replace.assert_not_called()
+        assert state_path.stat().st_mtime_ns == mtime
+
+    # 临时文件名唯一且写完即替换，不会残留
+    assert [p.name for p in tmp_path.iterdir()] == ["key_state.json"]
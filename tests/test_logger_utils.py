@@ -1,6 +1,7 @@
 import logging
 import os
-import tempfile
+
+import pytest
 
 from semantic_tester.utils.logger_utils import (
     LoggerUtils,
@@ -9,12 +10,25 @@ from semantic_tester.utils.logger_utils import (
 )
 
 
+@pytest.fixture(scope="module", autouse=True)
+def _log_once(tmp_path_factory):
+    """本模块只初始化一次日志管道，结束时统一停止"""
+    LoggerUtils.setup_logging(
+        log_dir=str(tmp_path_factory.mktemp("logs")), log_file="t.log"
+    )
+    yield
+    LoggerUtils._stop_listener()
+
+
 def test_get_log_directory_and_setup_logging_and_get_logger(tmp_path, monkeypatch):
     # 强制在当前工作目录下创建日志目录
     monkeypatch.chdir(tmp_path)
 
     log_dir = LoggerUtils._get_log_directory("logs")
     assert os.path.isdir(log_dir)
+    # 再次解析命中缓存，且不会留下探测文件
+    assert LoggerUtils._get_log_directory("logs") == log_dir
+    assert os.listdir(log_dir) == []
 
     LoggerUtils.setup_logging(log_level="DEBUG", log_dir="logs", log_file="test.log")
     logger = LoggerUtils.get_logger("test")
@@ -24,6 +38,79 @@ def test_get_log_directory_and_setup_logging_and_get_logger(tmp_path, monkeypatc
     LoggerUtils.set_log_level("INFO")
 
 
+def test_setup_logging_routes_records_through_queue_listener(tmp_path, monkeypatch):
+    from logging.handlers import QueueHandler
+
+    monkeypatch.chdir(tmp_path)
+    LoggerUtils.setup_logging(log_level="INFO", log_dir="logs", log_file="q.log")
+
+    root = logging.getLogger()
+    assert any(isinstance(h, QueueHandler) for h in root.handlers)
+    assert LoggerUtils._listener is not None
+
+    # 控制台静默/恢复应作用于后台监听器中的控制台处理器
+    LoggerUtils.silence_console_temporarily()
+    console = [
+        h
+        for h in LoggerUtils._get_output_handlers()
+        if not isinstance(h, logging.FileHandler)
+    ]
+    assert console and all(h.level > logging.CRITICAL for h in console)
+    LoggerUtils.restore_console_level()
+    assert all(h.level == logging.WARNING for h in console)
+
+    # 相同配置再次调用时保留现有的日志管道
+    listener = LoggerUtils._listener
+    LoggerUtils.setup_logging(log_level="INFO", log_dir="logs", log_file="q.log")
+    assert LoggerUtils._listener is listener
+
+    logging.getLogger("queued").info("queued message")
+    file_handlers = [h for h in listener.handlers if isinstance(h, logging.FileHandler)]
+
+    # 停止监听器会先处理完队列中的剩余记录，并关闭文件句柄和队列处理器
+    queue_handler = LoggerUtils._queue_handler
+    LoggerUtils._stop_listener()
+    assert LoggerUtils._listener is None
+    assert queue_handler not in root.handlers
+    assert LoggerUtils._queue_handler is None
+    assert file_handlers and all(h.stream is None for h in file_handlers)
+
+    log_text = (tmp_path / "logs" / "q.log").read_text(encoding="utf-8")
+    assert "queued message" in log_text
+
+
+def test_set_log_level_raises_and_lowers_level(caplog):
+    root = logging.getLogger()
+    old_level = root.level
+    try:
+        # 提高级别：级别生效，确认信息不会以 INFO 输出
+        LoggerUtils.set_log_level("WARNING")
+        assert root.level == logging.WARNING
+        assert not [r for r in caplog.records if "日志级别已设置为" in r.getMessage()]
+
+        # 降低到 DEBUG：确认信息以 DEBUG 记录
+        LoggerUtils.set_log_level("DEBUG")
+        assert root.level == logging.DEBUG
+        records = [r for r in caplog.records if "日志级别已设置为" in r.getMessage()]
+        assert [(r.levelno, r.getMessage()) for r in records] == [
+            (logging.DEBUG, "日志级别已设置为: DEBUG")
+        ]
+    finally:
+        root.setLevel(old_level)
+
+
+def test_setup_logging_keeps_global_record_attributes(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(logging, "logThreads", True)
+    monkeypatch.setattr(logging, "logProcesses", True)
+
+    LoggerUtils.setup_logging(log_dir="logs", log_file="attrs.log")
+
+    # 不修改宿主程序的全局日志记录设置
+    assert logging.logThreads is True
+    assert logging.logProcesses is True
+
+
 def test_console_and_temp_levels_and_silence_restore(capsys):
     LoggerUtils.console_print("hello", level="SUCCESS")
     out, _ = capsys.readouterr()
@@ -41,8 +128,13 @@ def test_console_and_temp_levels_and_silence_restore(capsys):
 
 
 def test_startup_banner_and_provider_summary_and_simple_menu(capsys, monkeypatch):
-    # 避免 rich 真正输出复杂格式，只验证不会抛异常
+    # 避免 rich 真正渲染面板，只验证面板构建与缓存
+    monkeypatch.setattr("rich.console.Console.print", lambda self, *a, **k: None)
     LoggerUtils.print_startup_banner()
+    banner = LoggerUtils._cached_banner
+    assert banner is not None
+    LoggerUtils.print_startup_banner()
+    assert LoggerUtils._cached_banner is banner
 
     LoggerUtils.print_provider_summary(
         {"total": 2, "configured": 1, "current": "gemini"}
@@ -76,3 +168,29 @@ def test_progress_logger_and_colored_formatter(capsys):
     )
     formatted = fmt.format(record)
     assert "msg" in formatted
+    assert ColoredFormatter.COLORS["INFO"] in formatted
+    # 格式化后不应修改共享的 LogRecord
+    assert record.levelname == "INFO"
+
+
+def test_progress_logger_update_is_throttled_by_percentage(caplog):
+    pl = ProgressLogger(total_items=1000, description="节流")
+    with caplog.at_level(logging.INFO, logger="semantic_tester.utils.logger_utils"):
+        for _ in range(1000):
+            pl.update()
+        pl.update(increment=0, message="附加消息")
+
+    messages = [r.getMessage() for r in caplog.records]
+    # 0%..100% 每个整数百分比最多输出一次，附加消息始终输出
+    assert len(messages) == 102
+    assert messages[-2].startswith("节流: 1000/1000 (100.0%)")
+    assert messages[-1].endswith("附加消息")
+
+
+def test_progress_logger_skips_work_when_info_disabled(caplog):
+    pl = ProgressLogger(total_items=10, description="静默")
+    with caplog.at_level(logging.WARNING, logger="semantic_tester.utils.logger_utils"):
+        pl.update(increment=5, message="不会输出")
+
+    assert pl.current_item == 5
+    assert caplog.records == []
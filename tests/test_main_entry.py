@@ -1,7 +1,9 @@
 import importlib
-import runpy
 import sys
 import types
+from pathlib import Path
+
+import main as app_main
 
 
 def test_semantic_tester_main_importable():
@@ -14,7 +16,7 @@ def test_semantic_tester_main_importable():
     assert hasattr(mod, "main")
 
 
-def test_semantic_tester_main_runs_when_module_as_script():
+def test_semantic_tester_main_runs_when_module_as_script(monkeypatch):
     """执行 semantic_tester.__main__ 作为脚本时，应调用 main()。"""
 
     called = {"flag": False}
@@ -25,9 +27,68 @@ def test_semantic_tester_main_runs_when_module_as_script():
         called["flag"] = True
 
     stub.main = fake_main  # type: ignore[attr-defined]
-    sys.modules["main"] = stub
+    monkeypatch.setitem(sys.modules, "main", stub)
 
-    # 以 __main__ 方式运行模块，触发 if __name__ == "__main__" 分支
-    runpy.run_module("semantic_tester.__main__", run_name="__main__")
+    # 复用已导入模块的源码，以 __main__ 名义执行，触发 if __name__ == "__main__" 分支
+    mod = importlib.import_module("semantic_tester.__main__")
+    code = compile(Path(mod.__file__).read_text(encoding="utf-8"), mod.__file__, "exec")
+    exec(code, {"__name__": "__main__", "__file__": mod.__file__})
 
     assert called["flag"] is True
+
+
+def test_parse_config_argument_reads_json_and_strips_option(tmp_path):
+    import json
+
+    config_path = tmp_path / "run.json"
+    config_path.write_text(
+        json.dumps({"question_col": "问题", "output": "out.xlsx"}), encoding="utf-8"
+    )
+
+    args, run_config = app_main._parse_config_argument(
+        ["data.xlsx", "--config", str(config_path), "./kb"]
+    )
+
+    assert args == ["data.xlsx", "./kb"]
+    assert run_config == {"question_col": "问题", "output": "out.xlsx"}
+    assert app_main._parse_config_argument(["data.xlsx"]) == (["data.xlsx"], {})
+
+
+def test_column_mapping_from_config_accepts_names_and_numbers():
+    from unittest.mock import MagicMock
+
+    app = MagicMock()
+    app.excel_processor.column_names = ["文档", "问题", "回答"]
+
+    assert app_main._column_mapping_from_config(
+        app, {"question_col": "问题", "ai_answer_col": 3}
+    ) == {"doc_name_col_index": -1, "question_col_index": 1, "ai_answer_col_index": 2}
+    assert (
+        app_main._column_mapping_from_config(
+            app, {"question_col": "问题", "ai_answer_col": "不存在"}
+        )
+        is None
+    )
+    # 缺少或为 null 的必填列在处理前直接拒绝
+    assert app_main._column_mapping_from_config(app, {"ai_answer_col": 3}) is None
+    assert (
+        app_main._column_mapping_from_config(
+            app, {"question_col": None, "ai_answer_col": 3}
+        )
+        is None
+    )
+
+
+def test_resolve_column_mapping_uses_config_only_when_columns_given():
+    from unittest.mock import MagicMock
+
+    app = MagicMock()
+    app.excel_processor.column_names = ["文档", "问题", "回答"]
+
+    assert app_main._resolve_column_mapping(app, {"ai_answer_col": 3}, False) is None
+    app.excel_processor.get_user_column_mapping.assert_not_called()
+
+    app_main._resolve_column_mapping(app, {"output": "out.xlsx"}, True)
+    app.excel_processor.get_user_column_mapping.assert_called_once_with(
+        auto_config=True
+    )
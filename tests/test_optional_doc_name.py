@@ -2,22 +2,19 @@
 import unittest
 from unittest.mock import MagicMock, patch
 import pandas as pd
-import sys
-import os
-
-# Add project root to sys.path
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from semantic_tester.excel.processor import ExcelProcessor
 
+# 各用例只读取该表，构建一次后浅拷贝复用
+_BASE_DF = pd.DataFrame({"Question": ["Q1", "Q2"], "Answer": ["A1", "A2"]})
+_BASE_COLS = list(_BASE_DF.columns)
+
+
 class TestOptionalColumns(unittest.TestCase):
     def setUp(self):
         self.processor = ExcelProcessor("dummy_path.xlsx")
-        self.processor.df = pd.DataFrame({
-            "Question": ["Q1", "Q2"],
-            "Answer": ["A1", "A2"]
-        })
-        self.processor.column_names = ["Question", "Answer"]
+        self.processor.df = _BASE_DF.copy(deep=False)
+        self.processor.column_names = _BASE_COLS.copy()
         self.processor.format_info = {"question_col": "Question", "response_cols": ["Answer"]}
         # Mock logic that would normally be in utils to prevent actual dependency issues in this unit test if possible,
         # but here we rely on the project structure.
@@ -1,6 +1,10 @@
 from semantic_tester.api.prompts import (
+    GEMINI_SEMANTIC_CHECK_PROMPT,
     SEMANTIC_CHECK_PROMPT,
+    build_batch_check_prompt,
     get_semantic_check_prompt,
+    parse_batch_check_response,
+    select_relevant_document,
 )
 
 
@@ -26,3 +30,56 @@ def test_semantic_check_prompt_default_and_placeholders():
 def test_semantic_check_prompt_from_env_manager():
     dummy = DummyEnvManager("CUSTOM_PROMPT")
     assert get_semantic_check_prompt(dummy) == "CUSTOM_PROMPT"
+
+
+def test_gemini_prompt_puts_document_before_question():
+    # Gemini 提示词文档在前、问答在后，同一文档的请求共享更长的提示词前缀
+    assert GEMINI_SEMANTIC_CHECK_PROMPT.index(
+        "{source_document}"
+    ) < GEMINI_SEMANTIC_CHECK_PROMPT.index("{question}")
+    # 其他供应商使用的默认提示词保持问答在前
+    assert SEMANTIC_CHECK_PROMPT.index("{question}") < SEMANTIC_CHECK_PROMPT.index(
+        "{source_document}"
+    )
+    assert sorted(GEMINI_SEMANTIC_CHECK_PROMPT) == sorted(SEMANTIC_CHECK_PROMPT)
+
+
+def test_select_relevant_document_keeps_matching_chunks_in_order():
+    sections = [
+        "# 退货政策\n商品签收后七天内可申请退货。",
+        "# 配送说明\n" + "普通快递三到五天送达。" * 150,
+        "# 营业时间\n门店每天早上九点营业。",
+    ]
+    document = "\n\n".join(sections)
+
+    selected = select_relevant_document(document, "门店几点营业？退货", 200)
+
+    assert "营业时间" in selected and "退货政策" in selected
+    assert "配送说明" not in selected
+    assert selected.index("退货政策") < selected.index("营业时间")
+
+    # 拼接后（含省略标记）不超过长度上限
+    for max_chars in (30, 39, 60, 200, 1000):
+        assert (
+            len(select_relevant_document(document, "门店几点营业？退货", max_chars))
+            <= max_chars
+        )
+
+    # 未超过长度或未启用时原样返回
+    assert select_relevant_document(document, "营业", 0) == document
+    assert select_relevant_document("短文档", "营业", 200) == "短文档"
+
+
+def test_batch_check_prompt_and_response_parsing():
+    prompt = build_batch_check_prompt([("问1", "答1"), ("问2", "答2")], "文档")
+    assert "【第 1 组】" in prompt and "【第 2 组】" in prompt
+    assert prompt.index("文档") < prompt.index("问1")
+
+    response = (
+        '```json\n[{"index": 2, "result": "否", "reason": "不符"},'
+        ' {"index": 1, "result": "错误", "reason": "x"},'
+        ' {"index": 9, "result": "是", "reason": "越界"}]\n```'
+    )
+    # 无效结果和越界编号都视为缺失，交由逐条重试
+    assert parse_batch_check_response(response, 2) == [None, ("否", "不符")]
+    assert parse_batch_check_response("not json", 2) == [None, None]
@@ -1,5 +1,8 @@
+import copy
 from typing import Any, Dict, List
 
+import pytest
+
 from semantic_tester.api.base_provider import AIProvider
 from semantic_tester.api.provider_manager import ProviderManager
 
@@ -80,18 +83,49 @@ def _make_manager_with_fake_providers(monkeypatch) -> ProviderManager:
     return mgr
 
 
-def _make_bare_manager() -> ProviderManager:
+@pytest.fixture(scope="module")
+def _template_manager() -> ProviderManager:
+    """整个模块只运行一次 ProviderManager.__init__"""
+    with pytest.MonkeyPatch.context() as mp:
+        return _make_manager_with_fake_providers(mp)
+
+
+@pytest.fixture
+def manager(_template_manager) -> ProviderManager:
+    """基于模板的浅拷贝，复制各测试可能修改的容器"""
+    mgr = copy.copy(_template_manager)
+    mgr.providers = dict(_template_manager.providers)
+    mgr.channels_list = list(_template_manager.channels_list)
+    return mgr
+
+
+@pytest.fixture(scope="module")
+def fake_env() -> DummyEnv:
+    return DummyEnv()
+
+
+@pytest.fixture
+def bare_manager(fake_env) -> ProviderManager:
     """构造一个不运行 __init__ 的 ProviderManager，用于测试内部方法。"""
     mgr = ProviderManager.__new__(ProviderManager)  # type: ignore[call-arg]
-    mgr.config = DummyEnv()
+    mgr.config = fake_env
     mgr.providers = {}
     mgr.current_provider_id = None
     return mgr
 
 
-def test_provider_manager_basic_selection(monkeypatch):
+@pytest.fixture
+def fake_providers() -> Dict[str, FakeProvider]:
+    """一个已配置 (p1)、一个未配置 (p2) 的供应商"""
+    return {
+        "p1": FakeProvider("p1", "P1", configured=True),
+        "p2": FakeProvider("p2", "P2", configured=False),
+    }
+
+
+def test_provider_manager_basic_selection(manager):
     """测试 ProviderManager 基础初始化和供应商选择"""
-    mgr = _make_manager_with_fake_providers(monkeypatch)
+    mgr = manager
 
     # 初始化后，应有供应商可用
     providers = mgr.get_channel_providers()
@@ -106,51 +140,51 @@ def test_provider_manager_basic_selection(monkeypatch):
     assert mgr.get_current_provider() is not None
 
 
-def test_provider_manager_configured_list(monkeypatch):
+def test_provider_manager_configured_list(manager):
     """测试已配置供应商列表获取"""
-    mgr = _make_manager_with_fake_providers(monkeypatch)
+    mgr = manager
     configured = mgr.get_configured_providers_list()
     # 应当有一个已配置的供应商 (channel_1配置为True)
     assert len(configured) >= 1
 
 
-def test_validate_and_auto_select_provider_prefers_configured():
-    mgr = _make_bare_manager()
+def test_validate_and_auto_select_provider_prefers_configured(
+    bare_manager, fake_providers
+):
+    mgr = bare_manager
 
     # 一个已配置、一个未配置
-    p1 = FakeProvider("p1", "P1", configured=True)
-    p2 = FakeProvider("p2", "P2", configured=False)
-    mgr.providers = {"p1": p1, "p2": p2}
+    mgr.providers = fake_providers
 
     mgr._validate_and_auto_select_provider()
     assert mgr.current_provider_id == "p1"
 
 
-def test_validate_and_auto_select_provider_falls_back_to_unconfigured():
-    mgr = _make_bare_manager()
+def test_validate_and_auto_select_provider_falls_back_to_unconfigured(
+    bare_manager, fake_providers
+):
+    mgr = bare_manager
 
-    p1 = FakeProvider("p1", "P1", configured=False)
-    p2 = FakeProvider("p2", "P2", configured=False)
-    mgr.providers = {"p1": p1, "p2": p2}
+    fake_providers["p1"]._configured = False
+    mgr.providers = fake_providers
 
     mgr._validate_and_auto_select_provider()
     # 没有已配置供应商时，应选择第一个未配置供应商
     assert mgr.current_provider_id in {"p1", "p2"}
 
 
-def test_check_semantic_similarity_error_when_provider_missing():
-    mgr = _make_bare_manager()
+def test_check_semantic_similarity_error_when_provider_missing(bare_manager):
+    mgr = bare_manager
     # providers 为空时应返回错误
     result, reason = mgr.check_semantic_similarity("q", "a", "doc", provider_id="nope")
     assert result == "错误"
     assert "不可用" in reason
 
 
-def test_check_semantic_similarity_streams_and_delegates(monkeypatch):
+def test_check_semantic_similarity_streams_and_delegates(bare_manager, fake_providers):
     # 使用 fake providers，避免真实网络调用
-    mgr = _make_bare_manager()
-    provider = FakeProvider("p1", "P1", configured=True)
-    mgr.providers = {"p1": provider}
+    mgr = bare_manager
+    mgr.providers = fake_providers
     mgr.current_provider_id = "p1"
 
     # verify that method returns provider's result, stream=True 触发富文本分支
@@ -164,3 +198,20 @@ def test_check_semantic_similarity_streams_and_delegates(monkeypatch):
     )
     assert result == "是"
     assert reason == "ok"
+
+
+def test_validate_all_configured_channels_skip_probe(manager):
+    """跳过在线验证时只检查配置，不调用 validate_api_key"""
+    mgr = manager
+    provider = FakeProvider("channel_1", "P1")
+    provider.config["api_keys"] = ["bad-key"]
+    providers = {"channel_1": provider}
+    mgr.providers = providers
+    mgr.channels_list = mgr.config.get_channels_config()[:1]
+
+    results = mgr.validate_all_configured_channels(skip_probe=True)
+
+    assert [r["valid"] for r in results] == [True]
+    assert results[0]["message"] == "已跳过在线验证"
+    assert providers["channel_1"].validate_called_with == []
+    assert mgr.valid_channel_ids == ["channel_1"]
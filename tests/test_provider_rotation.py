@@ -1,29 +1,39 @@
-import sys
-import os
 import logging
+import time
 from unittest.mock import MagicMock, patch
 
-# Ensure project root is on sys.path so `semantic_tester` can be imported
-PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-if PROJECT_ROOT not in sys.path:
-    sys.path.insert(0, PROJECT_ROOT)
+import pytest
 
+from semantic_tester.api import base_provider
+from semantic_tester.api.gemini_provider import GeminiProvider
+from semantic_tester.api.openai_provider import OpenAIProvider
 from semantic_tester.api.provider_manager import ProviderManager
 from semantic_tester.config.environment import EnvManager
 
-# Configure logging for debug output during test runs
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
-
-
-def test_rotation_configuration():
-    """ProviderManager 应该为不同供应商设置正确的 auto_rotate 策略。
-
-    这里只关心配置逻辑本身，不依赖真实的 SDK 安装状态，
-    因此只验证 iFlow 类型的供应商。
+# 轮转逻辑测试共用的供应商配置（使用时复制，避免被 Provider 修改）
+_CONFIG_NO_ROTATE = {
+    "name": "TestNoRotate",
+    "id": "test_no_rotate",
+    "api_keys": ["key1", "key2"],
+    "auto_rotate": False,
+}
+_CONFIG_ROTATE = {
+    "name": "TestRotate",
+    "id": "test_rotate",
+    "api_keys": ["key1", "key2"],
+    "auto_rotate": True,
+}
+
+# (渠道 ID, 预期的 auto_rotate)
+_EXPECTED_ROTATION = (("channel_1", False), ("channel_2", False))
+
+
+@pytest.fixture(scope="module")
+def env_mock():
+    """整个模块共用一个按 EnvManager 规格构造的 Mock（spec 只需解析一次）
+
+    spec 保证 ProviderManager 调用 EnvManager 上不存在的方法时测试失败。
     """
-
-    # Mock EnvManager
     mock_env = MagicMock(spec=EnvManager)
 
     # 使用新的 get_channels_config 方法代替已移除的旧方法
@@ -49,71 +59,163 @@ def test_rotation_configuration():
             "has_config": True,
         },
     ]
-
     mock_env.get_batch_config.return_value = {}
+    return mock_env
 
-    manager = ProviderManager(mock_env)
-
-    # 验证供应商已创建
-    p1 = manager.get_provider("channel_1")
-    assert p1 is not None
-
-    p2 = manager.get_provider("channel_2")
-    assert p2 is not None
 
+def test_rotation_configuration(env_mock):
+    """ProviderManager 应该为不同供应商设置正确的 auto_rotate 策略。
 
-def test_rotation_logic():
+    这里只关心配置逻辑本身，不依赖真实的 SDK 安装状态，
+    因此只验证 iFlow 类型的供应商。
+    """
+    manager = ProviderManager(env_mock)
+
+    # 验证供应商已创建，且非 Gemini 渠道默认不自动轮转
+    for channel_id, should_rotate in _EXPECTED_ROTATION:
+        provider = manager.get_provider(channel_id)
+        assert provider is not None, channel_id
+        assert provider.auto_rotate is should_rotate, channel_id
+
+
+@pytest.mark.parametrize(
+    "provider_cls,config,should_rotate",
+    [
+        (GeminiProvider, _CONFIG_ROTATE, True),
+        (GeminiProvider, _CONFIG_NO_ROTATE, False),
+        # OpenAIProvider 默认 auto_rotate=False
+        (OpenAIProvider, _CONFIG_NO_ROTATE, False),
+    ],
+    ids=["gemini-rotate", "gemini-norotate", "openai-norotate"],
+)
+def test_rotate_key(provider_cls, config, should_rotate):
     """验证不同 auto_rotate 配置下 _rotate_key 的行为。"""
-
-    # Mock config for a provider with auto_rotate=False
-    config_no_rotate = {
-        "name": "TestNoRotate",
-        "id": "test_no_rotate",
-        "api_keys": ["key1", "key2"],
-        "auto_rotate": False,
+    with patch.object(provider_cls, "validate_api_key", return_value=True):
+        provider = provider_cls(dict(config))
+        initial_key_index = provider.current_key_index
+        provider._rotate_key()
+
+    rotated = provider.current_key_index != initial_key_index
+    assert rotated is should_rotate, (
+        f"{provider_cls.__name__} 在 auto_rotate={config['auto_rotate']} 时"
+        f"{'应当' if should_rotate else '不应当'}轮转 API Key"
+    )
+
+
+def test_gemini_rotation_prefers_earliest_available_key():
+    """Gemini 按冷却结束时间选择密钥，冷却中的密钥被跳过。"""
+    config = {
+        "name": "Gemini",
+        "id": "gemini",
+        "api_keys": ["key1", "key2", "key3"],
+        "auto_rotate": True,
     }
-
-    # Mock config for a provider with auto_rotate=True
-    config_rotate = {
-        "name": "TestRotate",
-        "id": "test_rotate",
+    with patch.object(GeminiProvider, "_configure_client"):
+        gemini = GeminiProvider(config)
+
+        # 无冷却时按轮询顺序选择
+        gemini._rotate_key(force_rotate=True)
+        assert gemini.current_key_index == 1
+
+        # 429 使 key2 冷却，下一次选择跳过它；直接修改冷却字典同样生效
+        gemini._set_key_cooldown(1, 30)
+        gemini.key_cooldown_until["key3"] = time.time() + 60
+        gemini._rotate_key(force_rotate=True)
+        assert gemini.current_key_index == 0
+
+        # 全部冷却时等待最早可用的密钥 (key2)
+        gemini._set_key_cooldown(0, 90)
+        with patch.object(GeminiProvider, "_wait_or_shutdown") as mock_wait:
+            gemini._rotate_key()
+        assert gemini.current_key_index == 1
+        assert 0 < mock_wait.call_args.args[0] <= 30
+
+
+def test_gemini_retry_wait_stops_on_shutdown():
+    """收到停止信号后，重试等待立即返回且不再重试。"""
+    config = {"name": "Gemini", "id": "gemini", "api_keys": ["key1"]}
+    with patch.object(GeminiProvider, "_configure_client"):
+        gemini = GeminiProvider(config)
+
+    base_provider.request_shutdown()
+    try:
+        start = time.monotonic()
+        assert gemini._handle_no_client(0, 3, 60) is False
+        assert time.monotonic() - start < 1
+    finally:
+        base_provider.reset_shutdown()
+
+    assert gemini._wait_or_shutdown(0) is False
+
+
+def _rpm_gemini(auto_rotate=True, rpm_limit=2):
+    config = {
+        "name": "Gemini",
+        "id": "gemini",
         "api_keys": ["key1", "key2"],
-        "auto_rotate": True,
+        "auto_rotate": auto_rotate,
+        "gemini_rpm_limit": rpm_limit,
     }
+    with patch.object(GeminiProvider, "_configure_client"):
+        return GeminiProvider(config)
+
+
+def test_gemini_rotation_skips_key_at_rpm_limit():
+    """密钥在 60 秒窗口内达到 RPM 上限时，在 429 之前就被跳过。"""
+    gemini = _rpm_gemini()
+
+    with patch.object(GeminiProvider, "_configure_client"):
+        with patch.object(GeminiProvider, "_wait_or_shutdown") as mock_wait:
+            gemini._record_request()
+            gemini._record_request()
+            # key1 的窗口已满，改用 key2 且无需等待
+            gemini._rotate_key()
+            assert gemini.current_key_index == 1
+            mock_wait.assert_not_called()
+
+            gemini._record_request()
+            gemini._record_request()
+            # 两个密钥都已满，等待最早的请求移出窗口
+            gemini._rotate_key()
+            assert 55 < mock_wait.call_args.args[0] <= 60
+
+    # RPM 可用时间单独记录，不写入（会被持久化的）429 冷却时间
+    assert gemini.key_cooldown_until == {"key1": 0.0, "key2": 0.0}
+    assert min(gemini.key_rpm_available_at.values()) > time.time()
+
+
+def test_gemini_rpm_limit_allows_several_calls_per_key_per_minute():
+    """启用 RPM 限制时，同一密钥一分钟内可多次调用，不被限制为每分钟 1 次。"""
+    gemini = _rpm_gemini(rpm_limit=3)
+
+    with patch.object(GeminiProvider, "_configure_client"):
+        with patch.object(GeminiProvider, "_wait_or_shutdown") as mock_wait:
+            for _ in range(6):
+                gemini._get_available_client()
+                gemini._record_request()
+
+    mock_wait.assert_not_called()
+    assert [len(gemini.key_requests[key]) for key in ("key1", "key2")] == [3, 3]
+
+
+def test_gemini_rpm_limit_applies_without_auto_rotate():
+    """未启用自动轮转时同样计数，当前密钥达到上限后等待窗口释放。"""
+    gemini = _rpm_gemini(auto_rotate=False)
+
+    with patch.object(GeminiProvider, "_wait_or_shutdown") as mock_wait:
+        gemini._get_available_client()
+        gemini._record_request()
+        gemini._get_available_client()
+        mock_wait.assert_not_called()
+
+        gemini._record_request()
+        gemini._get_available_client()
+
+    assert gemini.current_key_index == 0
+    assert 55 < mock_wait.call_args.args[0] <= 60
+
 
-    from semantic_tester.api.gemini_provider import GeminiProvider
-
-    # Test Gemini (Auto Rotate = True)
-    with patch.object(GeminiProvider, "validate_api_key", return_value=True):
-        gemini = GeminiProvider(config_rotate)
-        initial_key_index = gemini.current_key_index
-        gemini._rotate_key()
-        new_key_index = gemini.current_key_index
-
-        assert (
-            new_key_index != initial_key_index
-        ), "GeminiProvider 在 auto_rotate=True 时应当轮转 API Key"
-
-    # Test Gemini with Auto Rotate = False (Simulated)
-    with patch.object(GeminiProvider, "validate_api_key", return_value=True):
-        gemini_no_rotate = GeminiProvider(config_no_rotate)
-        initial_key_index = gemini_no_rotate.current_key_index
-        gemini_no_rotate._rotate_key()
-        new_key_index = gemini_no_rotate.current_key_index
-
-        assert (
-            new_key_index == initial_key_index
-        ), "GeminiProvider 在 auto_rotate=False 时不应当轮转 API Key"
-
-    # Test OpenAI (Auto Rotate = False)
-    from semantic_tester.api.openai_provider import OpenAIProvider
-
-    with patch.object(OpenAIProvider, "validate_api_key", return_value=True):
-        openai = OpenAIProvider(config_no_rotate)
-        initial_key_index = openai.current_key_index
-        openai._rotate_key()
-        new_key_index = openai.current_key_index
-
-        assert (
-            new_key_index == initial_key_index
-        ), "OpenAIProvider 默认 auto_rotate=False，调用 _rotate_key 不应改变索引"
+if __name__ == "__main__":
+    # 直接运行脚本时输出 INFO 日志；pytest 下由其自身的日志捕获处理
+    logging.basicConfig(level=logging.INFO)
+    pytest.main([__file__])
@@ -0,0 +1,129 @@
+from unittest.mock import MagicMock, patch
+
+from semantic_tester.api.gemini_provider import GeminiProvider
+from semantic_tester.api.result_cache import SemanticCache
+
+
+def test_semantic_cache_normalized_hit_and_namespace(tmp_path):
+    cache = SemanticCache(str(tmp_path / "cache.sqlite3"))
+    doc_hash = SemanticCache.hash_document("源文档")
+
+    cache.set("营业时间是？", "早上9点开门。", doc_hash, "m", "是", "一致")
+
+    # 全角/半角和空白差异视为同一问答
+    assert cache.get("营业时间是?", " 早上9点开门。 ", doc_hash, "m") == ("是", "一致")
+    # 标点属于内容的一部分，不同标点不共享结果
+    assert cache.get("营业时间是？", "早上9点开门", doc_hash, "m") is None
+    # 不同文档或模型不共享结果
+    other_doc = SemanticCache.hash_document("其他文档")
+    assert cache.get("营业时间是？", "早上9点开门。", other_doc, "m") is None
+    assert cache.get("营业时间是？", "早上9点开门。", doc_hash, "m2") is None
+
+    # 技术性错误不缓存
+    cache.set("q", "a", doc_hash, "m", "错误", "超时")
+    assert cache.get("q", "a", doc_hash, "m") is None
+    cache.close()
+
+
+def test_semantic_cache_key_keeps_punctuation_and_digits():
+    assert SemanticCache.normalize_text("  ABC\u3000 Def ") == "abc def"
+    assert SemanticCache.normalize_text("9.5元") != SemanticCache.normalize_text("95元")
+    assert SemanticCache.normalize_text("1,000") != SemanticCache.normalize_text("1000")
+
+    cache = SemanticCache.__new__(SemanticCache)
+    assert cache._make_key("价格?", "9.5元", "h", "m") != cache._make_key(
+        "价格?", "95元", "h", "m"
+    )
+
+
+def test_semantic_cache_ttl_expiry(tmp_path):
+    cache = SemanticCache(str(tmp_path / "cache.sqlite3"), ttl_seconds=10)
+    cache.set("q", "a", "h", "m", "否", "不符")
+
+    with patch("semantic_tester.api.result_cache.time.time", return_value=1e12):
+        assert cache.get("q", "a", "h", "m") is None
+    cache.close()
+
+
+def test_semantic_cache_database_error_is_a_miss(tmp_path):
+    import sqlite3
+
+    cache = SemanticCache(str(tmp_path / "cache.sqlite3"), memory_size=0)
+    assert cache._conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    cache.set("q", "a", "h", "m", "是", "一致")
+
+    # 数据库被其他连接锁定时按未命中处理，不让整行比对失败
+    real_conn = cache._conn
+    cache._conn = MagicMock()
+    cache._conn.execute.side_effect = sqlite3.OperationalError("database is locked")
+    assert cache.get("q", "a", "h", "m") is None
+
+    cache._conn = real_conn
+    assert cache.get("q", "a", "h", "m") == ("是", "一致")
+    cache.close()
+
+
+@patch.object(GeminiProvider, "_configure_client")
+def test_gemini_provider_uses_semantic_cache(_mock_configure, tmp_path):
+    provider = GeminiProvider(
+        {
+            "name": "Gemini",
+            "id": "gemini",
+            "api_keys": ["k" * 39],
+            "semantic_cache_path": str(tmp_path / "cache.sqlite3"),
+        }
+    )
+    provider.client = MagicMock()
+    provider._get_available_client = MagicMock(return_value=True)
+    provider._call_gemini_api = MagicMock(return_value=("是", "一致"))
+
+    first = provider.check_semantic_similarity("q", "a", "doc")
+    second = provider.check_semantic_similarity("q", "a", "doc")
+
+    assert first == second == ("是", "一致")
+    assert provider._call_gemini_api.call_count == 1
+
+
+def test_semantic_cache_exact_hit_skips_database(tmp_path):
+    cache = SemanticCache(str(tmp_path / "cache.sqlite3"), memory_size=1)
+    cache.set("q1", "a1", "h", "m", "是", "r1")
+    cache.set("q2", "a2", "h", "m", "否", "r2")
+
+    real_conn = cache._conn
+    cache._conn = MagicMock()
+    # 最近写入的条目在内存中命中，不访问数据库
+    assert cache.get("q2", "a2", "h", "m") == ("否", "r2")
+    cache._conn.execute.assert_not_called()
+
+    # 超出容量被淘汰的条目回落到数据库，并重新放入内存
+    cache._conn = real_conn
+    assert cache.get("q1", "a1", "h", "m") == ("是", "r1")
+    assert list(cache._memory) == [cache._make_exact_key("q1", "a1", "h", "m")]
+    cache.close()
+
+
+@patch.object(GeminiProvider, "_configure_client")
+def test_gemini_batch_check_sends_only_cache_misses(_mock_configure, tmp_path):
+    provider = GeminiProvider(
+        {
+            "name": "Gemini",
+            "id": "gemini",
+            "api_keys": ["k" * 39],
+            "semantic_cache_path": str(tmp_path / "cache.sqlite3"),
+        }
+    )
+    provider.client = MagicMock()
+    provider._get_available_client = MagicMock(return_value=True)
+    doc_hash = SemanticCache.hash_document("doc")
+    provider.semantic_cache.set("q1", "a1", doc_hash, provider.model_name, "是", "缓存")
+    provider.client.models.generate_content.return_value = MagicMock(
+        text='[{"index": 1, "result": "否", "reason": "不符"}]'
+    )
+
+    results = provider.check_semantic_similarity_batch(
+        [("q1", "a1"), ("q2", "a2"), ("q3", "a3")], "doc"
+    )
+
+    assert results == [("是", "缓存"), ("否", "不符"), None]
+    prompt = provider.client.models.generate_content.call_args.kwargs["contents"][0]
+    assert "q1" not in prompt and "q2" in prompt and "q3" in prompt
@@ -1,87 +1,95 @@
 import json
 import os
-import tempfile
 
+import pytest
+
+from semantic_tester.config import settings as settings_module
 from semantic_tester.config.settings import Settings, Config
 
 
+_SETTINGS_DATA = {
+    "default_knowledge_base_dir": "/kb",
+    "default_output_dir": "/out",
+    "auto_save_interval": 5,
+    "max_retries": 3,
+    "default_retry_delay": 30,
+    "log_level": "DEBUG",
+    "show_comparison_result": True,
+    "auto_detect_format": False,
+}
+
+
 def test_settings_to_from_dict_roundtrip():
-    data = {
-        "default_knowledge_base_dir": "/kb",
-        "default_output_dir": "/out",
-        "auto_save_interval": 5,
-        "max_retries": 3,
-        "default_retry_delay": 30,
-        "log_level": "DEBUG",
-        "show_comparison_result": True,
-        "auto_detect_format": False,
-    }
-    s = Settings.from_dict(data)
-    assert s.to_dict() == data
-
-
-def test_config_load_save_and_get_set_reset_print(monkeypatch, capsys):
-    with tempfile.TemporaryDirectory() as tmpdir:
-        cfg_path = os.path.join(tmpdir, "config.json")
-
-        # 初始时文件不存在，应使用默认设置
-        cfg = Config(config_file=cfg_path)
-        assert isinstance(cfg.settings, Settings)
-
-        # 修改部分设置并保存
-        cfg.set_setting("auto_save_interval", 7)
-        cfg.set_setting("log_level", "WARNING")
-        assert cfg.save_settings() is True
-
-        # 重新加载，确认持久化
-        cfg2 = Config(config_file=cfg_path)
-        assert cfg2.settings.auto_save_interval == 7
-        assert cfg2.settings.log_level == "WARNING"
-
-        # get_setting / reset_to_defaults
-        assert cfg2.get_setting("auto_save_interval") == 7
-        assert cfg2.get_setting("unknown_key") is None
-
-        cfg2.reset_to_defaults()
-        assert cfg2.settings.auto_save_interval == Settings().auto_save_interval
-
-        # print_settings 只需确保输出包含关键字段
-        cfg2.print_settings()
-        out, _ = capsys.readouterr()
-        assert "auto_save_interval" in out
-
-        # update_from_user_input：模拟输入
-        monkeypatch.setattr("builtins.input", lambda prompt="": "20")
-        updated = cfg2.update_from_user_input("auto_save_interval", "设置间隔")
-        assert updated is True
-        assert cfg2.settings.auto_save_interval == 20
-
-        # 非法 key
-        updated = cfg2.update_from_user_input("not_exists", "提示")
-        assert updated is False
-
-        # get_default_output_path / ensure_output_dir
-        out_path = cfg2.get_default_output_path(os.path.join(tmpdir, "a.xlsx"))
-        assert out_path.endswith("_评估结果.xlsx")
-
-        nested_out = os.path.join(tmpdir, "sub", "b.xlsx")
-        cfg2.ensure_output_dir(nested_out)
-        assert os.path.isdir(os.path.join(tmpdir, "sub"))
-
-        # 属性访问器
-        assert isinstance(cfg2.auto_save_interval, int)
-        assert isinstance(cfg2.max_retries, int)
-        assert isinstance(cfg2.default_retry_delay, int)
-        assert isinstance(cfg2.log_level, str)
-
-
-def test_config_load_invalid_json_uses_defaults(tmp_path, caplog):
-    cfg_path = tmp_path / "bad.json"
+    assert Settings.from_dict(_SETTINGS_DATA).to_dict() == _SETTINGS_DATA
+
+
+def test_config_load_save_and_get_set_reset_print(monkeypatch, capsys, tmp_path):
+    tmpdir = str(tmp_path)
+    cfg_path = os.path.join(tmpdir, "config.json")
+
+    # 初始时文件不存在，应使用默认设置
+    cfg = Config(config_file=cfg_path)
+    assert isinstance(cfg.settings, Settings)
+
+    # 修改部分设置并保存
+    cfg.set_setting("auto_save_interval", 7)
+    cfg.set_setting("log_level", "WARNING")
+    assert cfg.save_settings() is True
+
+    # 重新加载，确认持久化
+    cfg2 = Config(config_file=cfg_path)
+    assert cfg2.settings.auto_save_interval == 7
+    assert cfg2.settings.log_level == "WARNING"
+
+    # get_setting / reset_to_defaults
+    assert cfg2.get_setting("auto_save_interval") == 7
+    assert cfg2.get_setting("unknown_key") is None
+
+    cfg2.reset_to_defaults()
+    assert cfg2.settings.auto_save_interval == Settings().auto_save_interval
+
+    # print_settings 只需确保输出包含关键字段
+    cfg2.print_settings()
+    out, _ = capsys.readouterr()
+    assert "auto_save_interval" in out
+
+    # update_from_user_input：模拟输入
+    monkeypatch.setattr("builtins.input", lambda prompt="": "20")
+    updated = cfg2.update_from_user_input("auto_save_interval", "设置间隔")
+    assert updated is True
+    assert cfg2.settings.auto_save_interval == 20
+
+    # 非法 key
+    updated = cfg2.update_from_user_input("not_exists", "提示")
+    assert updated is False
+
+    # get_default_output_path / ensure_output_dir
+    out_path = cfg2.get_default_output_path(os.path.join(tmpdir, "a.xlsx"))
+    assert out_path.endswith("_评估结果.xlsx")
+
+    nested_out = os.path.join(tmpdir, "sub", "b.xlsx")
+    cfg2.ensure_output_dir(nested_out)
+    assert os.path.isdir(os.path.join(tmpdir, "sub"))
+
+    # 属性访问器
+    assert isinstance(cfg2.auto_save_interval, int)
+    assert isinstance(cfg2.max_retries, int)
+    assert isinstance(cfg2.default_retry_delay, int)
+    assert isinstance(cfg2.log_level, str)
+
+
+@pytest.fixture(scope="session")
+def bad_json_file(tmp_path_factory):
+    """无效 JSON 配置文件（加载失败时不会改写文件，可在会话内复用）"""
+    path = tmp_path_factory.mktemp("bad") / "bad.json"
     # 写入无效 JSON 内容，触发 _load_settings 的异常分支
-    cfg_path.write_text("{invalid", encoding="utf-8")
+    path.write_text("{invalid", encoding="utf-8")
+    return path
+
 
+def test_config_load_invalid_json_uses_defaults(bad_json_file, caplog):
     with caplog.at_level("WARNING"):
-        cfg = Config(config_file=str(cfg_path))
+        cfg = Config(config_file=str(bad_json_file))
 
     assert isinstance(cfg.settings, Settings)
     # 即使日志格式变更，这里只要产生 warning 级别日志即可
@@ -93,10 +101,11 @@ def test_config_save_settings_failure(monkeypatch, tmp_path, caplog):
     cfg = Config(config_file=str(cfg_path))
 
     # 模拟 open 抛出异常，触发 save_settings 的错误分支
+    # 只替换 settings 模块内的 open，不影响解释器其余部分
     def _boom(*args, **kwargs):  # pragma: no cover - 简单异常抛出
         raise OSError("disk full")
 
-    monkeypatch.setattr("builtins.open", _boom)
+    monkeypatch.setattr(settings_module, "open", _boom, raising=False)
 
     with caplog.at_level("ERROR"):
         ok = cfg.save_settings()
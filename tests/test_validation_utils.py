@@ -1,41 +1,202 @@
 
 import unittest
-import sys
 import os
 
-# Add project root to sys.path
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import pytest
 
 from semantic_tester.utils.validation_utils import ValidationUtils
 
-class TestValidationUtils(unittest.TestCase):
-    def test_validate_row_data_empty_ai_answer(self):
-        row_data = {
-            "question": "Valid Question",
-            "ai_answer": "", # Empty answer
-            "doc_name": "test.md"
-        }
+_BASE_ROW = {
+    "question": "Valid Question",
+    "ai_answer": "Valid Answer",
+    "doc_name": "test.md",
+}
+
+
+@pytest.mark.parametrize(
+    "override,expected",
+    [
         # This should return errors now as we reverted the loose validation
-        errors = ValidationUtils.validate_row_data(row_data)
-        self.assertIn("AI回答内容为空", errors, f"Expected error for empty AI answer, but got: {errors}")
-
-    def test_validate_row_data_valid(self):
-        row_data = {
-            "question": "Valid Question",
-            "ai_answer": "Valid Answer",
-            "doc_name": "test.md"
-        }
-        errors = ValidationUtils.validate_row_data(row_data)
-        self.assertEqual(errors, [])
-
-    def test_validate_row_data_empty_question(self):
-        row_data = {
-            "question": "",
-            "ai_answer": "Valid Answer",
-            "doc_name": "test.md"
+        ({"ai_answer": ""}, "AI回答内容为空"),
+        ({}, None),
+        ({"question": ""}, "问题内容为空"),
+    ],
+    ids=["empty_ai_answer", "valid", "empty_question"],
+)
+def test_validate_row_data(override, expected):
+    errors = ValidationUtils.validate_row_data({**_BASE_ROW, **override})
+    if expected is None:
+        assert errors == []
+    else:
+        assert expected in errors, f"Expected {expected!r}, but got: {errors}"
+
+
+@pytest.mark.parametrize(
+    "value,lo,hi,expected",
+    [
+        (5, 0, 10, True),
+        (" 10 ", 0, 20, True),
+        (2.5, 2.5, None, True),
+        (11, 0, 10, False),
+        (-1, 0, 10, False),
+        ("bad", 0, 20, False),
+        (None, None, None, False),
+    ],
+)
+def test_validate_numeric_range(value, lo, hi, expected):
+    assert ValidationUtils.validate_numeric_range(value, lo, hi) is expected
+
+
+@pytest.mark.parametrize(
+    "text,lo,hi,expected",
+    [
+        ("abc", 0, None, True),
+        ("abc", 3, 3, True),
+        ("", 1, None, False),
+        ("abcd", 0, 3, False),
+        (None, 0, None, False),
+    ],
+)
+def test_validate_string_length(text, lo, hi, expected):
+    assert ValidationUtils.validate_string_length(text, lo, hi) is expected
+
+
+class TestValidationUtils(unittest.TestCase):
+    @pytest.fixture(autouse=True)
+    def _use_tmp_path(self, tmp_path):
+        # unittest 用例无法直接注入 fixture，通过属性使用 pytest 的临时目录
+        self.tmpdir = str(tmp_path)
+
+    def test_validate_excel_file_checks_header_and_first_row(self):
+        import io
+        from openpyxl import Workbook
+
+        def write(target, rows):
+            wb = Workbook()
+            ws = wb.active
+            for row in rows:
+                ws.append(row)
+            wb.save(target)
+            return target
+
+        def in_memory(rows):
+            buffer = write(io.BytesIO(), rows)
+            buffer.seek(0)
+            return buffer
+
+        header = ["文档名称", "问题点", "AI客服回答"]
+
+        # 路径形式只验证一次，其余情况直接在内存中校验
+        ok = write(os.path.join(self.tmpdir, "ok.xlsx"), [header, ["a.md", "q", "a"]])
+        self.assertEqual(ValidationUtils.validate_excel_file(ok), [])
+
+        self.assertEqual(
+            ValidationUtils.validate_excel_file(
+                in_memory([header, ["a.md", "q", "a"]])
+            ),
+            [],
+        )
+        self.assertIn(
+            "Excel 文件为空", ValidationUtils.validate_excel_file(in_memory([header]))
+        )
+
+        errors = ValidationUtils.validate_excel_file(
+            in_memory([["问题点", "AI客服回答"], ["q", "a"]])
+        )
+        self.assertTrue(errors and "至少需要包含 3 列" in errors[0])
+
+    def test_validate_knowledge_base_directory_finds_nested_markdown(self):
+        tmpdir = self.tmpdir
+        self.assertIn(
+            "目录中未找到 Markdown 文件 (.md)",
+            ValidationUtils.validate_knowledge_base_directory(tmpdir),
+        )
+
+        nested = os.path.join(tmpdir, "a", "b")
+        os.makedirs(nested)
+        with open(os.path.join(nested, "Doc.MD"), "w", encoding="utf-8") as f:
+            f.write("# doc")
+        self.assertEqual(ValidationUtils.validate_knowledge_base_directory(tmpdir), [])
+
+    def test_validate_email_and_url(self):
+        for email in ["user.name+tag@example.com", "a@b.co"]:
+            self.assertTrue(ValidationUtils.validate_email(email), email)
+            self.assertTrue(ValidationUtils.validate_email(email, strict=True), email)
+        for email in [
+            "",
+            "no-at.example.com",
+            "@example.com",
+            "a@b.c",
+            "a@.com",
+            "a b@c.com",
+            "用户@example.com",
+        ]:
+            self.assertFalse(ValidationUtils.validate_email(email), email)
+
+        for url in ["http://example.com", "https://example.com:8080/path?q=1#top"]:
+            self.assertTrue(ValidationUtils.validate_url(url), url)
+            self.assertTrue(ValidationUtils.validate_url(url, strict=True), url)
+        for url in [
+            "",
+            "ftp://example.com",
+            "https://",
+            "https:///path",
+            "http://exa mple.com",
+        ]:
+            self.assertFalse(ValidationUtils.validate_url(url), url)
+
+    def test_validate_column_mapping(self):
+        valid = {
+            "doc_name_col_index": 0,
+            "question_col_index": 1,
+            "ai_answer_col_index": 2,
         }
-        errors = ValidationUtils.validate_row_data(row_data)
-        self.assertIn("问题内容为空", errors)
+        self.assertEqual(ValidationUtils.validate_column_mapping(valid, 3), [])
+        self.assertEqual(
+            ValidationUtils.validate_column_mapping({}, 3), ["列映射不能为空"]
+        )
+
+        errors = ValidationUtils.validate_column_mapping(
+            {"question_col_index": 1, "ai_answer_col_index": 1, "extra": 5}, 3
+        )
+        self.assertEqual(
+            errors,
+            [
+                "缺少必需的列映射: doc_name_col_index",
+                "列索引超出范围: extra = 5 (范围: 0-2)",
+                "列映射中有重复的列索引",
+            ],
+        )
+
+    def test_is_valid_file_path_extensions(self):
+        tmpdir = self.tmpdir
+        path = os.path.join(tmpdir, "data.XLSX")
+        with open(path, "wb"):
+            pass
+        self.assertTrue(ValidationUtils.is_valid_file_path(path, [".xlsx", ".xls"]))
+        self.assertTrue(ValidationUtils.is_valid_file_path(path))
+        self.assertTrue(
+            ValidationUtils.is_valid_file_path(path, ValidationUtils.EXCEL_EXTENSIONS)
+        )
+        # 扩展名匹配与容器类型无关，均不区分大小写
+        self.assertTrue(ValidationUtils.is_valid_file_path(path, frozenset({".XLSX"})))
+        self.assertTrue(ValidationUtils.is_valid_file_path(path, {".XLSX"}))
+        self.assertFalse(ValidationUtils.is_valid_file_path(path, [".csv"]))
+        self.assertFalse(
+            ValidationUtils.is_valid_file_path(
+                os.path.join(tmpdir, "missing.xlsx"), [".xlsx"]
+            )
+        )
+
+    def test_sanitize_filename(self):
+        self.assertEqual(
+            ValidationUtils.sanitize_filename('a<b>:c"d/e\\f|g?h*'), "a_b__c_d_e_f_g_h_"
+        )
+        self.assertEqual(
+            ValidationUtils.sanitize_filename(" .name\x01.txt. "), "name.txt"
+        )
+        self.assertEqual(ValidationUtils.sanitize_filename("..."), "unnamed")
+        self.assertEqual(ValidationUtils.sanitize_filename(""), "unnamed")
 
 if __name__ == '__main__':
     unittest.main()